@@ -7,12 +7,12 @@
 - 将统计结果按批次保存为JSON文件
 
 主要函数和变量：
-- get_label(entity_name, entities): 获取实体的标签
-- count_labels_in_batch(batch, entities): 统计批次中的标签数量
+- get_label(entity_name, name_to_label): 获取实体的标签
+- count_labels_in_batch(batch, name_to_label): 统计批次中的标签数量
+- count_labels_by_window(triplets, name_to_label, window_size): 一次线性扫描按窗口统计标签数量
 - sliding_window_triplets(triplets, window_size): 生成滑动窗口的三元组批次
 - save_to_json(file_path, data): 将数据保存为JSON文件
-- main(): 主函数，执行统计和保存操作
-- progress: 全局变量，用于跟踪计算进度
+- main(): 主函数，执行统计和保存操作，进度记录在 progress_registry 的 relevance 中
 
 使用示例：
 ```python
@@ -22,53 +22,75 @@ if __name__ == '__main__':
 
 import json # 用于处理 JSON 数据
 import data_preprocess # 导入数据预处理模块
+from csv_stream import DEFAULT_CHUNK_SIZE, iter_triplets # 用于流式读取三元组文件
+from jobs import check_cancelled # 用于在任务被取消时停止计算
+from progress_registry import tracker # 用于记录计算进度
 import os # 用于文件和目录操作
 from tqdm import tqdm # 用于显示进度条
 
-progress = 0
 
 
-def get_label(entity_name, entities):
+def get_label(entity_name, name_to_label):
     """
     获取实体的标签
     参数：
     - entity_name: 实体名称
-    - entities: 实体字典
+    - name_to_label: 实体名称到标签的索引（KnowledgeGraph.name_to_label）
 
     返回：
     - 实体的标签，如果找不到则返回 None
     """
-    for entity_id, entity_info in entities.items():
-        if entity_info['name'] == entity_name:
-            return entity_info['label']
-    return None
+    return name_to_label.get(entity_name)
 
 
-def count_labels_in_batch(batch, entities):
+def count_labels_in_batch(batch, name_to_label):
     """
     统计批次中的标签数量
     参数：
     - batch: 三元组批次
-    - entities: 实体字典
+    - name_to_label: 实体名称到标签的索引
 
     返回：
     - 不同标签的数量
     """
-    label_counts = {}
+    labels = set()
     for a, r, b in batch:
-        a_label = get_label(a, entities)
-        b_label = get_label(b, entities)
-
+        a_label = name_to_label.get(a)
+        b_label = name_to_label.get(b)
         if a_label:
-            if a_label not in label_counts:
-                label_counts[a_label] = 0
-            label_counts[a_label] += 1
+            labels.add(a_label)
+        if b_label:
+            labels.add(b_label)
+    return len(labels)  # 统计不同标签的数量
+
+
+def count_labels_by_window(triplets, name_to_label, window_size):
+    """
+    一次线性扫描三元组，按窗口统计每个窗口中不同标签的数量
+    参数：
+    - triplets: 三元组可迭代对象
+    - name_to_label: 实体名称到标签的索引
+    - window_size: 窗口大小
 
+    生成：
+    - 每个窗口中不同标签的数量
+    """
+    labels = set()
+    in_window = 0
+    for a, r, b in triplets:
+        a_label = name_to_label.get(a)
+        b_label = name_to_label.get(b)
+        if a_label:
+            labels.add(a_label)
         if b_label:
-            if b_label not in label_counts:
-                label_counts[b_label] = 0
-            label_counts[b_label] += 1
-    return len(label_counts)  # 统计不同标签的数量
+            labels.add(b_label)
+        in_window += 1
+        if in_window == window_size:
+            yield len(labels)
+            labels = set()
+            in_window = 0
+    if in_window:
+        yield len(labels)
 
 
 def sliding_window_triplets(triplets, window_size):
@@ -96,35 +118,50 @@ def save_to_json(file_path, data):
         f.write(json.dumps(data, ensure_ascii=False) + '\n')
 
 
-def main():
+def main(file_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
     """
     主函数，执行统计和保存操作
+    参数：
+    - file_path: 三元组 CSV 文件路径，为空时使用已加载的知识图谱，否则分块流式读取，不构建完整的三元组列表
+    - chunk_size: 流式读取时每块的行数
     """
-    global progress
-    triplets = data_preprocess.knowledge_graph.relationships
-    entities = data_preprocess.knowledge_graph.entities
+    progress = tracker('relevance')
+    knowledge_graph = data_preprocess.get_knowledge_graph()
+    name_to_label = knowledge_graph.name_to_label
     window_size = 100
+
+    if file_path is None:
+        triplets = knowledge_graph.relationships
+        total_batches = (len(triplets) + window_size - 1) // window_size
+        progress.start(total=total_batches, unit='batches')
+    else:
+        # 读完文件时最后几个窗口可能还未统计，结束前进度保持在 100% 以下
+        progress.start(unit='bytes')
+
+        def update_bytes_progress(bytes_read, total_bytes):
+            progress.set_total(total_bytes)
+            progress.update(min(bytes_read, total_bytes - 1))
+        triplets = iter_triplets(file_path, chunk_size, progress_callback=update_bytes_progress)
+        total_batches = None
     output_file = 'Data/relevance/label_counts.json'
 
     # 确保目录存在
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-    # 清空之前的记录
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write('')
-
-    total_batches = (len(triplets) + window_size - 1) // window_size
-
-    with tqdm(total=total_batches, desc="计算统计数据", unit="batch") as pbar:
-        for i, batch in enumerate(sliding_window_triplets(triplets, window_size)):
-            label_count = count_labels_in_batch(batch, entities)
+    # 覆盖之前的记录，整个计算过程只打开一次输出文件
+    with open(output_file, 'w', encoding='utf-8') as f, \
+            tqdm(total=total_batches, desc="计算统计数据", unit="batch") as pbar:
+        for i, label_count in enumerate(count_labels_by_window(triplets, name_to_label, window_size)):
             batch_result = {
                 'batch_number': i + 1,
                 'label_count': label_count
             }
-            save_to_json(output_file, batch_result)
+            f.write(json.dumps(batch_result, ensure_ascii=False) + '\n')
             pbar.update(1)
-            progress = (i + 1) / total_batches * 100
+            check_cancelled()
+            if total_batches is not None:
+                progress.advance()
+    progress.finish()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,97 @@
+"""
+实体邻接索引模块
+
+该模块为知识图谱建立按实体划分的邻接索引（出边和入边的三元组下标），
+查询一个实体的三元组只需与其度数成正比的时间。具体功能包括：
+- 列表存储：一次扫描建立 实体 -> 三元组下标列表 的字典
+- 列式存储：对头、尾实体编号列做稳定排序，得到 CSR 形式的偏移数组
+- 按三元组顺序返回实体作为头实体或尾实体参与的三元组
+
+主要类和方法：
+- AdjacencyIndex 类：实体邻接索引
+  - build(graph): 为 KnowledgeGraph 建立邻接索引
+  - outgoing(entity): 实体作为头实体的三元组下标
+  - incoming(entity): 实体作为尾实体的三元组下标
+  - triplet_offsets(entity): 实体参与的全部三元组下标（按顺序，自环只出现一次）
+
+使用示例：
+```python
+index = AdjacencyIndex.build(knowledge_graph)
+triplets = [knowledge_graph.relationships[i] for i in index.triplet_offsets('赵丹')]
+"""
+
+from heapq import merge  # 用于合并两个有序的下标列表
+
+
+class AdjacencyIndex:
+    def __init__(self, outgoing_lookup, incoming_lookup):
+        """
+        :param outgoing_lookup: 实体 -> 出边三元组下标（升序）的查询函数
+        :param incoming_lookup: 实体 -> 入边三元组下标（升序）的查询函数
+        """
+        self._outgoing = outgoing_lookup
+        self._incoming = incoming_lookup
+
+    @classmethod
+    def build(cls, graph):
+        """
+        为知识图谱建立邻接索引
+
+        :param graph: KnowledgeGraph 实例
+        :return: AdjacencyIndex 实例
+        """
+        if graph.storage == 'columnar':
+            return cls._build_columnar(graph.relationships)
+        outgoing = {}
+        incoming = {}
+        for i, (s, p, o) in enumerate(graph.relationships):
+            outgoing.setdefault(s, []).append(i)
+            incoming.setdefault(o, []).append(i)
+        return cls(lambda entity: outgoing.get(entity, []), lambda entity: incoming.get(entity, []))
+
+    @classmethod
+    def _build_columnar(cls, store):
+        import numpy as np
+
+        n = len(store.entity_interner)
+        lookup = store.entity_interner.lookup
+
+        def csr(column):
+            # 稳定排序保证同一实体的三元组下标保持升序
+            order = np.argsort(column, kind='stable').astype(np.int64)
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(column, minlength=n), out=offsets[1:])
+
+            def neighbours(entity):
+                idx = lookup(entity)
+                if idx is None:
+                    return []
+                return order[offsets[idx]:offsets[idx + 1]].tolist()
+            return neighbours
+
+        return cls(csr(store.heads), csr(store.tails))
+
+    def outgoing(self, entity):
+        """
+        :param entity: 实体
+        :return: 实体作为头实体的三元组下标列表（升序）
+        """
+        return self._outgoing(entity)
+
+    def incoming(self, entity):
+        """
+        :param entity: 实体
+        :return: 实体作为尾实体的三元组下标列表（升序）
+        """
+        return self._incoming(entity)
+
+    def triplet_offsets(self, entity):
+        """
+        :param entity: 实体
+        :return: 实体作为头实体或尾实体的三元组下标列表（升序，自环三元组只出现一次）
+        """
+        offsets = []
+        for i in merge(self._outgoing(entity), self._incoming(entity)):
+            if not offsets or offsets[-1] != i:
+                offsets.append(i)
+        return offsets
@@ -0,0 +1,584 @@
+"""
+性能基准测试脚本
+
+该脚本用于在合成数据上对各个评估模块进行性能对比。具体功能包括：
+- 生成指定规模的合成实体和三元组
+- 对比优化前后实现的耗时
+
+主要函数和变量：
+- make_synthetic_graph(n_triples, n_entities, n_labels, seed): 生成合成知识图谱
+- write_synthetic_csv(file_path, graph): 将合成三元组写入与 Data/triples_file.csv 相同格式的 CSV 文件
+- bench_label_index(): 对比实体标签线性扫描与名称索引的窗口标签统计
+- bench_columnar_memory(): 对比列表存储与列式存储的内存占用和统计结果
+- bench_startup(): 测量 init.create_app() 的启动耗时，并确认启动时未加载数据集和模型
+- bench_embedding_throughput(): 对比逐个名称与批量编码的 BERT 吞吐量（名称/秒）
+- bench_screening(): 对比逐条正则筛选与规则引擎（单进程、多进程、列式存储）的低质量三元组筛选耗时，并校验各类别结果一致
+- bench_degree(): 对比逐个实体计数与度数统计引擎的耗时（列表存储分块计数、列式存储 bincount），并校验度数分布一致
+- bench_components(): 对比 networkx 有向图与并查集（列表存储、列式存储）统计连通分量的耗时和内存峰值，并校验分量数量和规模分布一致
+- write_annotated_corpus(file_path, n_lines, max_entities, seed): 生成与“原文标注.txt”相同格式的合成标注文本
+- bench_triple_extraction(): 对比逐个向后扫描与前缀和窗口、类型位置索引的实体对生成耗时，并校验抽取的三元组一致
+- bench_snapshot(): 在独立进程中对比解析 CSV 与加载快照的耗时、常驻内存和首次统计耗时，并校验统计结果一致
+- bench_duplicates(): 对比 Counter 计数与分桶哈希扫描重复三元组的耗时和内存峰值，并校验重复数量和重复次数最多的三元组一致
+- BENCHMARKS: 基准名称到函数的映射
+
+使用示例：
+```python
+python benchmark.py label_index columnar_memory
+"""
+
+import csv  # 用于写入合成 CSV
+import os  # 用于文件和目录操作
+import random  # 用于生成合成数据
+import re  # 用于优化前的逐条筛选实现
+import subprocess  # 用于在独立进程中测量启动耗时
+import sys  # 用于读取命令行参数
+import tempfile  # 用于存放临时数据文件
+import time  # 用于计时
+import tracemalloc  # 用于统计内存占用
+import data_preprocess  # 导入数据预处理模块
+import Content_relevance_calculation  # 导入内容关联度计算模块
+import quality_screening  # 导入质量筛选模块
+import write_Triplet  # 导入标注文本三元组抽取模块
+import graph_snapshot  # 导入知识图谱快照模块
+import duplicate_detection  # 导入重复三元组检测模块
+from collections import Counter  # 用于优化前的度数统计实现
+from operator import itemgetter  # 用于按列取值
+from degree_engine import count_degrees, degree_summary  # 导入度数统计引擎
+from connected_components import build_components  # 导入连通分量统计模块
+from csv_stream import iter_triplets  # 用于逐个读取三元组
+
+
+def make_synthetic_graph(n_triples, n_entities, n_labels=50, n_relations=200, seed=0):
+    """
+    生成合成知识图谱
+    :param n_triples: 三元组数量
+    :param n_entities: 实体数量
+    :param n_labels: 标签种类数量
+    :param n_relations: 关系种类数量
+    :param seed: 随机种子
+    :return: KnowledgeGraph 实例
+    """
+    rng = random.Random(seed)
+    graph = data_preprocess.KnowledgeGraph()
+    names = ['实体%d' % i for i in range(n_entities)]
+    relations = ['关系%d' % i for i in range(n_relations)]
+    for i, name in enumerate(names):
+        graph.add_entity(str(i), name, '标签%d' % rng.randrange(n_labels))
+    for _ in range(n_triples):
+        graph.add_triplet(rng.choice(names), rng.choice(relations), rng.choice(names))
+    return graph
+
+
+def write_synthetic_csv(file_path, graph):
+    """
+    将合成三元组写入与 Data/triples_file.csv 相同格式的 CSV 文件
+    :param file_path: 输出文件路径
+    :param graph: KnowledgeGraph 实例
+    """
+    with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['头实体', '关系', '尾实体'])
+        writer.writerows(graph.relationships)
+
+
+def _timed(func, *args, **kwargs):
+    """
+    执行函数并返回结果和耗时（秒）
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _legacy_get_label(entity_name, entities):
+    # 优化前的实现：逐个扫描实体字典
+    for entity_id, entity_info in entities.items():
+        if entity_info['name'] == entity_name:
+            return entity_info['label']
+    return None
+
+
+def _legacy_count_labels_in_batch(batch, entities):
+    label_counts = {}
+    for a, r, b in batch:
+        for label in (_legacy_get_label(a, entities), _legacy_get_label(b, entities)):
+            if label:
+                label_counts[label] = label_counts.get(label, 0) + 1
+    return len(label_counts)
+
+
+def bench_label_index(n_triples=2000000, n_entities=200000, window_size=100, legacy_windows=5):
+    """
+    对比实体标签线性扫描与名称索引的窗口标签统计
+    线性扫描的耗时与实体数量成正比，全量运行无法完成，因此只运行 legacy_windows 个窗口并按比例外推
+    """
+    graph = make_synthetic_graph(n_triples, n_entities)
+    triplets = graph.relationships
+    total_windows = (len(triplets) + window_size - 1) // window_size
+
+    sample = triplets[:legacy_windows * window_size]
+    legacy_counts, legacy_time = _timed(
+        lambda: [_legacy_count_labels_in_batch(batch, graph.entities)
+                 for batch in Content_relevance_calculation.sliding_window_triplets(sample, window_size)])
+    legacy_estimate = legacy_time / legacy_windows * total_windows
+
+    counts, indexed_time = _timed(
+        lambda: list(Content_relevance_calculation.count_labels_by_window(
+            triplets, graph.name_to_label, window_size)))
+    assert counts[:legacy_windows] == legacy_counts
+
+    print(f"三元组: {n_triples}, 实体: {n_entities}, 窗口数: {total_windows}")
+    print(f"线性扫描: {legacy_time:.2f}s / {legacy_windows} 个窗口，全量估计 {legacy_estimate:.1f}s")
+    print(f"名称索引: {indexed_time:.2f}s（全量），加速约 {legacy_estimate / indexed_time:.0f} 倍")
+
+
+def _load_and_measure(file_path, storage):
+    tracemalloc.start()
+    graph = data_preprocess.KnowledgeGraph(storage=storage)
+    graph.load_triplets(file_path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return graph, current
+
+
+def bench_columnar_memory(n_triples=1000000, n_entities=100000):
+    """
+    对比列表存储与列式存储加载同一 CSV 后的内存占用，并校验各项统计结果一致
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'triples_file.csv')
+        write_synthetic_csv(file_path, make_synthetic_graph(n_triples, n_entities))
+        list_graph, list_bytes = _load_and_measure(file_path, 'list')
+        columnar_graph, columnar_bytes = _load_and_measure(file_path, 'columnar')
+
+    for method in ('calculate_triplet_count', 'calculate_relationship_type_count',
+                   'calculate_entity_degree_distribution', 'calculate_degree_count'):
+        assert getattr(list_graph, method)() == getattr(columnar_graph, method)(), method
+    assert list_graph.top_entities(100) == columnar_graph.top_entities(100)
+    assert list_graph.top_relationships(15) == columnar_graph.top_relationships(15)
+    assert list(list_graph.relationships[:1000]) == columnar_graph.relationships[:1000]
+
+    print(f"三元组: {n_triples}, 实体: {n_entities}")
+    print(f"列表存储: {list_bytes / 2 ** 20:.1f} MiB")
+    print(f"列式存储: {columnar_bytes / 2 ** 20:.1f} MiB（其中整数列 "
+          f"{columnar_graph.relationships.nbytes() / 2 ** 20:.1f} MiB），"
+          f"节省约 {list_bytes / columnar_bytes:.1f} 倍")
+
+
+_STARTUP_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import init
+app = init.create_app()
+elapsed = time.perf_counter() - start
+import data_preprocess, similarity_computation
+print(elapsed, data_preprocess.graph_registry.is_loaded(), similarity_computation.model is not None,
+      'transformers' in sys.modules)
+'''
+
+
+def bench_startup(repeat=5):
+    """
+    在独立进程中测量 init.create_app() 的启动耗时，并确认启动时未读取数据集、未加载模型
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT], cwd=cwd, check=True,
+                                capture_output=True, text=True).stdout.split()
+        elapsed, graph_loaded, model_loaded, transformers_imported = output[-4:]
+        assert graph_loaded == 'False' and model_loaded == 'False' and transformers_imported == 'False'
+        timings.append(float(elapsed))
+    print(f"create_app() 启动耗时: 最短 {min(timings) * 1000:.0f} ms, 平均 {sum(timings) / repeat * 1000:.0f} ms")
+    print("启动时未读取数据集、未加载 BERT 模型")
+
+
+def _random_names(n, seed=0):
+    rng = random.Random(seed)
+    return [''.join(chr(rng.randrange(0x4e00, 0x4e00 + 3000)) for _ in range(rng.randint(2, 12)))
+            for _ in range(n)]
+
+
+def _legacy_encode(names):
+    # 优化前的实现：每个名称单独调用一次模型，且不关闭梯度
+    import numpy as np
+    import similarity_computation
+    tokenizer, model = similarity_computation.load_model()
+    vectors = []
+    for name in names:
+        outputs = model(**tokenizer(name, return_tensors='pt'))
+        vectors.append(outputs.last_hidden_state[:, 0, :].detach().numpy())
+    return np.vstack(vectors)
+
+
+def bench_embedding_throughput(n_names=2000, batch_sizes=(16, 64, 256), num_threads=None):
+    """
+    对比逐个名称与批量编码的 BERT 吞吐量（名称/秒），模型路径由 similarity_computation.model_path 指定
+    """
+    import numpy as np
+    import similarity_computation
+    similarity_computation.set_num_threads(num_threads)
+    similarity_computation.load_model()
+    names = _random_names(n_names)
+
+    legacy_sample = names[:max(1, n_names // 10)]
+    legacy_vectors, legacy_time = _timed(_legacy_encode, legacy_sample)
+    print(f"逐个编码: {len(legacy_sample) / legacy_time:.0f} 名称/秒")
+    for batch_size in batch_sizes:
+        vectors, elapsed = _timed(similarity_computation.encode_names, names, batch_size)
+        assert np.allclose(vectors[:len(legacy_sample)], legacy_vectors, atol=1e-4)
+        print(f"批量编码 batch_size={batch_size}: {n_names / elapsed:.0f} 名称/秒")
+
+
+def make_noisy_triples(n_triples, n_entities=200000, n_relations=500, seed=0):
+    """
+    生成带有各类低质量样本的合成三元组（空字段、单字头实体、英文、纯数字、标点和不成对的括号）
+    """
+    rng = random.Random(seed)
+    names = ['实体%d' % i for i in range(n_entities)]
+    for i in range(0, n_entities, 50):
+        names[i] = rng.choice(['赵', 'Apple%d' % i, str(i), '《书名%d》' % i, '人物(%d' % i, '[作品%d]' % i,
+                               '地点{%d}' % i, '名称·%d' % i, ''])
+    relations = ['关系%d' % i for i in range(n_relations)]
+    for i in range(0, n_relations, 25):
+        relations[i] = rng.choice(['relation', '123', '关系-%d' % i, '关系 %d' % i, ''])
+    return [(rng.choice(names), rng.choice(relations), rng.choice(names)) for _ in range(n_triples)]
+
+
+def _legacy_filter_low_quality_triples(triples):
+    # 优化前的实现：逐个三元组执行正则匹配和逐字符的符号检查（去掉了进度条）
+    symbol_pairs = quality_screening.symbol_pairs
+    has_unpaired_symbols = quality_screening.has_unpaired_symbols
+    low_quality_triples = {category: [] for category in quality_screening.CATEGORIES}
+    for s, p, o in triples:
+        if not s or not p or not o:
+            low_quality_triples['不完备三元组'].append((s, p, o))
+            continue
+        if has_unpaired_symbols(s, symbol_pairs) or has_unpaired_symbols(o, symbol_pairs):
+            low_quality_triples['异常符号匹配'].append((s, p, o))
+        if not (2 <= len(s)):
+            low_quality_triples['低质量头实体'].append((s, p, o))
+        if re.search(r'[^\w\s]', p):
+            low_quality_triples['低质量关系'].append((s, p, o))
+        if re.search(r'[a-zA-Z]', s) or re.match(r'^\d+$', s) or re.search(r'[a-zA-Z]', p) or \
+                re.match(r'^\d+$', p) or re.search(r'[^a-zA-Z0-9\u4e00-\u9fff《》]', o):
+            low_quality_triples['不规范实体关系'].append((s, p, o))
+    return low_quality_triples, {category: len(rows) for category, rows in low_quality_triples.items()}
+
+
+def bench_screening(n_triples=1000000, workers=None):
+    """
+    对比逐条正则筛选与规则引擎的低质量三元组筛选耗时（列表存储、多进程和列式存储），并校验各类别的三元组和数量一致
+    :param workers: 多进程筛选的进程数，默认使用全部 CPU 核心
+    """
+    triples = make_noisy_triples(n_triples)
+    (legacy_triples, legacy_counts), legacy_time = _timed(_legacy_filter_low_quality_triples, triples)
+    print(f"三元组: {n_triples}, 各类别数量: {legacy_counts}")
+    print(f"逐条筛选: {legacy_time:.2f}s")
+
+    engine = quality_screening.get_rule_engine()
+    (engine_triples, engine_counts), engine_time = _timed(engine.screen, triples)
+    assert engine_counts == legacy_counts and engine_triples == legacy_triples
+    assert list(engine_counts) == list(legacy_counts)
+    print(f"规则引擎（列表存储）: {engine_time:.2f}s，加速约 {legacy_time / engine_time:.1f} 倍")
+
+    workers = workers or os.cpu_count()
+    screened = []
+    (parallel_triples, parallel_counts), parallel_time = _timed(engine.screen, triples, progress_callback=screened.append,
+                                                                workers=workers)
+    assert parallel_counts == legacy_counts and parallel_triples == legacy_triples
+    assert screened == sorted(screened) and screened[-1] == n_triples
+    print(f"规则引擎（{workers} 个进程）: {parallel_time:.2f}s，加速约 {legacy_time / parallel_time:.1f} 倍")
+
+    store = data_preprocess.KnowledgeGraph(storage='columnar').relationships
+    store.extend(triples)
+    (columnar_triples, columnar_counts), columnar_time = _timed(engine.screen, store)
+    assert columnar_counts == legacy_counts and columnar_triples == legacy_triples
+    print(f"规则引擎（列式存储）: {columnar_time:.2f}s，加速约 {legacy_time / columnar_time:.1f} 倍")
+
+
+def _legacy_degree_count(triples):
+    degrees = Counter(map(itemgetter(0), triples))
+    degrees.update(map(itemgetter(2), triples))
+    return dict(sorted(Counter(degrees.values()).items()))
+
+
+def bench_degree(n_triples=1000000, n_entities=200000):
+    """
+    对比逐个实体计数（Counter）与度数统计引擎的耗时（列表存储分块计数、列式存储对编号列 bincount），并校验度数分布一致
+    """
+    graph = make_synthetic_graph(n_triples, n_entities)
+    legacy, legacy_time = _timed(_legacy_degree_count, graph.relationships)
+    print(f"三元组: {n_triples}, 实体: {n_entities}")
+    print(f"逐个实体计数: {legacy_time:.2f}s")
+
+    counter, engine_time = _timed(count_degrees, graph)
+    assert counter.histogram('total') == legacy
+    print(f"分块计数（列表存储，同时得到出度和入度）: {engine_time:.2f}s，加速约 {legacy_time / engine_time:.1f} 倍")
+
+    columnar_graph = data_preprocess.KnowledgeGraph(storage='columnar')
+    columnar_graph.add_triplets(graph.relationships)
+    columnar_counter, columnar_time = _timed(count_degrees, columnar_graph)
+    for kind in ('out', 'in', 'total'):
+        assert columnar_counter.histogram(kind) == counter.histogram(kind), kind
+    print(f"bincount（列式存储）: {columnar_time:.3f}s，加速约 {legacy_time / columnar_time:.1f} 倍")
+
+    summary, summary_time = _timed(degree_summary, counter)
+    print(f"对数分箱与幂律拟合: {summary_time:.3f}s，总度数拟合结果 {summary['total']['power_law']}")
+
+
+def _legacy_components(entities, triples):
+    import networkx as nx
+    graph = nx.DiGraph()
+    for entity in entities:
+        graph.add_node(entity)
+    for s, p, o in triples:
+        graph.add_edge(s, o, relationship=p)
+    sizes = Counter(map(len, nx.weakly_connected_components(graph)))
+    return nx.number_weakly_connected_components(graph), dict(sorted(sizes.items()))
+
+
+def _peak_memory(func, *args):
+    tracemalloc.start()
+    result, elapsed = _timed(func, *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_components(n_triples=1000000, n_entities=1000000):
+    """
+    对比 networkx 有向图与并查集统计连通分量的耗时和内存峰值（列表存储对实体字符串编号，列式存储直接使用编号列），并校验结果一致
+    实体数量与三元组数量相近时图谱较稀疏，会产生大量连通分量
+    """
+    graph = make_synthetic_graph(n_triples, n_entities)
+    print(f"三元组: {n_triples}, 实体: {n_entities}")
+    (legacy_count, legacy_sizes), legacy_time, legacy_peak = _peak_memory(
+        _legacy_components, graph.entities, graph.relationships)
+    print(f"networkx: {legacy_time:.2f}s，内存峰值 {legacy_peak / 2 ** 20:.1f} MiB，连通分量 {legacy_count}")
+
+    components, list_time, list_peak = _peak_memory(build_components, graph.entities, graph.relationships)
+    assert components.count == legacy_count and components.component_sizes() == legacy_sizes
+    print(f"并查集（列表存储）: {list_time:.2f}s，内存峰值 {list_peak / 2 ** 20:.1f} MiB，"
+          f"加速约 {legacy_time / list_time:.1f} 倍")
+
+    columnar_graph = data_preprocess.KnowledgeGraph(storage='columnar')
+    for entity_id, entity in graph.entities.items():
+        columnar_graph.add_entity(entity_id, entity['name'], entity['label'])
+    columnar_graph.add_triplets(graph.relationships)
+    columnar, columnar_time, columnar_peak = _peak_memory(
+        build_components, columnar_graph.entities, columnar_graph.relationships)
+    assert columnar.count == legacy_count and columnar.component_sizes() == legacy_sizes
+    print(f"并查集（列式存储）: {columnar_time:.2f}s，内存峰值 {columnar_peak / 2 ** 20:.1f} MiB，"
+          f"加速约 {legacy_time / columnar_time:.1f} 倍")
+    print(f"最大连通分量: {len(components.largest_component())} 个节点")
+
+
+_ANNOTATION_TYPES = ['PER', 'PER', 'GZ', 'TIM', 'BOOK', 'GM', 'ZZ', 'HH', 'LOC', 'ORG']
+
+
+def write_annotated_corpus(file_path, n_lines=2000, max_entities=300, seed=0):
+    """
+    生成与“原文标注.txt”相同格式的合成标注文本：实体后紧跟 {-长度 类型} 标注，实体之间以标点分隔
+    :param file_path: 输出文件路径
+    :param n_lines: 行数
+    :param max_entities: 每行最多的实体数量，越大句子越长
+    :param seed: 随机种子
+    """
+    rng = random.Random(seed)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for _ in range(n_lines):
+            parts = ['据']
+            for _ in range(rng.randint(5, max_entities)):
+                entity_type = rng.choice(_ANNOTATION_TYPES)
+                name = ''.join(chr(rng.randrange(0x4e00, 0x4e00 + 3000))
+                               for _ in range(rng.choice([2, 3, 9, 10, 12]) if entity_type == 'BOOK' else rng.randint(2, 4)))
+                if entity_type == 'BOOK':
+                    name = '《%s》' % name
+                parts.append('%s{-%d %s}%s' % (name, len(name), entity_type, rng.choice(['、', '，', '：', '的', ''])))
+            f.write(''.join(parts) + '\n')
+
+
+_LEGACY_RELATION = [('GZ}', 'PER'), ('TIM', 'PER'), ('BOO', 'PER'), ('GZ}', 'PER'), ('GM}', 'PER'), ('PER', 'GZ}'),
+                    ('PER', ' BO'), ('PER', 'GM}'), ('PER', 'ZZ}'), ('PER', 'TIM'),
+                    ('PER', 'LOC'), ('PER', 'BOO'), ('BOO', 'TIM'), ('PER', 'HH}')]
+
+
+def _legacy_pair_triples(entity_list, entity_type_list):
+    # 优化前的实现：每个起点逐个向后扫描并累加距离，直到超过 100；关系表为列表，按类型对依次判断
+    triples = []
+    for i, start_type in enumerate(entity_type_list):
+        start = entity_list[i]
+        distance = 0
+        used = set()
+        for j in range(i + 1, len(entity_type_list)):
+            end_type, end = entity_type_list[j], entity_list[j]
+            distance += {'：': 1, '，': 5, '、': 2}.get(end_type, 1)
+            if distance > 100:
+                break
+            pair = (start_type, end_type)
+            if pair not in _LEGACY_RELATION:
+                continue
+            if pair in (('GZ}', 'PER'), ('TIM', 'PER')):
+                name = '人物官职' if start_type == 'GZ}' else '人物时代'
+                if name not in used:
+                    triples.append((end, name, distance, start))
+                    used.add(name)
+            elif pair in (('PER', 'GZ}'), ('PER', 'TIM'), ('PER', 'GM}'), ('PER', 'ZZ}'), ('PER', 'HH}'), ('PER', 'LOC')):
+                name, key = {'GZ}': ('人物官职', '人物官职'), 'TIM': ('人物时代', '人物时代'),
+                             'GM}': ('人物功名', 'GM'), 'ZZ}': ('人物字号', 'ZZ'), 'HH}': ('人物字号', 'HH'),
+                             'LOC': ('人物地名', 'LOC')}[end_type]
+                if key not in used:
+                    triples.append((start, name, distance, end))
+                    used.add(key)
+            elif pair in (('PER', ' BO'), ('PER', 'BOO')):
+                triples.append((start, '人物题刻' if '题' in end else '人物书名', distance, end[2:]))
+            elif pair == ('BOO', 'PER'):
+                triples.append((end, '人物书名', distance, start))
+            elif pair == ('BOO', 'TIM'):
+                triples.append((start[2:], '题刻时代' if '题' in start else '书名时代', distance, end))
+    return triples
+
+
+def bench_triple_extraction(n_lines=2000, max_entities=300):
+    """
+    对比逐个向后扫描与前缀和窗口、类型位置索引生成实体对的耗时，并校验抽取的三元组（包括顺序和距离）一致
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_path = os.path.join(tmp, '原文标注.txt')
+        write_annotated_corpus(corpus_path, n_lines, max_entities)
+        with open(corpus_path, 'r', encoding='utf-8') as f:
+            sentences = [write_Triplet.index2tag(sentence) for line in f for sentence in line.rstrip('\n').split('。')]
+        tokens = sum(len(entity_list) for entity_list, _ in sentences)
+        print(f"行数: {n_lines}, 标注数: {tokens}")
+
+        legacy, legacy_time = _timed(lambda: [_legacy_pair_triples(*sentence) for sentence in sentences])
+        print(f"逐个向后扫描: {legacy_time:.2f}s")
+        paired, paired_time = _timed(lambda: [write_Triplet.pair_triples(*sentence) for sentence in sentences])
+        assert paired == legacy
+        print(f"前缀和窗口: {paired_time:.2f}s，加速约 {legacy_time / paired_time:.1f} 倍，"
+              f"三元组 {sum(map(len, paired))} 个")
+
+        _, extract_time = _timed(lambda: list(write_Triplet.extract_triples(corpus_path)))
+        print(f"extract_triples 全流程（含读取和标注解析）: {extract_time:.2f}s")
+
+
+_SNAPSHOT_SCRIPT = '''
+import os, sys, time, zlib
+import data_preprocess, graph_snapshot
+
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+source, path, storage = sys.argv[1:4]
+baseline = rss()
+start = time.perf_counter()
+if source == 'csv':
+    graph = data_preprocess.KnowledgeGraph(storage=storage)
+    graph.load_triplets(path)
+else:
+    graph = graph_snapshot.load_snapshot(path, storage)
+load_time = time.perf_counter() - start
+load_rss = rss() - baseline
+start = time.perf_counter()
+top = graph.top_entities(10)
+degrees = graph.calculate_degree_count()
+first_time = time.perf_counter() - start
+print(load_time, load_rss, first_time, rss() - baseline,
+      zlib.crc32(repr((top, sorted(degrees.items()))).encode('utf-8')))
+'''
+
+
+def bench_snapshot(n_triples=1000000, n_entities=100000):
+    """
+    在独立进程中对比解析 CSV 与加载快照的耗时、常驻内存（RSS，扣除导入模块后的基线，读取 /proc/self/statm，仅限 Linux）
+    和加载后首次统计的耗时，并校验统计结果一致
+    加载快照时数组只是被映射，首次统计时才读入页缓存（与其他进程共享），因此同时报告首次统计后的耗时和常驻内存
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'triples_file.csv')
+        snapshot_dir = os.path.join(tmp, 'snapshot')
+        write_synthetic_csv(file_path, make_synthetic_graph(n_triples, n_entities))
+        graph = data_preprocess.KnowledgeGraph(storage='columnar')
+        graph.load_triplets(file_path)
+        _, save_time = _timed(graph_snapshot.save_snapshot, graph, snapshot_dir)
+        snapshot_bytes = sum(os.path.getsize(os.path.join(snapshot_dir, name)) for name in os.listdir(snapshot_dir))
+        print(f"三元组: {n_triples}, 实体: {n_entities}, CSV {os.path.getsize(file_path) / 2 ** 20:.1f} MiB, "
+              f"快照 {snapshot_bytes / 2 ** 20:.1f} MiB（保存耗时 {save_time:.2f}s）")
+        for storage in ('list', 'columnar'):
+            results = {}
+            for source, path in (('csv', file_path), ('snapshot', snapshot_dir)):
+                output = subprocess.run([sys.executable, '-c', _SNAPSHOT_SCRIPT, source, path, storage], cwd=cwd,
+                                        check=True, capture_output=True, text=True).stdout.split()
+                load_time, load_rss, first_time, first_rss, digest = output[-5:]
+                results[source] = (float(load_time), int(load_rss) / 2 ** 20, float(first_time),
+                                   int(first_rss) / 2 ** 20, digest)
+            assert results['csv'][4] == results['snapshot'][4]
+            for source, (load_time, load_rss, first_time, first_rss, _) in results.items():
+                print(f"{storage} / {source}: 加载 {load_time * 1000:.0f} ms，RSS 增加 {load_rss:.1f} MiB；"
+                      f"首次统计 {first_time * 1000:.0f} ms，RSS 增加 {first_rss:.1f} MiB")
+            print(f"{storage}: 快照加载加速约 {results['csv'][0] / results['snapshot'][0]:.0f} 倍")
+
+
+def _legacy_duplicates(file_path, top_n):
+    # 以三元组元组为键的 Counter 和首次出现位置字典，内存占用与不同三元组的数量成正比
+    counts = Counter()
+    first = {}
+    for row, triple in enumerate(iter_triplets(file_path)):
+        counts[triple] += 1
+        first.setdefault(triple, row)
+    top = sorted(((count, first[triple]) for triple, count in counts.items() if count > 1),
+                 key=lambda item: (-item[0], item[1]))[:top_n]
+    return sum(counts.values()) - len(counts), top
+
+
+def bench_duplicates(n_triples=1000000, n_entities=200000, duplicate_rate=0.1, top_n=20):
+    """
+    对比 Counter 计数与分桶哈希扫描（duplicate_detection.scan_file）统计重复三元组的耗时和内存峰值，并校验结果一致
+    合成三元组中按 duplicate_rate 混入重复的三元组；tracemalloc 会拖慢内存分配，耗时和内存峰值分两次测量
+    """
+    rng = random.Random(0)
+    graph = make_synthetic_graph(n_triples, n_entities)
+    triples = graph.relationships
+    triples.extend(rng.choice(triples[:n_triples // 10]) for _ in range(int(n_triples * duplicate_rate)))
+    rng.shuffle(triples)
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'triples_file.csv')
+        write_synthetic_csv(file_path, graph)
+        print(f"三元组: {len(triples)}, CSV {os.path.getsize(file_path) / 2 ** 20:.1f} MiB")
+        (legacy_count, legacy_top), legacy_time = _timed(_legacy_duplicates, file_path, top_n)
+        legacy_peak = _peak_memory(_legacy_duplicates, file_path, top_n)[2]
+        print(f"Counter: {legacy_time:.2f}s，内存峰值 {legacy_peak / 2 ** 20:.1f} MiB，重复 {legacy_count}")
+        for near in (False, True):
+            report, scan_time = _timed(duplicate_detection.scan_file, file_path, near=near, top_n=top_n)
+            scan_peak = _peak_memory(lambda: duplicate_detection.scan_file(file_path, near=near, top_n=top_n))[2]
+            assert report['duplicates'] == legacy_count
+            assert [(item['count'], item['first_row']) for item in report['top_duplicates']] == legacy_top
+            label = '分桶扫描（含近似重复）' if near else '分桶扫描'
+            print(f"{label}: {scan_time:.2f}s，内存峰值 {scan_peak / 2 ** 20:.1f} MiB，"
+                  f"重复率 {report['duplicate_rate']:.2%}")
+
+
+BENCHMARKS = {
+    'label_index': bench_label_index,
+    'columnar_memory': bench_columnar_memory,
+    'startup': bench_startup,
+    'embedding_throughput': bench_embedding_throughput,
+    'screening': bench_screening,
+    'degree': bench_degree,
+    'components': bench_components,
+    'triple_extraction': bench_triple_extraction,
+    'snapshot': bench_snapshot,
+    'duplicates': bench_duplicates,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
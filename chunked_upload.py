@@ -0,0 +1,346 @@
+"""
+分块续传上传模块
+
+该模块为大文件上传提供可续传的分块上传会话，上传内容直接流式写入磁盘，不在内存中缓存整个文件。具体功能包括：
+- 每个上传会话对应 Data/uploads 下的一个 .part 文件，客户端按顺序发送分块，每块附带起始偏移量
+- 偏移量与已接收的字节数不一致时拒绝该分块并返回当前偏移量，客户端可从该位置续传
+- 接收时同步计算整个文件的 sha256，完成后可作为数据集的缓存键，不需要再读一遍文件
+- 接收时逐行校验 CSV：第一行表头必须包含所需的列，之后每行的字段数不能多于表头（与 pandas 解析的规则一致）
+- 可选在上传过程中转换为只包含所需列的标准 CSV（固定列顺序、带 BOM、去除空行），加载时不再解析多余的列
+- 会话信息保存在 .json 文件中，服务重启后根据已接收的 .part 文件恢复哈希和校验状态，继续续传
+
+主要类和方法：
+- UploadOffsetError 异常：分块的偏移量与已接收的字节数不一致，offset 为已接收的字节数
+- UploadSession 类：单个上传会话
+  - write(offset, stream): 从可读对象流式写入一个分块
+  - complete(sha256): 结束上传，校验最后一行和客户端提供的哈希，返回上传完成的文件路径
+  - status(): 会话状态
+- UploadManager 类：上传会话的登记表
+  - create(file_type, size, mode, convert): 创建会话
+  - get(upload_id): 获取会话（服务重启后从磁盘恢复）
+  - discard(upload_id): 放弃会话并删除临时文件
+- upload_manager: 全局上传会话登记表
+- UPLOAD_COLUMNS: 文件类型 -> 所需的列
+
+使用示例：
+```python
+session = upload_manager.create('triples', size=os.path.getsize(path))
+with open(path, 'rb') as f:
+    session.write(0, f)
+file_path = session.complete()
+"""
+
+import codecs  # 用于按块增量解码 utf-8
+import csv  # 用于解析和写出 CSV 行
+import hashlib  # 用于计算上传内容的 sha256
+import json  # 用于保存会话信息
+import os  # 用于文件和目录操作
+import threading  # 用于保证同一会话的分块依次写入
+import time  # 用于清理过期的会话
+from csv_stream import ENTITY_COLUMNS, TRIPLET_COLUMNS  # 三元组和实体文件的列名
+from utils import get_uuid  # 用于生成会话编号
+
+UPLOAD_DIR = os.path.join('Data', 'uploads')
+UPLOAD_COLUMNS = {'triples': TRIPLET_COLUMNS, 'entities': ENTITY_COLUMNS}
+UPLOAD_MODES = ('replace', 'append')
+# 超过该时间（秒）未更新的会话在创建新会话时清理
+UPLOAD_EXPIRY = 24 * 3600
+_BLOCK_SIZE = 1 << 20
+
+
+class UploadOffsetError(ValueError):
+    """
+    分块的偏移量与已接收的字节数不一致
+    """
+
+    def __init__(self, offset):
+        super().__init__(f"Chunk offset does not match the received size {offset}")
+        self.offset = offset
+
+
+class _CsvValidator:
+    """
+    按块增量校验 CSV：按引号的奇偶判断完整的记录，跨分块的记录留到下一块再解析
+    """
+
+    def __init__(self, columns, output=None):
+        self.columns = columns
+        self.rows = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._pending = ''
+        self._record = []
+        self._quotes = 0
+        self._header = None
+        self._line = 0
+        self._writer = csv.writer(output) if output is not None else None
+
+    def feed(self, data, final=False):
+        text = self._pending + self._decoder.decode(data, final)
+        lines = text.split('\n')
+        self._pending = '' if final else lines.pop()
+        records = []
+        for line in lines:
+            self._record.append(line)
+            self._quotes += line.count('"')
+            if self._quotes % 2 == 0:
+                records.append('\n'.join(self._record) + '\n')
+                self._record = []
+                self._quotes = 0
+        if final and self._record:
+            raise ValueError("CSV file ends inside a quoted field")
+        self._check(csv.reader(records))
+        if final and self._header is None:
+            raise ValueError("CSV file is empty")
+
+    def _check(self, rows):
+        for row in rows:
+            self._line += 1
+            if not row:
+                continue  # 与加载时一致，跳过空行
+            if self._header is None:
+                self._set_header(row)
+                continue
+            if len(row) > len(self._header):
+                raise ValueError(f"Line {self._line}: expected at most {len(self._header)} fields, saw {len(row)}")
+            self.rows += 1
+            if self._writer is not None:
+                row = row + [''] * (self._width - len(row))
+                self._writer.writerow([row[i] for i in self._indexes])
+
+    def _set_header(self, header):
+        try:
+            self._indexes = [header.index(column) for column in self.columns]
+        except ValueError:
+            raise ValueError(f"CSV header {header} does not contain columns {list(self.columns)}")
+        self._header = header
+        self._width = max(self._indexes) + 1
+        if self._writer is not None:
+            self._writer.writerow(self.columns)
+
+
+class UploadSession:
+    def __init__(self, upload_id, directory, file_type, size=None, mode='replace', convert=False, created_at=None):
+        """
+        :param upload_id: 会话编号
+        :param directory: 临时文件目录
+        :param file_type: triples 或 entities
+        :param size: 客户端声明的文件大小，未知时为 None
+        :param mode: replace 替换原文件，append 追加到原文件
+        :param convert: 是否在上传过程中转换为只包含所需列的标准 CSV
+        :param created_at: 创建时间
+        """
+        self.id = upload_id
+        self.directory = directory
+        self.file_type = file_type
+        self.size = size
+        self.mode = mode
+        self.convert = convert
+        self.created_at = created_at or time.time()
+        self.completed = False
+        self.error = None
+        self.offset = 0
+        self.lock = threading.Lock()
+        self._sha256 = hashlib.sha256()
+        self._part = open(self.part_path, 'ab')
+        self._converted = open(self.converted_path, 'w', encoding='utf-8-sig', newline='') if convert else None
+        self._validator = _CsvValidator(UPLOAD_COLUMNS[file_type], self._converted)
+
+    @property
+    def part_path(self):
+        return os.path.join(self.directory, f'{self.id}.part')
+
+    @property
+    def converted_path(self):
+        return os.path.join(self.directory, f'{self.id}.csv')
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.directory, f'{self.id}.json')
+
+    def _save_meta(self):
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'file_type': self.file_type, 'size': self.size, 'mode': self.mode,
+                       'convert': self.convert, 'created_at': self.created_at}, f)
+
+    def _consume(self, data, final=False):
+        # 校验失败后会话不能再继续，只能放弃
+        try:
+            self._validator.feed(data, final)
+        except ValueError as e:
+            self.error = str(e)
+            raise
+        self._sha256.update(data)
+        self.offset += len(data)
+
+    def _check_open(self):
+        if self.completed:
+            raise ValueError("Upload already completed")
+        if self.error is not None:
+            raise ValueError(self.error)
+
+    def _replay(self):
+        # 服务重启后从已接收的 .part 文件恢复哈希、校验和转换状态
+        with open(self.part_path, 'rb') as f:
+            for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+                self._consume(block)
+
+    def write(self, offset, stream):
+        """
+        从可读对象流式写入一个分块
+        :param offset: 分块在文件中的起始偏移量
+        :param stream: 有 read(size) 方法的二进制可读对象
+        :return: 写入后已接收的字节数
+        """
+        with self.lock:
+            self._check_open()
+            if offset != self.offset:
+                raise UploadOffsetError(self.offset)
+            try:
+                for block in iter(lambda: stream.read(_BLOCK_SIZE), b''):
+                    if self.size is not None and self.offset + len(block) > self.size:
+                        raise ValueError(f"Upload exceeds the declared size {self.size}")
+                    self._consume(block)
+                    self._part.write(block)
+            finally:
+                self._part.flush()
+                os.utime(self.meta_path)
+            return self.offset
+
+    def complete(self, sha256=None):
+        """
+        结束上传
+        :param sha256: 客户端计算的文件哈希，提供时与服务端的结果比较
+        :return: 上传完成的文件路径（转换时为转换后的文件）
+        """
+        with self.lock:
+            if not self.completed:
+                self._check_open()
+                if self.size is not None and self.offset != self.size:
+                    raise ValueError(f"Received {self.offset} of {self.size} bytes")
+                if sha256 is not None and sha256.lower() != self.sha256:
+                    raise ValueError("sha256 does not match the uploaded content")
+                self._consume(b'', final=True)
+                self.close()
+                self.completed = True
+            return self.converted_path if self.convert else self.part_path
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+    @property
+    def rows(self):
+        return self._validator.rows
+
+    def status(self):
+        return {
+            'upload_id': self.id,
+            'file_type': self.file_type,
+            'mode': self.mode,
+            'convert': self.convert,
+            'size': self.size,
+            'offset': self.offset,
+            'rows': self.rows,
+            'sha256': self.sha256,
+            'completed': self.completed,
+            'error': self.error,
+        }
+
+    def close(self):
+        self._part.close()
+        if self._converted is not None:
+            self._converted.close()
+
+    def remove(self):
+        """
+        关闭并删除会话的临时文件
+        """
+        self.close()
+        for path in (self.part_path, self.converted_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class UploadManager:
+    def __init__(self, directory=UPLOAD_DIR):
+        """
+        :param directory: 临时文件目录
+        """
+        self.directory = directory
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, file_type, size=None, mode='replace', convert=False):
+        """
+        创建上传会话
+        :param file_type: triples 或 entities
+        :param size: 文件大小，未知时为 None
+        :param mode: replace 或 append
+        :param convert: 是否转换为只包含所需列的标准 CSV
+        :return: UploadSession
+        """
+        if file_type not in UPLOAD_COLUMNS:
+            raise ValueError(f"Invalid file type: {file_type}")
+        if mode not in UPLOAD_MODES:
+            raise ValueError(f"Invalid upload mode: {mode}")
+        os.makedirs(self.directory, exist_ok=True)
+        self._expire()
+        session = UploadSession(get_uuid(), self.directory, file_type, size, mode, convert)
+        session._save_meta()
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, upload_id):
+        """
+        :param upload_id: 会话编号
+        :return: UploadSession，不存在时抛出 KeyError
+        """
+        with self._lock:
+            session = self._sessions.get(upload_id)
+            if session is None:
+                session = self._restore(upload_id)
+                self._sessions[upload_id] = session
+            return session
+
+    def _restore(self, upload_id):
+        meta_path = os.path.join(self.directory, f'{upload_id}.json')
+        if not upload_id.isalnum() or not os.path.exists(meta_path):
+            raise KeyError(upload_id)
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        session = UploadSession(upload_id, self.directory, meta['file_type'], meta['size'], meta['mode'],
+                                meta['convert'], meta['created_at'])
+        try:
+            session._replay()
+        except ValueError:
+            pass  # 校验失败的会话保留错误信息，等待客户端放弃
+        return session
+
+    def discard(self, upload_id):
+        """
+        放弃会话并删除临时文件
+        """
+        session = self.get(upload_id)
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+        with session.lock:
+            session.remove()
+
+    def _expire(self):
+        deadline = time.time() - UPLOAD_EXPIRY
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.json') and os.path.getmtime(path) < deadline:
+                upload_id = name[:-len('.json')]
+                with self._lock:
+                    session = self._sessions.pop(upload_id, None)
+                if session is not None:
+                    session.remove()
+                else:
+                    for suffix in ('.part', '.csv', '.json'):
+                        if os.path.exists(os.path.join(self.directory, upload_id + suffix)):
+                            os.remove(os.path.join(self.directory, upload_id + suffix))
+
+
+upload_manager = UploadManager()
@@ -0,0 +1,171 @@
+"""
+CSV 流式分块读取模块
+
+该模块按固定大小的块流式读取三元组和实体 CSV 文件，不需要一次把整个文件读入内存。具体功能包括：
+- 优先使用 pandas 的 C 解析器分块读取，未安装 pandas 时回退到标准库 csv.reader
+- 每块为 (列1, 列2, 列3) 元组组成的列表，缺失的字段以空字符串表示
+- 通过回调函数报告已读取的字节数，用于显示进度
+- 向已有的 CSV 文件追加行，用于增量上传
+
+主要函数和变量：
+- iter_csv_chunks(file_path, columns, chunk_size, engine, progress_callback): 按列名分块读取任意 CSV
+- iter_triplet_chunks(file_path, ...): 分块读取三元组文件（头实体, 关系, 尾实体）
+- iter_entity_chunks(file_path, ...): 分块读取实体文件（id, name, label）
+- iter_triplets(file_path, ...): 逐个生成三元组
+- append_csv_rows(file_path, columns, rows): 向 CSV 文件追加行，文件不存在时先写入表头
+- TRIPLET_COLUMNS / ENTITY_COLUMNS: 三元组和实体文件的列名
+
+使用示例：
+```python
+for chunk in iter_triplet_chunks('Data/triples_file.csv', chunk_size=100000,
+                                 progress_callback=lambda done, total: print(done / total)):
+    knowledge_graph.add_triplets(chunk)
+"""
+
+import csv  # 用于标准库解析
+import os  # 用于获取文件大小
+from itertools import chain  # 用于将分块展开为逐个三元组
+
+TRIPLET_COLUMNS = ('头实体', '关系', '尾实体')
+ENTITY_COLUMNS = ('id', 'name', 'label')
+DEFAULT_CHUNK_SIZE = 100000
+# 至少每读取这么多字节报告一次进度
+PROGRESS_STEP = 1 << 20
+
+
+class _CountingReader:
+    """
+    包装二进制文件对象，统计已读取的字节数
+    """
+
+    def __init__(self, f, total, progress_callback):
+        self._f = f
+        self.total = total
+        self.bytes_read = 0
+        self._progress_callback = progress_callback
+        self._next_report = 0
+
+    def _count(self, data):
+        self.bytes_read += len(data)
+        if self._progress_callback is not None and (self.bytes_read >= self._next_report or not data):
+            self._progress_callback(self.bytes_read, self.total)
+            self._next_report = self.bytes_read + PROGRESS_STEP
+        return data
+
+    def read(self, size=-1):
+        return self._count(self._f.read(size))
+
+    def readline(self, size=-1):
+        return self._count(self._f.readline(size))
+
+    def __iter__(self):
+        for line in self._f:
+            yield self._count(line)
+
+
+def _pandas_chunks(reader, columns, chunk_size):
+    import pandas as pd
+    # 所有字段按字符串读取，空字段保持为空字符串
+    for frame in pd.read_csv(reader, dtype=str, na_filter=False, encoding='utf-8-sig', usecols=list(columns),
+                             chunksize=chunk_size):
+        yield list(zip(*(frame[column].tolist() for column in columns)))
+
+
+def _stdlib_chunks(reader, columns, chunk_size):
+    lines = iter(reader)
+    first = next(lines, None)
+    if first is None:
+        return
+    # 第一行去除 BOM 后按 utf-8 解码，其余行逐行解码交给 csv.reader
+    text_lines = chain([first.decode('utf-8-sig')], (line.decode('utf-8') for line in lines))
+    rows = csv.reader(text_lines)
+    header = next(rows)
+    try:
+        indexes = [header.index(column) for column in columns]
+    except ValueError:
+        raise ValueError(f"CSV header {header} does not contain columns {list(columns)}")
+    width = max(indexes) + 1
+    chunk = []
+    for row in rows:
+        if not row:
+            continue  # 与 csv.DictReader 一致，跳过空行
+        if len(row) < width:
+            row = row + [''] * (width - len(row))
+        chunk.append(tuple(row[i] for i in indexes))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv_chunks(file_path, columns, chunk_size=DEFAULT_CHUNK_SIZE, engine='auto', progress_callback=None):
+    """
+    按列名分块读取 CSV 文件
+    :param file_path: CSV 文件路径（utf-8，可带 BOM）
+    :param columns: 需要读取的列名
+    :param chunk_size: 每块的行数
+    :param engine: 'pandas'、'stdlib' 或 'auto'（已安装 pandas 时使用 pandas）
+    :param progress_callback: 进度回调函数 callback(已读取字节数, 文件总字节数)
+    :return: 生成元组列表
+    """
+    if engine == 'auto':
+        try:
+            import pandas  # noqa: F401
+            engine = 'pandas'
+        except ImportError:
+            engine = 'stdlib'
+    if engine == 'pandas':
+        parse = _pandas_chunks
+    elif engine == 'stdlib':
+        parse = _stdlib_chunks
+    else:
+        raise ValueError(f"Unknown CSV engine: {engine}")
+
+    with open(file_path, 'rb') as f:
+        reader = _CountingReader(f, os.path.getsize(file_path), progress_callback)
+        yield from parse(reader, columns, chunk_size)
+
+
+def iter_triplet_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE, engine='auto', progress_callback=None):
+    """
+    分块读取三元组文件
+    :return: 生成 (头实体, 关系, 尾实体) 元组列表
+    """
+    return iter_csv_chunks(file_path, TRIPLET_COLUMNS, chunk_size, engine, progress_callback)
+
+
+def iter_entity_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE, engine='auto', progress_callback=None):
+    """
+    分块读取实体文件
+    :return: 生成 (id, name, label) 元组列表
+    """
+    return iter_csv_chunks(file_path, ENTITY_COLUMNS, chunk_size, engine, progress_callback)
+
+
+def append_csv_rows(file_path, columns, rows):
+    """
+    向 CSV 文件追加行，文件不存在时先写入带 BOM 的表头
+    :param file_path: CSV 文件路径
+    :param columns: 表头
+    :param rows: 行的可迭代对象
+    """
+    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+        with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+            csv.writer(f).writerow(columns)
+    else:
+        # 原文件最后一行没有换行符时先补上，避免与追加的第一行连在一起
+        with open(file_path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) not in (b'\n', b'\r'):
+                f.write(b'\r\n')
+    with open(file_path, 'a', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+
+def iter_triplets(file_path, chunk_size=DEFAULT_CHUNK_SIZE, engine='auto', progress_callback=None):
+    """
+    逐个生成三元组，内部仍按块读取
+    :return: 生成 (头实体, 关系, 尾实体) 元组
+    """
+    return chain.from_iterable(iter_triplet_chunks(file_path, chunk_size, engine, progress_callback))
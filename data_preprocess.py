@@ -11,10 +11,16 @@
 
 主要类和方法：
 - KnowledgeGraph 类：用于构建和分析知识图谱
+  - KnowledgeGraph(storage='list'): storage='columnar' 时使用 triple_store 中的整数列式存储（需要 NumPy）
   - add_entity(entity_id, name, label): 添加一个实体到知识图谱中
   - add_triplet(entity1, relationship, entity2): 添加一个三元组到知识图谱中
-  - load_entities(file_path): 从 CSV 文件中加载实体数据
-  - load_triplets(file_path): 从 CSV 文件中加载三元组数据
+  - add_triplets(triplets): 批量添加三元组到知识图谱中
+  - add_unique_triplets(triplets): 批量添加三元组，跳过图谱中已有的和重复出现的三元组，并更新重复报告
+  - get_label_by_name(name): 根据实体名称获取实体标签
+  - get_ids_by_name(name): 根据实体名称获取所有同名实体的标识
+  - load_entities(file_path): 从 CSV 文件中分块流式加载实体数据
+  - load_triplets(file_path, dedup=False): 从 CSV 文件中分块流式加载三元组数据，dedup 为 True 时加载后去除完全重复的三元组
+  - deduplicate(top_n): 去除完全重复的三元组（只保留第一次出现的），返回重复报告并保存在 duplicate_report 中
   - calculate_entity_count(): 计算实体的数量
   - calculate_relationship_count(): 计算关系的数量
   - calculate_triplet_count(): 计算三元组的数量
@@ -29,6 +35,23 @@
   - top_entity_labels(top_n=10): 获取前 N 个常见实体标签
   - top_entities_with_triplets(top_n=10): 获取前 N 个具有三元组的实体
   - calculate_connected_components(): 计算连通分量的数量
+  - statistics(): 获取一次聚合得到的统计结果（GraphStatistics），图谱修改前重复调用直接返回缓存
+  - degree_counter(): 获取出度、入度统计结果（degree_engine.DegreeCounter）
+  - connected_components(): 获取连通分量的并查集（connected_components.UnionFind），可查询分量规模分布和最大连通分量的成员
+  - 已计算的统计结果、度数和连通分量在添加实体和三元组时按增量更新，耗时与新增数据量成正比
+  - adjacency(): 获取实体邻接索引（AdjacencyIndex）
+  - get_entity_triplets(entity, direction, limit): 获取实体参与的三元组
+- GraphRegistry 类：按需加载 Data 目录下的知识图谱，上传新数据后可重新加载
+  - get(): 获取知识图谱，首次调用时才读取 CSV 文件
+  - 设置 snapshot_dir 后优先加载与 CSV 文件一致的快照（graph_snapshot），否则读取 CSV 并保存快照，供其他进程直接映射
+  - dedup 为 True 时加载三元组后去除完全重复的三元组；增量追加时跳过已有的三元组，结果与重新加载一致
+  - reload(): 立即重新加载知识图谱
+  - invalidate(): 丢弃已加载的知识图谱，下次使用时重新加载
+  - append_triplets(file_path) / append_entities(file_path): 增量上传，追加到数据文件并加入已加载的知识图谱
+- graph_registry: 全局 GraphRegistry 实例
+- get_knowledge_graph(): 获取全局知识图谱（等价于 graph_registry.get()）
+
+导入本模块不会读取任何数据文件；仍可通过 data_preprocess.knowledge_graph 访问全局知识图谱，访问时按需加载。
 
 使用示例：
 ```python
@@ -45,18 +68,49 @@ relationship_count = knowledge_graph.calculate_relationship_count()
 
 # 获取前 10 个常见实体
 top_entities = knowledge_graph.top_entities(10)
+
+# 使用全局知识图谱，上传数据后使其失效
+knowledge_graph = get_knowledge_graph()
+graph_registry.invalidate()
 """
 
-import csv
-from collections import Counter
-import networkx as nx
+import os
+import threading
+from collections import Counter, defaultdict
+from itertools import compress
+from graph_statistics import GraphStatistics
+from connected_components import build_components
+from adjacency_index import AdjacencyIndex
+from csv_stream import (DEFAULT_CHUNK_SIZE, ENTITY_COLUMNS, TRIPLET_COLUMNS, append_csv_rows, iter_entity_chunks,
+                        iter_triplet_chunks)
 
 
 class KnowledgeGraph:
-    def __init__(self):
+    def __init__(self, storage='list'):
+        """
+            :param storage: 存储引擎，'list' 使用 Python 字典和列表，'columnar' 使用整数驻留的 NumPy 列式存储
+        """
         # 初始化实体和关系
-        self.entities = {}
-        self.relationships = []
+        if storage == 'list':
+            self.entities = {}
+            self.relationships = []
+        elif storage == 'columnar':
+            from triple_store import ColumnarEntityStore, ColumnarTripleStore, StringInterner
+            # 实体名称与三元组中的头尾实体共用一张驻留表
+            names = StringInterner()
+            self.entities = ColumnarEntityStore(names)
+            self.relationships = ColumnarTripleStore(names)
+        else:
+            raise ValueError(f"Unknown storage engine: {storage}")
+        self.storage = storage
+        # 名称索引：名称 -> 标签（同名时取最先加入的实体），名称 -> 同名实体标识列表
+        self.name_to_label = {}
+        self.name_to_ids = defaultdict(list)
+        # 版本号在每次修改图谱时递增，用于判断缓存的统计结果是否过期
+        self._version = 0
+        self._cache = {}
+        # 最近一次去重的报告（duplicate_detection），未去重时为 None
+        self.duplicate_report = None
 
     def add_entity(self, entity_id, name, label):
         """
@@ -66,7 +120,55 @@ class KnowledgeGraph:
             :param name: 实体的名称
             :param label: 实体的标签
         """
-        self.entities[entity_id] = {'name': name, 'label': label}
+        old = self.entities.get(entity_id)
+        if old is not None and old['name'] != name:
+            # 实体被重命名，从旧名称的索引中移除
+            self._unindex_name(old['name'], entity_id)
+        new = {'name': name, 'label': label}
+        self.entities[entity_id] = new
+        if self._cache:
+            self._update_cache(lambda key, value: self._add_entity_to_cached(key, value, entity_id, old, new))
+        else:
+            self._version += 1
+
+        ids = self.name_to_ids[name]
+        if entity_id not in ids:
+            ids.append(entity_id)
+        if ids[0] == entity_id:
+            self.name_to_label[name] = label
+
+    def _unindex_name(self, name, entity_id):
+        """
+            从名称索引中移除一个实体标识
+
+            :param name: 实体的名称
+            :param entity_id: 实体的唯一标识
+        """
+        ids = self.name_to_ids[name]
+        ids.remove(entity_id)
+        if ids:
+            self.name_to_label[name] = self.entities[ids[0]]['label']
+        else:
+            del self.name_to_ids[name]
+            del self.name_to_label[name]
+
+    def get_label_by_name(self, name):
+        """
+            根据实体名称获取实体标签
+
+            :param name: 实体的名称
+            :return: 实体的标签，如果找不到则返回 None
+        """
+        return self.name_to_label.get(name)
+
+    def get_ids_by_name(self, name):
+        """
+            根据实体名称获取所有同名实体的标识
+
+            :param name: 实体的名称
+            :return: 实体标识列表
+        """
+        return list(self.name_to_ids.get(name, ()))
 
     def add_triplet(self, entity1, relationship, entity2):
         """
@@ -76,35 +178,184 @@ class KnowledgeGraph:
             :param relationship: 关系类型
             :param entity2: 尾实体的唯一标识
         """
-        self.relationships.append((entity1, relationship, entity2))
-
-    def load_entities(self, file_path):
-        """
-            从 CSV 文件中加载实体数据
+        self.add_triplets([(entity1, relationship, entity2)])
+
+    def add_triplets(self, triplets):
+        """
+            批量添加三元组到知识图谱中
+
+            :param triplets: (头实体, 关系, 尾实体) 元组的可迭代对象
+        """
+        if not self._cache:
+            self.relationships.extend(triplets)
+            self._version += 1
+            return
+        triplets = list(triplets)
+        start = len(self.relationships)
+        self.relationships.extend(triplets)
+        self._update_cache(lambda key, value: self._add_triplets_to_cached(key, value, triplets, start))
+
+    def add_unique_triplets(self, triplets):
+        """
+            批量添加三元组，跳过图谱中已有的三元组，本批中重复出现的三元组只添加第一次出现的；
+            图谱已去重时同时更新重复报告；已有三元组的键索引在第一次追加时建立，之后随追加增量更新
+
+            :param triplets: (头实体, 关系, 尾实体) 元组的可迭代对象
+            :return: 实际添加的三元组列表
+        """
+        from duplicate_detection import TripleIndex, update_report
+
+        triplets = [tuple(triple) for triple in triplets]
+        existing = self._cached('triplet_index', lambda: TripleIndex(self.relationships)).find(self.relationships,
+                                                                                                triplets)
+        added = [triple for triple in dict.fromkeys(triplets) if triple not in existing]
+        self.add_triplets(added)
+        if self.duplicate_report is not None:
+            update_report(self.duplicate_report, triplets, added)
+        return added
+
+    def _update_cache(self, update):
+        """
+            图谱被修改时递增版本号；修改前仍然有效的缓存结果交给 update(key, value) 增量更新，
+            update 返回 True 的结果标记为新版本，其余结果在下次使用时重新计算
+
+            :param update: 增量更新函数
+        """
+        fresh = [(key, value) for key, (version, value) in self._cache.items() if version == self._version]
+        self._version += 1
+        for key, value in fresh:
+            if update(key, value):
+                self._cache[key] = (self._version, value)
+
+    def _add_triplets_to_cached(self, key, value, triplets, start):
+        if key in ('statistics', 'components'):
+            value.add_triplets(triplets)
+        elif key == 'triplet_index':
+            value.add(self.relationships, start)
+        elif key == 'degrees':
+            if self.storage == 'columnar':
+                value.add_codes(self.relationships.heads[start:], self.relationships.tails[start:],
+                                len(self.relationships.entity_interner))
+            else:
+                value.add_chunk(triplets)
+        else:
+            return False
+        return True
+
+    def _add_entity_to_cached(self, key, value, entity_id, old, new):
+        if key == 'statistics':
+            value.add_entity(old, new)
+        elif key == 'components':
+            value.add(entity_id)
+        elif key in ('degrees', 'triplet_index'):
+            pass
+        else:
+            return False
+        return True
+
+    def load_entities(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE, engine='auto', progress_callback=None):
+        """
+            从 CSV 文件中分块流式加载实体数据
 
             :param file_path: CSV 文件的路径
+            :param chunk_size: 每块的行数
+            :param engine: CSV 解析引擎，见 csv_stream.iter_csv_chunks
+            :param progress_callback: 进度回调函数 callback(已读取字节数, 文件总字节数)
         """
-        with open(file_path, 'r', encoding='utf-8-sig') as f:  # 处理 BOM
-            reader = csv.DictReader(f)
-            for row in reader:
-                entity_id = row['id']
-                name = row['name']
-                label = row['label']
+        for chunk in iter_entity_chunks(file_path, chunk_size, engine, progress_callback):
+            for entity_id, name, label in chunk:
                 self.add_entity(entity_id, name, label)
 
-    def load_triplets(self, file_path):
+    def load_triplets(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE, engine='auto', progress_callback=None,
+                      dedup=False):
         """
-            从 CSV 文件中加载三元组数据
+            从 CSV 文件中分块流式加载三元组数据
 
             :param file_path: CSV 文件的路径
+            :param chunk_size: 每块的行数
+            :param engine: CSV 解析引擎，见 csv_stream.iter_csv_chunks
+            :param progress_callback: 进度回调函数 callback(已读取字节数, 文件总字节数)
+            :param dedup: 加载后是否去除完全重复的三元组
+        """
+        for chunk in iter_triplet_chunks(file_path, chunk_size, engine, progress_callback):
+            self.add_triplets(chunk)
+        if dedup:
+            self.deduplicate()
+
+    def deduplicate(self, top_n=20):
+        """
+            去除完全重复的三元组，只保留每个三元组第一次出现的位置，其余三元组的先后顺序不变；
+            按哈希分桶统计，额外的内存占用与三元组数量无关
+
+            :param top_n: 报告中列出的重复次数最多的三元组数量
+            :return: 重复报告（duplicate_detection.DuplicateScanner.finish 的结果）
+        """
+        import numpy as np
+        from duplicate_detection import find_duplicates
+
+        report, duplicate_rows = find_duplicates(self.relationships, top_n=top_n)
+        if len(duplicate_rows):
+            keep = np.ones(len(self.relationships), dtype=bool)
+            keep[duplicate_rows] = False
+            if self.storage == 'columnar':
+                self.relationships = self.relationships.select(keep)
+            else:
+                self.relationships = list(compress(self.relationships, keep.tolist()))
+            self._version += 1
+        self.duplicate_report = report
+        return report
+
+    def statistics(self):
+        """
+            获取聚合统计结果，结果会被缓存，直到通过 add_entity / add_triplet 修改图谱
+
+            :return: GraphStatistics 实例
+        """
+        return self._cached('statistics', lambda: GraphStatistics.compute(self))
+
+    def _cached(self, key, compute):
+        """
+            获取按版本号缓存的计算结果，图谱被修改后重新计算
+
+            :param key: 缓存键
+            :param compute: 计算函数
+            :return: 计算结果
+        """
+        entry = self._cache.get(key)
+        if entry is None or entry[0] != self._version:
+            entry = (self._version, compute())
+            self._cache[key] = entry
+        return entry[1]
+
+    def adjacency(self):
+        """
+            获取实体邻接索引，加载完成后首次使用时建立一次，图谱修改前重复调用直接返回缓存
+
+            :return: AdjacencyIndex 实例
+        """
+        return self._cached('adjacency', lambda: AdjacencyIndex.build(self))
+
+    def get_entity_triplets(self, entity, direction='both', limit=None):
+        """
+            获取实体参与的三元组，耗时与实体的度数成正比
+
+            :param entity: 实体
+            :param direction: 'out' 仅头实体，'in' 仅尾实体，'both' 头实体或尾实体
+            :param limit: 最多返回的三元组数量，None 表示全部
+            :return: 三元组列表，按加载顺序排列
         """
-        with open(file_path, 'r', encoding='utf-8-sig') as f:  # 处理 BOM
-            reader = csv.DictReader(f)
-            for row in reader:
-                entity1 = row['头实体']
-                relationship = row['关系']
-                entity2 = row['尾实体']
-                self.add_triplet(entity1, relationship, entity2)
+        index = self.adjacency()
+        if direction == 'out':
+            offsets = index.outgoing(entity)
+        elif direction == 'in':
+            offsets = index.incoming(entity)
+        elif direction == 'both':
+            offsets = index.triplet_offsets(entity)
+        else:
+            raise ValueError(f"Unknown direction: {direction}")
+        if limit is not None:
+            offsets = offsets[:limit]
+        return [self.relationships[i] for i in offsets]
 
     def calculate_entity_count(self):
         """
@@ -136,8 +387,7 @@ class KnowledgeGraph:
 
             :return: 关系类型数量
         """
-        relationship_types = set([rel[1] for rel in self.relationships])
-        return len(relationship_types)
+        return self.statistics().relationship_type_count
 
     def calculate_entity_label_counts(self):
         """
@@ -145,8 +395,7 @@ class KnowledgeGraph:
 
             :return: 标签计数器
         """
-        labels = [entity['label'] for entity in self.entities.values()]
-        return Counter(labels)
+        return Counter(self.statistics().label_counts)
 
     def calculate_entity_label_types_count(self):
         """
@@ -154,8 +403,7 @@ class KnowledgeGraph:
 
             :return: 标签类型数量
         """
-        label_counts = self.calculate_entity_label_counts()
-        return len(label_counts)
+        return self.statistics().label_types_count
 
     def calculate_entity_degree_distribution(self):
         """
@@ -163,9 +411,7 @@ class KnowledgeGraph:
 
             :return: 度分布字典
         """
-        degrees = Counter([rel[0] for rel in self.relationships] + [rel[2] for rel in self.relationships])
-        sorted_degrees = dict(sorted(degrees.items(), key=lambda item: item[1], reverse=True))
-        return sorted_degrees
+        return self.statistics().degree_distribution()
 
     def calculate_entity_relationship_density(self):
         """
@@ -173,9 +419,7 @@ class KnowledgeGraph:
 
             :return: 实体关系密度
         """
-        if self.calculate_entity_count() == 0:
-            return 0
-        return round(self.calculate_relationship_count() / self.calculate_entity_count(), 2)
+        return self.statistics().entity_relationship_density
 
     def top_entities(self, top_n=100):
         """
@@ -184,8 +428,7 @@ class KnowledgeGraph:
             :param top_n: 要获取的实体数量
             :return: 前 N 个常见实体
         """
-        entity_counts = Counter([rel[0] for rel in self.relationships] + [rel[2] for rel in self.relationships])
-        return entity_counts.most_common(top_n)
+        return self.statistics().top_entities(top_n)
 
     def top_relationships(self, top_n=15):
         """
@@ -194,8 +437,7 @@ class KnowledgeGraph:
             :param top_n: 要获取的关系数量
             :return: 前 N 个常见关系
         """
-        relationship_counts = Counter([rel[1] for rel in self.relationships])
-        return relationship_counts.most_common(top_n)
+        return self.statistics().top_relationships(top_n)
 
     def calculate_degree_count(self):
         """
@@ -203,10 +445,7 @@ class KnowledgeGraph:
 
             :return: 度数计数字典
         """
-        degree_count = Counter(self.calculate_entity_degree_distribution().values())
-        # 将结果转换为字典
-        degree_count_dict = dict(degree_count)
-        return degree_count_dict
+        return self.statistics().degree_count()
 
     def top_entity_labels(self, top_n=10):
         """
@@ -215,8 +454,7 @@ class KnowledgeGraph:
             :param top_n: 要获取的标签数量
             :return: 前 N 个常见标签
         """
-        label_counts = self.calculate_entity_label_counts()
-        return label_counts.most_common(top_n)
+        return self.statistics().top_entity_labels(top_n)
 
     def top_entities_with_triplets(self, top_n=10):
         """
@@ -225,40 +463,177 @@ class KnowledgeGraph:
            :param top_n: 要获取的实体数量
            :return: 前 N 个具有三元组的实体及其三元组
         """
-        entity_counts = Counter([rel[0] for rel in self.relationships] + [rel[2] for rel in self.relationships])
-        top_entities = entity_counts.most_common(top_n)
+        top_entities = self.statistics().top_entities(top_n)
         top_entities_with_triplets = []
 
+        # 通过邻接索引只取实体作为头实体或尾实体的三元组，不会误匹配同名的关系
         for entity, count in top_entities:
-            entity_triplets = []
-            for rel in self.relationships:
-                if entity in rel:
-                    entity_triplets.append(rel)
+            entity_triplets = self.get_entity_triplets(entity)
             top_entities_with_triplets.append((entity, count, entity_triplets))
 
         return top_entities_with_triplets
 
+    def degree_counter(self, progress_callback=None):
+        """
+            获取每个实体的出度和入度，首次调用时分块统计，之后随新增的三元组增量更新
+
+            :param progress_callback: 统计时每块完成后调用 callback(已处理的三元组数量, 三元组总数)
+            :return: degree_engine.DegreeCounter 实例
+        """
+        from degree_engine import count_degrees
+        return self._cached('degrees', lambda: count_degrees(self, progress_callback=progress_callback))
+
+    def connected_components(self):
+        """
+            获取弱连通分量的并查集（节点为实体标识和三元组中的头、尾实体），之后随新增的实体和三元组增量更新
+
+            :return: connected_components.UnionFind 实例
+        """
+        return self._cached('components', lambda: build_components(self.entities, self.relationships))
+
     def calculate_connected_components(self):
         """
             计算连通分量的数量
 
             :return: 连通分量的数量
         """
-        graph = nx.DiGraph()
-        for entity in self.entities:
-            graph.add_node(entity)
-        for s, p, o in self.relationships:
-            graph.add_edge(s, o, relationship=p)
+        return self.connected_components().count
 
-        return nx.number_weakly_connected_components(graph)
 
+ENTITIES_FILE = os.path.join('Data', 'entities_file.csv')
+TRIPLES_FILE = os.path.join('Data', 'triples_file.csv')
 
-# 创建 KnowledgeGraph 实例并加载数据
-knowledge_graph = KnowledgeGraph()
 
-# 加载实体和三元组数据
-knowledge_graph.load_entities(r'Data\entities_file.csv')
-knowledge_graph.load_triplets(r'Data\triples_file.csv')
+class GraphRegistry:
+    def __init__(self, entities_file=ENTITIES_FILE, triples_file=TRIPLES_FILE, storage='list', snapshot_dir=None,
+                 dedup=False):
+        """
+            按需加载的知识图谱注册表
+
+            :param entities_file: 实体 CSV 文件的路径
+            :param triples_file: 三元组 CSV 文件的路径
+            :param storage: KnowledgeGraph 使用的存储引擎
+            :param snapshot_dir: 知识图谱快照目录，None 表示不使用快照
+            :param dedup: 加载三元组后是否去除完全重复的三元组
+        """
+        self.entities_file = entities_file
+        self.triples_file = triples_file
+        self.storage = storage
+        self.snapshot_dir = snapshot_dir
+        self.dedup = dedup
+        self._graph = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.snapshot_dir:
+            from graph_snapshot import file_fingerprints, load_snapshot, save_snapshot, snapshot_is_current
+            # 先记录源文件信息再读取，读取期间文件被修改时快照会被视为过期
+            sources = file_fingerprints([self.entities_file, self.triples_file])
+            if snapshot_is_current(self.snapshot_dir, sources, self.dedup):
+                try:
+                    return load_snapshot(self.snapshot_dir, self.storage)
+                except (OSError, ValueError, KeyError) as e:
+                    # 快照文件缺失或损坏时重新解析 CSV 文件，并保存新的快照
+                    print(f"Failed to load graph snapshot, parsing CSV files: {e}")
+        graph = KnowledgeGraph(storage=self.storage)
+        graph.load_entities(self.entities_file)
+        graph.load_triplets(self.triples_file, dedup=self.dedup)
+        if self.snapshot_dir:
+            save_snapshot(graph, self.snapshot_dir, sources)
+        return graph
+
+    def get(self):
+        """
+            获取知识图谱，首次调用时加载数据，多个线程同时调用时只加载一次
+
+            :return: KnowledgeGraph 实例
+        """
+        graph = self._graph
+        if graph is None:
+            with self._lock:
+                if self._graph is None:
+                    self._graph = self._load()
+                graph = self._graph
+        return graph
+
+    def reload(self):
+        """
+            立即重新加载知识图谱，加载完成前正在使用旧图谱的任务不受影响
+
+            :return: 新的 KnowledgeGraph 实例
+        """
+        graph = self._load()
+        with self._lock:
+            self._graph = graph
+        return graph
+
+    def invalidate(self):
+        """
+            丢弃已加载的知识图谱，下次调用 get() 时重新加载
+        """
+        with self._lock:
+            self._graph = None
+
+    def append_triplets(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+            将 CSV 文件中的三元组追加到三元组文件末尾，知识图谱已加载时同时加入图谱并增量更新统计结果
+
+            :param file_path: 新增三元组的 CSV 文件路径（表头与三元组文件相同）
+            :param chunk_size: 每块的行数
+            :return: (加入知识图谱的三元组列表, 追加前知识图谱中的三元组数量)，知识图谱未加载时为
+                     (文件中的全部三元组, None)；dedup 为 True 时跳过图谱中已有的三元组
+        """
+        triplets = [triple for chunk in iter_triplet_chunks(file_path, chunk_size) for triple in chunk]
+        with self._lock:
+            append_csv_rows(self.triples_file, TRIPLET_COLUMNS, triplets)
+            graph = self._graph
+            previous_count = None
+            if graph is not None:
+                previous_count = len(graph.relationships)
+                if self.dedup:
+                    # 与重新加载的结果一致：三元组文件保留原始行，图谱中只加入没有出现过的三元组
+                    triplets = graph.add_unique_triplets(triplets)
+                else:
+                    graph.add_triplets(triplets)
+        return triplets, previous_count
+
+    def append_entities(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+            将 CSV 文件中的实体追加到实体文件末尾，知识图谱已加载时同时加入图谱并增量更新统计结果
+
+            :param file_path: 新增实体的 CSV 文件路径（表头与实体文件相同）
+            :param chunk_size: 每块的行数
+            :return: 新增的实体数量
+        """
+        entities = [entity for chunk in iter_entity_chunks(file_path, chunk_size) for entity in chunk]
+        with self._lock:
+            append_csv_rows(self.entities_file, ENTITY_COLUMNS, entities)
+            if self._graph is not None:
+                for entity_id, name, label in entities:
+                    self._graph.add_entity(entity_id, name, label)
+        return len(entities)
+
+    def is_loaded(self):
+        """
+            :return: 知识图谱是否已加载
+        """
+        return self._graph is not None
+
+
+graph_registry = GraphRegistry()
+
+
+def get_knowledge_graph():
+    """
+        获取全局知识图谱，首次调用时加载数据
 
+        :return: KnowledgeGraph 实例
+    """
+    return graph_registry.get()
 
 
+def __getattr__(name):
+    # 兼容 data_preprocess.knowledge_graph 的旧用法，访问时才加载数据
+    if name == 'knowledge_graph':
+        return graph_registry.get()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,227 @@
+"""
+实体度数统计引擎
+
+该模块基于头实体、尾实体的整数编号用 bincount 统计度数，并给出适合大规模图谱的度分布摘要。具体功能包括：
+- 列式存储直接对已有的头、尾实体编号列分块做 bincount，累加出度和入度，不需要解码三元组
+- 列表存储和流式读取按块在 C 层对实体字符串计数，结束时一次性编码为整数数组，之后的统计与列式存储相同
+- 出度、入度、总度数（出度 + 入度，自环计两次）的精确直方图
+- 对数分箱直方图：箱宽按几何级数增长，适合在双对数坐标中观察长尾
+- 离散幂律分布拟合：按 Clauset 等人的方法用近似最大似然估计指数 alpha，并以 KS 距离最小为准则选取 xmin
+
+主要类和方法：
+- DegreeCounter 类：度数累加器
+  - add_chunk(chunk): 累加一块 (头实体, 关系, 尾实体) 三元组
+  - add_codes(heads, tails, n_entities): 累加已编码的头、尾实体编号
+  - degrees(kind): 每个实体的出度、入度或总度数数组
+  - histogram(kind): 度数 -> 实体数量
+- count_degrees(graph, chunk_size, progress_callback): 统计 KnowledgeGraph 的度数
+- log_binned_histogram(degrees, bins_per_decade): 对数分箱直方图
+- fit_power_law(degrees, max_candidates): 幂律分布拟合
+- degree_summary(counter): 三种度数的对数分箱直方图和幂律拟合结果
+- DEGREE_KINDS: 度数类型 out、in、total
+
+使用示例：
+```python
+counter = count_degrees(knowledge_graph, progress_callback=print)
+degree_count = counter.histogram('total')
+summary = degree_summary(counter)
+"""
+
+import math  # 用于计算拟合误差
+from collections import Counter  # 用于在 C 层统计块内的实体出现次数
+from itertools import chain, repeat  # 用于合并出度、入度的实体并补齐缺失的计数
+from operator import itemgetter  # 用于按列取值
+import numpy as np  # 用于 bincount 和向量化的分箱、拟合
+
+DEGREE_KINDS = ('out', 'in', 'total')
+DEFAULT_CHUNK_SIZE = 100000
+
+
+class DegreeCounter:
+    """
+    度数累加器：字符串三元组按块在 C 层计数，已编码的三元组直接对编号做 bincount；
+    同一个累加器只使用其中一种方式
+    """
+
+    def __init__(self):
+        self._out_counts = Counter()
+        self._in_counts = Counter()
+        self._out = np.zeros(0, dtype=np.int64)
+        self._in = np.zeros(0, dtype=np.int64)
+        self._encoded = None
+        self.triplet_count = 0
+
+    def add_chunk(self, chunk):
+        """
+        累加一块三元组
+        :param chunk: (头实体, 关系, 尾实体) 序列
+        """
+        self._out_counts.update(map(itemgetter(0), chunk))
+        self._in_counts.update(map(itemgetter(2), chunk))
+        self._encoded = None
+        self.triplet_count += len(chunk)
+
+    def add_codes(self, heads, tails, n_entities):
+        """
+        累加已编码的三元组
+        :param heads: 头实体编号数组
+        :param tails: 尾实体编号数组
+        :param n_entities: 实体编号的上界
+        """
+        if n_entities > len(self._out):
+            grow = np.zeros(n_entities - len(self._out), dtype=np.int64)
+            self._out = np.concatenate([self._out, grow])
+            self._in = np.concatenate([self._in, grow])
+        self._out[:n_entities] += np.bincount(heads, minlength=n_entities)
+        self._in[:n_entities] += np.bincount(tails, minlength=n_entities)
+        self.triplet_count += len(heads)
+
+    def _arrays(self):
+        if not self._out_counts and not self._in_counts:
+            return self._out, self._in
+        if self._encoded is None:
+            # 将实体字符串一次性编码为连续编号，得到与已编码三元组相同形式的出度、入度数组
+            ids = dict.fromkeys(chain(self._out_counts, self._in_counts))
+            n = len(ids)
+            self._encoded = (np.fromiter(map(self._out_counts.get, ids, repeat(0)), dtype=np.int64, count=n),
+                             np.fromiter(map(self._in_counts.get, ids, repeat(0)), dtype=np.int64, count=n))
+        return self._encoded
+
+    def degrees(self, kind='total'):
+        """
+        :param kind: out、in 或 total
+        :return: 每个出现过的实体的度数数组
+        """
+        out_degree, in_degree = self._arrays()
+        if kind == 'out':
+            degrees = out_degree
+        elif kind == 'in':
+            degrees = in_degree
+        elif kind == 'total':
+            degrees = out_degree + in_degree
+        else:
+            raise ValueError(f"Unknown degree kind: {kind}")
+        # 只保留出现过的实体；列式存储的编号表中可能有只出现在实体文件中的名称
+        return degrees[(out_degree + in_degree) > 0]
+
+    def histogram(self, kind='total'):
+        """
+        :param kind: out、in 或 total
+        :return: 度数 -> 实体数量，按度数升序，只包含数量大于 0 的度数
+        """
+        counts = np.bincount(self.degrees(kind))
+        present = np.flatnonzero(counts)
+        return dict(zip(present.tolist(), counts[present].tolist()))
+
+
+def count_degrees(graph, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+    """
+    统计知识图谱中每个实体的出度和入度
+    :param graph: KnowledgeGraph 实例
+    :param chunk_size: 每块的三元组数量
+    :param progress_callback: 每块完成后调用 callback(已处理的三元组数量, 三元组总数)
+    :return: DegreeCounter
+    """
+    relationships = graph.relationships
+    total = len(relationships)
+    counter = DegreeCounter()
+    columnar = hasattr(relationships, 'entity_interner')
+    if columnar:
+        heads, tails = relationships.heads, relationships.tails
+        n_entities = len(relationships.entity_interner)
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        if columnar:
+            counter.add_codes(heads[start:stop], tails[start:stop], n_entities)
+        else:
+            counter.add_chunk(relationships[start:stop])
+        if progress_callback is not None:
+            progress_callback(stop, total)
+    return counter
+
+
+def log_binned_histogram(degrees, bins_per_decade=10):
+    """
+    对数分箱直方图，度数为 0 的实体不参与分箱
+    :param degrees: 度数数组
+    :param bins_per_decade: 每个数量级的箱数
+    :return: 列表，每项包含箱的左右边界 [left, right)、实体数量 count 和概率密度 density（count / 箱宽 / 实体总数）
+    """
+    degrees = np.asarray(degrees)
+    degrees = degrees[degrees > 0]
+    if len(degrees) == 0:
+        return []
+    n_bins = max(1, math.ceil(math.log10(degrees.max() + 1) * bins_per_decade))
+    # 边界取整并去重，保证每个箱至少包含一个整数度数
+    edges = np.unique(np.floor(np.logspace(0, math.log10(degrees.max() + 1), n_bins + 1)).astype(np.int64))
+    edges[-1] = degrees.max() + 1
+    counts, _ = np.histogram(degrees, bins=edges)
+    widths = np.diff(edges)
+    return [
+        {'left': int(left), 'right': int(right), 'count': int(count),
+         'density': float(count / width / len(degrees))}
+        for left, right, count, width in zip(edges[:-1], edges[1:], counts, widths)
+        if count > 0
+    ]
+
+
+def _alpha(tail, xmin):
+    # 离散幂律的近似最大似然估计：alpha = 1 + n / sum(ln(x / (xmin - 0.5)))
+    return 1 + len(tail) / np.log(tail / (xmin - 0.5)).sum()
+
+
+def fit_power_law(degrees, max_candidates=100, min_tail=10):
+    """
+    拟合离散幂律分布 p(x) ∝ x^(-alpha)（x >= xmin）
+    对每个候选 xmin 估计 alpha，计算尾部经验分布与拟合分布的 KS 距离，取距离最小的 xmin
+    :param degrees: 度数数组
+    :param max_candidates: 最多尝试的 xmin 个数，不同度数较多时按分位数抽取候选
+    :param min_tail: 尾部（x >= xmin）至少包含的实体数量
+    :return: 字典 {alpha, sigma, xmin, n_tail, ks}，sigma 为 alpha 的标准误差；数据不足时返回 None
+    """
+    degrees = np.sort(np.asarray(degrees)[np.asarray(degrees) > 0])
+    if len(degrees) < min_tail:
+        return None
+    values = np.unique(degrees)
+    # 保证尾部至少有 min_tail 个实体
+    values = values[values <= degrees[-min_tail]]
+    if len(values) > max_candidates:
+        values = np.unique(values[np.linspace(0, len(values) - 1, max_candidates).astype(np.int64)])
+    best = None
+    for xmin in values.tolist():
+        if xmin < 1:
+            continue
+        tail = degrees[np.searchsorted(degrees, xmin):].astype(np.float64)
+        alpha = _alpha(tail, xmin)
+        if not np.isfinite(alpha) or alpha <= 1:
+            continue
+        # 经验 CDF 与连续近似的理论 CDF 在每个不同度数处比较
+        unique, index = np.unique(tail, return_index=True)
+        empirical_before = index / len(tail)
+        empirical_after = np.append(index[1:], len(tail)) / len(tail)
+        theoretical = 1 - ((unique - 0.5) / (xmin - 0.5)) ** (1 - alpha)
+        theoretical_next = 1 - ((unique + 0.5) / (xmin - 0.5)) ** (1 - alpha)
+        ks = float(max(np.abs(empirical_before - theoretical).max(), np.abs(empirical_after - theoretical_next).max()))
+        if best is None or ks < best['ks']:
+            best = {'alpha': float(alpha), 'sigma': float((alpha - 1) / math.sqrt(len(tail))),
+                    'xmin': int(xmin), 'n_tail': int(len(tail)), 'ks': ks}
+    return best
+
+
+def degree_summary(counter, bins_per_decade=10):
+    """
+    :param counter: DegreeCounter
+    :param bins_per_decade: 对数分箱时每个数量级的箱数
+    :return: 度数类型 -> {entities, max_degree, mean_degree, log_binned_histogram, power_law}
+    """
+    summary = {}
+    for kind in DEGREE_KINDS:
+        degrees = counter.degrees(kind)
+        summary[kind] = {
+            'entities': int(len(degrees)),
+            'max_degree': int(degrees.max()) if len(degrees) else 0,
+            'mean_degree': round(float(degrees.mean()), 4) if len(degrees) else 0,
+            'log_binned_histogram': log_binned_histogram(degrees, bins_per_decade),
+            'power_law': fit_power_law(degrees),
+        }
+    return summary
@@ -0,0 +1,568 @@
+"""
+重复三元组检测模块
+
+该模块统计三元组数据中的完全重复和近似重复，内存占用与三元组数量无关，可用于数千万行的 CSV 文件。具体功能包括：
+- 每个三元组计算 64 位哈希（已安装 pandas 时按列向量化计算，否则使用 blake2b），哈希相同即视为完全重复
+- 列式存储直接由头实体、关系、尾实体编号得到键：编号位数之和不超过 64 位时经过可逆的混合函数，不会冲突
+- 近似重复：三个字段按与一致性计算相同的 preprocess_name 规则（移除特殊字符、转小写）处理后相同，但原文不同
+- 哈希和行号按哈希分桶追加写入临时文件，统计时每次只把一个桶读入内存排序（按哈希分区的排序段），内存占用约为总量除以桶数
+- 报告三元组总数、重复数量、重复率、重复次数最多的三元组，以及变体最多的近似重复组
+- 加载知识图谱时可据此去除完全重复的三元组（KnowledgeGraph.deduplicate），只保留第一次出现的三元组；
+  删除前逐行比较三元组本身，哈希冲突的不同三元组不会被删除
+- 向已去重的知识图谱追加三元组时跳过已有的三元组，并更新重复报告
+- 结果保存到 Data/duplicates/duplicate_report.json
+
+主要类和方法：
+- triple_hashes(triples, engine): 计算一组三元组的 64 位哈希
+- normalize_triple(triple): 按 preprocess_name 规则处理三元组的三个字段
+- DuplicateScanner 类：分桶统计重复的扫描器
+  - add(triples): 添加一批三元组
+  - add_keys(keys, normalized_keys): 添加一批已计算的键
+  - finish(fetch, top_n): 逐桶统计，返回重复报告；duplicate_rows 为重复出现（不是第一次出现）的行号，
+    duplicate_of 为对应的第一次出现的行号
+- scan_file(file_path, ...): 流式扫描 CSV 文件，返回重复报告
+- find_duplicates(triples, ...): 扫描列表或列式存储的三元组，返回 (重复报告, 重复出现的行号数组)
+- TripleIndex 类：已有三元组的键索引，随追加增量更新
+  - find(triples, candidates): 候选三元组中已经出现过的三元组
+  - add(triples, start): 把 triples[start:] 加入索引
+- update_report(report, triplets, added): 追加三元组后更新重复报告
+- main(file_path): 扫描三元组文件并保存报告
+
+使用示例：
+```python
+report = scan_file('Data/triples_file.csv', top_n=20)
+print(report['duplicates'], report['duplicate_rate'], report['top_duplicates'][0])
+"""
+
+import hashlib  # 用于未安装 pandas 时计算三元组哈希
+import heapq  # 用于合并各桶中重复次数最多的三元组
+import json  # 用于保存报告
+import os  # 用于文件和目录操作
+import shutil  # 用于删除临时分桶目录
+import tempfile  # 用于创建临时分桶目录
+from collections import Counter  # 用于统计追加的三元组中的重复次数
+from functools import lru_cache  # 用于缓存字段的规范化结果
+import numpy as np  # 用于哈希、分桶和排序
+from csv_stream import DEFAULT_CHUNK_SIZE, iter_triplet_chunks  # 用于分块流式读取三元组文件
+from jobs import check_cancelled  # 用于在任务被取消时停止扫描
+from progress_registry import tracker  # 用于记录扫描进度
+from utils import preprocess_name  # 与一致性计算相同的实体名预处理规则
+
+# 重复检测报告的输出目录
+OUTPUT_DIR = './Data/duplicates'
+DEFAULT_BUCKETS = 64
+DEFAULT_TOP_N = 20
+# 每个近似重复组最多列出的变体数量
+MAX_VARIANTS = 5
+
+_EXACT_DTYPE = np.dtype([('key', '<u8'), ('row', '<i8')])
+_NEAR_DTYPE = np.dtype([('norm', '<u8'), ('key', '<u8'), ('row', '<i8')])
+
+# 实体名和关系名大量重复出现，缓存最近的规范化结果，缓存大小有上限
+_normalize_field = lru_cache(maxsize=1 << 18)(preprocess_name)
+
+
+def normalize_triple(triple):
+    """
+    :param triple: (头实体, 关系, 尾实体)
+    :return: 三个字段分别经过 preprocess_name 处理后的元组
+    """
+    return tuple(map(_normalize_field, triple))
+
+
+def _pandas_hashes(triples):
+    import pandas as pd
+    return pd.util.hash_pandas_object(pd.DataFrame(triples), index=False).to_numpy(dtype=np.uint64)
+
+
+def _blake2b_hashes(triples):
+    def digest(triple):
+        return int.from_bytes(hashlib.blake2b('\x1f'.join(triple).encode('utf-8'), digest_size=8).digest(), 'little')
+    return np.fromiter(map(digest, triples), dtype=np.uint64, count=len(triples))
+
+
+def triple_hashes(triples, engine='auto'):
+    """
+    计算三元组的 64 位哈希，同一次扫描中相同的三元组得到相同的哈希
+    :param triples: 三元组列表
+    :param engine: 'pandas'、'stdlib' 或 'auto'（已安装 pandas 时使用 pandas）
+    :return: uint64 数组
+    """
+    if not triples:
+        return np.empty(0, dtype=np.uint64)
+    if engine == 'auto':
+        try:
+            import pandas  # noqa: F401
+            engine = 'pandas'
+        except ImportError:
+            engine = 'stdlib'
+    if engine == 'pandas':
+        return _pandas_hashes(triples)
+    if engine == 'stdlib':
+        return _blake2b_hashes(triples)
+    raise ValueError(f"Unknown hash engine: {engine}")
+
+
+def _mix(keys):
+    # splitmix64 的混合函数：64 位上的双射，使编号拼接得到的键在各桶中均匀分布
+    keys = keys ^ (keys >> np.uint64(30))
+    keys = keys * np.uint64(0xbf58476d1ce4e5b9)
+    keys = keys ^ (keys >> np.uint64(27))
+    keys = keys * np.uint64(0x94d049bb133111eb)
+    return keys ^ (keys >> np.uint64(31))
+
+
+def code_keys(heads, relations, tails, n_entities, n_relations):
+    """
+    由编号列计算三元组的键；编号位数之和不超过 64 位时按位拼接，键与三元组一一对应
+    :param heads: 头实体编号数组
+    :param relations: 关系编号数组
+    :param tails: 尾实体编号数组
+    :param n_entities: 实体编号的个数
+    :param n_relations: 关系编号的个数
+    :return: uint64 数组
+    """
+    entity_bits = max(1, (n_entities - 1).bit_length())
+    relation_bits = max(1, (n_relations - 1).bit_length())
+    heads, relations, tails = (np.asarray(column).astype(np.uint64) for column in (heads, relations, tails))
+    with np.errstate(over='ignore'):
+        if 2 * entity_bits + relation_bits <= 64:
+            return _mix((heads << np.uint64(entity_bits + relation_bits)) | (relations << np.uint64(entity_bits))
+                        | tails)
+        return _mix(_mix(_mix(heads) + relations) + tails)
+
+
+class DuplicateScanner:
+    def __init__(self, near=True, n_buckets=DEFAULT_BUCKETS, engine='auto', directory=None, keep_rows=False):
+        """
+        :param near: 是否同时检测近似重复
+        :param n_buckets: 分桶数量，统计时每次只把一个桶读入内存
+        :param engine: 哈希引擎，见 triple_hashes
+        :param directory: 临时分桶目录的父目录，None 时使用系统临时目录
+        :param keep_rows: 是否记录重复出现的行号（duplicate_rows），用于去除重复的三元组
+        """
+        self.near = near
+        self.n_buckets = n_buckets
+        self.engine = engine
+        self.keep_rows = keep_rows
+        self.rows = 0
+        self.duplicate_rows = None
+        self.duplicate_of = None
+        self._directory = tempfile.mkdtemp(prefix='duplicates-', dir=directory)
+
+    def _path(self, kind, bucket):
+        return os.path.join(self._directory, f'{kind}-{bucket}.bin')
+
+    def _spill(self, kind, records, field):
+        buckets = (records[field] % np.uint64(self.n_buckets)).astype(np.intp)
+        order = np.argsort(buckets, kind='stable')
+        records = records[order]
+        bounds = np.searchsorted(buckets[order], np.arange(self.n_buckets + 1))
+        for bucket in np.flatnonzero(np.diff(bounds)).tolist():
+            with open(self._path(kind, bucket), 'ab') as f:
+                records[bounds[bucket]:bounds[bucket + 1]].tofile(f)
+
+    def add(self, triples):
+        """
+        添加一批三元组，行号按添加顺序从 0 开始连续编号
+        :param triples: 三元组列表
+        """
+        normalized_keys = None
+        if self.near:
+            normalized_keys = triple_hashes([normalize_triple(triple) for triple in triples], self.engine)
+        self.add_keys(triple_hashes(triples, self.engine), normalized_keys)
+
+    def add_keys(self, keys, normalized_keys=None):
+        """
+        添加一批已计算的键
+        :param keys: 三元组的 uint64 键数组
+        :param normalized_keys: 规范化后三元组的 uint64 键数组，检测近似重复时必须提供
+        """
+        n = len(keys)
+        rows = np.arange(self.rows, self.rows + n, dtype=np.int64)
+        self.rows += n
+        if n == 0:
+            return
+        exact = np.empty(n, dtype=_EXACT_DTYPE)
+        exact['key'], exact['row'] = keys, rows
+        self._spill('exact', exact, 'key')
+        if self.near:
+            if normalized_keys is None:
+                raise ValueError("normalized_keys are required for near-duplicate detection")
+            near = np.empty(n, dtype=_NEAR_DTYPE)
+            near['norm'], near['key'], near['row'] = normalized_keys, keys, rows
+            self._spill('near', near, 'norm')
+
+    def _load(self, kind, bucket, dtype):
+        path = self._path(kind, bucket)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=dtype)
+        return np.fromfile(path, dtype=dtype)
+
+    def _exact_bucket(self, bucket, top_n, candidates, duplicate_rows, duplicate_of):
+        records = self._load('exact', bucket, _EXACT_DTYPE)
+        if not len(records):
+            return 0
+        order = np.lexsort((records['row'], records['key']))
+        keys, rows = records['key'][order], records['row'][order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        counts = np.diff(np.r_[starts, len(keys)])
+        if self.keep_rows:
+            repeated_rows = np.ones(len(rows), dtype=bool)
+            repeated_rows[starts] = False
+            duplicate_rows.append(rows[repeated_rows])
+            duplicate_of.append(np.repeat(rows[starts], counts)[repeated_rows])
+        repeated = np.flatnonzero(counts > 1)
+        counts, first_rows = counts[repeated], rows[starts[repeated]]
+        top = np.lexsort((first_rows, -counts))[:top_n]
+        candidates.extend(zip(counts[top].tolist(), first_rows[top].tolist()))
+        return len(keys) - len(starts)
+
+    def _near_bucket(self, bucket, top_n, candidates):
+        records = self._load('near', bucket, _NEAR_DTYPE)
+        if not len(records):
+            return 0
+        order = np.lexsort((records['row'], records['key'], records['norm']))
+        norms, keys, rows = records['norm'][order], records['key'][order], records['row'][order]
+        # 每个不同的三元组（变体）只保留第一次出现的行号，再按规范化后的键分组
+        first = np.r_[True, (norms[1:] != norms[:-1]) | (keys[1:] != keys[:-1])]
+        norms, rows = norms[first], rows[first]
+        starts = np.flatnonzero(np.r_[True, norms[1:] != norms[:-1]])
+        variants = np.diff(np.r_[starts, len(norms)])
+        grouped = np.flatnonzero(variants > 1)
+        first_rows = np.minimum.reduceat(rows, starts)[grouped] if len(grouped) else rows[:0]
+        for i in np.lexsort((first_rows, -variants[grouped]))[:top_n].tolist():
+            start, count = starts[grouped[i]], variants[grouped[i]]
+            group_rows = np.sort(rows[start:start + count])
+            candidates.append((int(count), int(group_rows[0]), group_rows[:MAX_VARIANTS].tolist()))
+        return len(norms) - len(starts)
+
+    def finish(self, fetch, top_n=DEFAULT_TOP_N):
+        """
+        逐桶统计重复并删除临时文件
+        :param fetch: 函数 fetch(行号列表) -> {行号: 三元组}，用于取出报告中列出的三元组
+        :param top_n: 报告中列出的重复三元组和近似重复组的数量
+        :return: 重复报告字典
+        """
+        try:
+            candidates, near_candidates, duplicate_rows, duplicate_of = [], [], [], []
+            duplicates = near_duplicates = 0
+            for bucket in range(self.n_buckets):
+                duplicates += self._exact_bucket(bucket, top_n, candidates, duplicate_rows, duplicate_of)
+                if self.near:
+                    near_duplicates += self._near_bucket(bucket, top_n, near_candidates)
+        finally:
+            self.close()
+        if self.keep_rows:
+            self.duplicate_rows = self.duplicate_of = np.empty(0, dtype=np.int64)
+            if duplicate_rows:
+                duplicate_rows, duplicate_of = np.concatenate(duplicate_rows), np.concatenate(duplicate_of)
+                order = np.argsort(duplicate_rows)
+                self.duplicate_rows, self.duplicate_of = duplicate_rows[order], duplicate_of[order]
+
+        # 重复次数相同时先出现的排在前面
+        top = heapq.nsmallest(top_n, candidates, key=lambda item: (-item[0], item[1]))
+        top_near = heapq.nsmallest(top_n, near_candidates, key=lambda item: (-item[0], item[1]))
+        wanted = [row for _, row in top] + [row for _, _, rows in top_near for row in rows]
+        triples = fetch(sorted(set(wanted))) if wanted else {}
+
+        unique = self.rows - duplicates
+        report = {
+            'total': self.rows,
+            'unique': unique,
+            'duplicates': duplicates,
+            'duplicate_rate': duplicates / self.rows if self.rows else 0.0,
+            'top_duplicates': [{'triple': list(triples[row]), 'count': count, 'first_row': row}
+                               for count, row in top],
+        }
+        if self.near:
+            report.update({
+                # 近似重复按不同的三元组计数：规范化后与先出现的另一个三元组相同
+                'near_duplicates': near_duplicates,
+                'near_duplicate_rate': near_duplicates / unique if unique else 0.0,
+                'top_near_duplicates': [{'normalized': list(normalize_triple(triples[rows[0]])), 'variants': count,
+                                         'examples': [list(triples[row]) for row in rows]}
+                                        for count, _, rows in top_near],
+            })
+        return report
+
+    def close(self):
+        """
+        删除临时分桶文件
+        """
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _fetch_file_rows(file_path, rows, chunk_size):
+    # 再读一遍文件，只取出报告中列出的行
+    found = {}
+    start = 0
+    pending = iter(rows)
+    row = next(pending, None)
+    for chunk in iter_triplet_chunks(file_path, chunk_size):
+        stop = start + len(chunk)
+        while row is not None and row < stop:
+            found[row] = chunk[row - start]
+            row = next(pending, None)
+        if row is None:
+            break
+        start = stop
+    return found
+
+
+def scan_file(file_path, chunk_size=DEFAULT_CHUNK_SIZE, near=True, top_n=DEFAULT_TOP_N, engine='auto',
+              progress_callback=None, n_buckets=DEFAULT_BUCKETS):
+    """
+    流式扫描三元组 CSV 文件中的重复，内存中最多同时保留一个分块和一个桶
+    :param file_path: 三元组 CSV 文件路径
+    :param chunk_size: 每块的行数
+    :param near: 是否同时检测近似重复
+    :param top_n: 报告中列出的数量
+    :param engine: 哈希引擎，见 triple_hashes
+    :param progress_callback: 进度回调函数 callback(已读取字节数, 文件总字节数)
+    :param n_buckets: 分桶数量
+    :return: 重复报告字典
+    """
+    with DuplicateScanner(near, n_buckets, engine) as scanner:
+        for chunk in iter_triplet_chunks(file_path, chunk_size, progress_callback=progress_callback):
+            scanner.add(chunk)
+        return scanner.finish(lambda rows: _fetch_file_rows(file_path, rows, chunk_size), top_n)
+
+
+def _normalized_codes(interner):
+    # 对驻留表中每个不同的字符串只做一次规范化，返回 (规范化后的编号数组, 规范化后不同字符串的个数)
+    normalized = {}
+    codes = np.fromiter((normalized.setdefault(preprocess_name(s), len(normalized)) for s in interner.strings),
+                        dtype=np.int64, count=len(interner))
+    return codes, len(normalized)
+
+
+def find_duplicates(triples, near=False, top_n=DEFAULT_TOP_N, chunk_size=DEFAULT_CHUNK_SIZE, engine='auto',
+                    n_buckets=DEFAULT_BUCKETS):
+    """
+    扫描内存中的三元组，行号即三元组的下标
+    :param triples: 三元组列表或列式存储（ColumnarTripleStore），列式存储直接使用编号列
+    :param near: 是否同时检测近似重复
+    :param top_n: 报告中列出的数量
+    :param chunk_size: 每批处理的三元组数量
+    :param engine: 列表存储使用的哈希引擎，见 triple_hashes
+    :param n_buckets: 分桶数量
+    :return: (重复报告字典, 重复出现的行号数组（升序）)
+    """
+    with DuplicateScanner(near, n_buckets, engine, keep_rows=True) as scanner:
+        entity_interner = getattr(triples, 'entity_interner', None)
+        if entity_interner is not None:
+            relation_interner = triples.relation_interner
+            heads, relations, tails = triples.heads, triples.relations, triples.tails
+            n_entities, n_relations = len(entity_interner), len(relation_interner)
+            if near:
+                entity_codes, n_normalized_entities = _normalized_codes(entity_interner)
+                relation_codes, n_normalized_relations = _normalized_codes(relation_interner)
+            for start in range(0, len(triples), chunk_size):
+                h, r, t = (column[start:start + chunk_size] for column in (heads, relations, tails))
+                normalized_keys = None
+                if near:
+                    normalized_keys = code_keys(entity_codes[h], relation_codes[r], entity_codes[t],
+                                                n_normalized_entities, n_normalized_relations)
+                scanner.add_keys(code_keys(h, r, t, n_entities, n_relations), normalized_keys)
+        else:
+            for start in range(0, len(triples), chunk_size):
+                scanner.add(triples[start:start + chunk_size])
+        report = scanner.finish(lambda rows: {row: tuple(triples[row]) for row in rows}, top_n)
+        duplicate_rows = _verify_duplicates(triples, scanner.duplicate_rows, scanner.duplicate_of, report,
+                                            chunk_size)
+        return report, duplicate_rows
+
+
+def _rows_equal(triples, rows, firsts):
+    # 逐行比较重复行与第一次出现的行上的三元组是否真的相同
+    if getattr(triples, 'entity_interner', None) is not None:
+        return ((triples.heads[rows] == triples.heads[firsts]) & (triples.relations[rows] == triples.relations[firsts])
+                & (triples.tails[rows] == triples.tails[firsts]))
+    return np.fromiter((tuple(triples[row]) == tuple(triples[first])
+                        for row, first in zip(rows.tolist(), firsts.tolist())), dtype=bool, count=len(rows))
+
+
+def _verify_duplicates(triples, rows, firsts, report, chunk_size):
+    # 去除前确认重复行与第一次出现的行是同一个三元组；不同的三元组得到相同的键（哈希冲突）时，
+    # 冲突的行改为按三元组本身去重，并修正报告中的重复数量
+    equal = np.concatenate([_rows_equal(triples, rows[start:start + chunk_size], firsts[start:start + chunk_size])
+                            for start in range(0, len(rows), chunk_size)]) if len(rows) else np.ones(0, dtype=bool)
+    if equal.all():
+        return rows
+    seen, repeated = set(), []
+    for row in rows[~equal].tolist():
+        triple = tuple(triples[row])
+        if triple in seen:
+            repeated.append(row)
+        else:
+            seen.add(triple)
+    report['duplicates'] -= len(seen)
+    report['unique'] += len(seen)
+    report['duplicate_rate'] = report['duplicates'] / report['total'] if report['total'] else 0.0
+    return np.sort(np.r_[rows[equal], np.asarray(repeated, dtype=np.int64)])
+
+
+class TripleIndex:
+    """
+    已有三元组的键索引：排序的键数组和对应的行号，追加的三元组先记在字典中，数量超过已排序部分的 1/8 时合并；
+    查询和追加的耗时只与本次的三元组数量有关，不再扫描整个图谱
+    """
+
+    def __init__(self, triples, chunk_size=DEFAULT_CHUNK_SIZE, engine='auto'):
+        """
+        :param triples: 三元组列表或列式存储（ColumnarTripleStore）
+        :param chunk_size: 建立索引时每批计算键的三元组数量
+        :param engine: 列表存储使用的哈希引擎，见 triple_hashes；同一个索引中的键必须使用同一个引擎
+        """
+        self.chunk_size = chunk_size
+        self.engine = engine
+        self.columnar = getattr(triples, 'entity_interner', None) is not None
+        keys = [self._keys_of(triples, start, start + chunk_size) for start in range(0, len(triples), chunk_size)]
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.uint64)
+        self._rows = np.argsort(keys, kind='stable')
+        self._keys = keys[self._rows]
+        self._pending = {}
+
+    def _keys_of(self, triples, start, stop):
+        if self.columnar:
+            return self._code_keys(triples.heads[start:stop], triples.relations[start:stop],
+                                   triples.tails[start:stop])
+        return triple_hashes(triples[start:stop], self.engine)
+
+    @staticmethod
+    def _code_keys(heads, relations, tails):
+        # 与编号个数无关的键：驻留表增长后已有三元组的键不变
+        heads, relations, tails = (np.asarray(column).astype(np.uint64) for column in (heads, relations, tails))
+        with np.errstate(over='ignore'):
+            return _mix(_mix(_mix(heads) + relations) + tails)
+
+    def add(self, triples, start):
+        """
+        把 triples[start:] 加入索引
+        :param triples: 已追加新三元组的列表或列式存储
+        :param start: 新三元组的起始行号
+        """
+        for offset in range(start, len(triples), self.chunk_size):
+            keys = self._keys_of(triples, offset, min(offset + self.chunk_size, len(triples)))
+            for row, key in enumerate(keys.tolist(), offset):
+                self._pending.setdefault(key, []).append(row)
+        if len(self._pending) > max(len(self._keys) // 8, self.chunk_size):
+            self._merge()
+
+    def _merge(self):
+        rows = [row for rows in self._pending.values() for row in rows]
+        keys = np.fromiter((key for key, rows in self._pending.items() for _ in rows), dtype=np.uint64,
+                           count=len(rows))
+        keys = np.concatenate([self._keys, keys])
+        rows = np.concatenate([self._rows, np.asarray(rows, dtype=np.int64)])
+        order = np.argsort(keys, kind='stable')
+        self._keys, self._rows = keys[order], rows[order]
+        self._pending = {}
+
+    def find(self, triples, candidates):
+        """
+        查找候选三元组中已经出现过的三元组；键相同的行逐一比较三元组本身，哈希冲突不会误判
+        :param triples: 建立索引的列表或列式存储
+        :param candidates: 候选三元组列表
+        :return: 已出现过的候选三元组集合
+        """
+        candidates = list(dict.fromkeys(map(tuple, candidates)))
+        if self.columnar:
+            # 驻留表中没有的字符串不可能出现过，其余候选按编号比较
+            entity_lookup, relation_lookup = triples.entity_interner.lookup, triples.relation_interner.lookup
+            codes = [(entity_lookup(s), relation_lookup(p), entity_lookup(o)) for s, p, o in candidates]
+            kept = [i for i, code in enumerate(codes) if None not in code]
+            candidates = [candidates[i] for i in kept]
+            codes = [codes[i] for i in kept]
+            if not codes:
+                return set()
+            keys = self._code_keys(*(np.array(column) for column in zip(*codes)))
+        else:
+            if not candidates:
+                return set()
+            keys = triple_hashes(candidates, self.engine)
+        lows = np.searchsorted(self._keys, keys, side='left')
+        highs = np.searchsorted(self._keys, keys, side='right')
+        found = set()
+        for i, (key, low, high) in enumerate(zip(keys.tolist(), lows.tolist(), highs.tolist())):
+            rows = self._rows[low:high].tolist() + self._pending.get(key, [])
+            if self.columnar:
+                h, r, t = codes[i]
+                matched = any(triples.heads[row] == h and triples.relations[row] == r and triples.tails[row] == t
+                              for row in rows)
+            else:
+                matched = any(tuple(triples[row]) == candidates[i] for row in rows)
+            if matched:
+                found.add(candidates[i])
+        return found
+
+
+def update_report(report, triplets, added, top_n=DEFAULT_TOP_N):
+    """
+    向已去重的知识图谱追加三元组后更新重复报告：总数、重复数量和重复率与重新加载后一致；
+    top_duplicates 中已列出的三元组累加追加的次数，本批中第一次出现且重复的三元组按次数加入，
+    其余已有三元组在原数据中的重复次数未知，只计入重复数量
+    :param report: DuplicateScanner.finish 得到的报告，原地修改
+    :param triplets: 追加的全部三元组
+    :param added: 实际加入知识图谱的三元组（不在原数据中，且每个只保留一次）
+    :param top_n: 报告中列出的数量
+    :return: 更新后的报告
+    """
+    counts = Counter(map(tuple, triplets))
+    first_rows = {}
+    for row, triple in enumerate(map(tuple, triplets), report['total']):
+        first_rows.setdefault(triple, row)
+    listed = {tuple(entry['triple']): entry for entry in report['top_duplicates']}
+    for triple, count in counts.items():
+        if triple in listed:
+            listed[triple]['count'] += count
+    for triple in added:
+        if counts[triple] > 1:
+            listed[triple] = {'triple': list(triple), 'count': counts[triple], 'first_row': first_rows[triple]}
+    report['top_duplicates'] = heapq.nsmallest(top_n, listed.values(),
+                                               key=lambda entry: (-entry['count'], entry['first_row']))
+    report['total'] += len(triplets)
+    report['unique'] += len(added)
+    report['duplicates'] = report['total'] - report['unique']
+    report['duplicate_rate'] = report['duplicates'] / report['total'] if report['total'] else 0.0
+    return report
+
+
+def _update_bytes_progress(bytes_read, total_bytes):
+    # 读完文件后还要逐桶统计，统计结束前进度保持在 100% 以下
+    check_cancelled()
+    progress = tracker('duplicates')
+    progress.set_total(total_bytes)
+    progress.update(min(bytes_read, total_bytes - 1))
+
+
+def main(file_path=None, chunk_size=DEFAULT_CHUNK_SIZE, top_n=DEFAULT_TOP_N):
+    """
+    扫描三元组文件中的完全重复和近似重复，报告保存到 OUTPUT_DIR/duplicate_report.json
+    :param file_path: 三元组 CSV 文件路径，为空时使用 data_preprocess.TRIPLES_FILE
+    :return: 重复报告字典
+    """
+    if file_path is None:
+        from data_preprocess import TRIPLES_FILE
+        file_path = TRIPLES_FILE
+    tracker('duplicates').start(unit='bytes')
+    report = scan_file(file_path, chunk_size, top_n=top_n, progress_callback=_update_bytes_progress)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    json_file_path = os.path.join(OUTPUT_DIR, 'duplicate_report.json')
+    with open(json_file_path, 'w', encoding='utf-8') as json_file:
+        json.dump(report, json_file, ensure_ascii=False, indent=4)
+        print(f"JSON file saved: {json_file_path}")
+    tracker('duplicates').finish()
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+实体名向量的持久化缓存
+
+该模块将 BERT 计算出的实体名向量保存在磁盘上，重复计算同一数据集时可完全跳过模型推理。具体功能包括：
+- 以模型标识划分缓存目录，键为预处理后的实体名
+- 向量保存在内存映射的 float16/float32 矩阵文件中，键索引保存在逐行追加的文本文件中
+- 在磁盘缓存之前提供按字节预算淘汰的内存 LRU 缓存
+- 多个进程共用同一缓存目录时，写入在锁文件下依次进行，写入前先读取其他进程追加的键，查询未命中时同样读取新增的键
+
+主要类和方法：
+- model_identity(model_path): 根据模型目录名、config.json 和权重文件的大小与修改时间计算模型标识
+- EmbeddingStore 类：内存映射的磁盘向量存储
+  - get(key) / put_many(keys, vectors): 读取、写入向量
+- LRUCache 类：按字节预算淘汰的内存缓存
+- EmbeddingCache 类：内存 LRU + 磁盘存储的两级缓存
+  - get(key): 依次查询内存和磁盘
+  - put_many(keys, vectors): 写入两级缓存
+
+使用示例：
+```python
+cache = EmbeddingCache.open('Data/embedding_cache', model_identity(model_path), dim=768)
+vector = cache.get('赵丹')
+if vector is None:
+    cache.put_many(['赵丹'], encode_names(['赵丹']))
+"""
+
+import hashlib  # 用于计算模型标识
+import json  # 用于读写元数据和键索引
+import os  # 用于文件和目录操作
+import threading  # 用于保证多线程读写安全
+from collections import OrderedDict  # 用于实现 LRU
+import numpy as np  # 用于向量矩阵和内存映射
+from utils import file_lock  # 用于多个进程依次写入同一缓存目录
+
+_INITIAL_ROWS = 4096
+# 模型权重文件的扩展名
+_WEIGHT_SUFFIXES = ('.bin', '.safetensors', '.pt', '.pth', '.h5', '.ckpt', '.msgpack')
+
+
+def model_identity(model_path):
+    """
+    根据模型目录名、模型的 config.json 以及权重文件的大小和修改时间计算模型标识，不需要读取模型权重；
+    配置相同的不同微调模型权重不同，不会共用缓存
+    :param model_path: 模型目录或模型名称
+    :return: 16 位十六进制字符串
+    """
+    digest = hashlib.sha1(os.path.basename(os.path.normpath(model_path)).encode('utf-8'))
+    config_file = os.path.join(model_path, 'config.json')
+    if os.path.exists(config_file):
+        with open(config_file, 'rb') as f:
+            digest.update(f.read())
+    if os.path.isdir(model_path):
+        for name in sorted(os.listdir(model_path)):
+            if name.endswith(_WEIGHT_SUFFIXES):
+                stat = os.stat(os.path.join(model_path, name))
+                digest.update(f'{name}:{stat.st_size}:{stat.st_mtime_ns}'.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class EmbeddingStore:
+    def __init__(self, directory, dim, dtype='float16'):
+        """
+        内存映射的磁盘向量存储，目录中包含：
+        - meta.json: 向量维度和数据类型
+        - vectors.bin: 行优先的向量矩阵，容量按倍数增长
+        - keys.jsonl: 每行一个 JSON 字符串键，第 i 行对应矩阵第 i 行
+
+        :param directory: 存储目录
+        :param dim: 向量维度
+        :param dtype: 磁盘上的数据类型，float16 或 float32
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock_file = os.path.join(directory, '.lock')
+        self._vectors_file = os.path.join(directory, 'vectors.bin')
+        self._keys_file = os.path.join(directory, 'keys.jsonl')
+        meta_file = os.path.join(directory, 'meta.json')
+        with file_lock(self._lock_file):
+            if os.path.exists(meta_file):
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta['dim'] != dim:
+                    raise ValueError(f"Embedding store {directory} has dim {meta['dim']}, expected {dim}")
+                dtype = meta['dtype']
+            else:
+                with open(meta_file, 'w', encoding='utf-8') as f:
+                    json.dump({'dim': dim, 'dtype': dtype}, f)
+            self.dim = dim
+            self.dtype = np.dtype(dtype)
+
+            if not os.path.exists(self._vectors_file):
+                open(self._vectors_file, 'wb').close()
+            capacity = os.path.getsize(self._vectors_file) // self._row_bytes
+            self.index = self._load_index(capacity)
+            self._matrix = None
+            self._map(max(capacity, _INITIAL_ROWS))
+
+    @property
+    def _row_bytes(self):
+        return self.dim * self.dtype.itemsize
+
+    def _load_index(self, capacity):
+        # 写入时先写向量再追加键；异常中断留下的不完整键行会被丢弃，键文件随之重写
+        keys = []
+        complete = True
+        if os.path.exists(self._keys_file):
+            with open(self._keys_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        key = json.loads(line)
+                    except ValueError:
+                        complete = False
+                        break
+                    if len(keys) >= capacity or not line.endswith('\n'):
+                        complete = False
+                        break
+                    keys.append(key)
+        if not complete:
+            with open(self._keys_file, 'w', encoding='utf-8') as f:
+                for key in keys:
+                    f.write(json.dumps(key, ensure_ascii=False) + '\n')
+        # 已读取的键文件字节数，之后只读取其他进程在这之后追加的键
+        self._keys_offset = os.path.getsize(self._keys_file) if os.path.exists(self._keys_file) else 0
+        return {key: row for row, key in enumerate(keys)}
+
+    def _refresh(self):
+        """
+        读取其他进程追加的键，只读取完整的行；矩阵文件已被其他进程扩容时重新映射
+        """
+        try:
+            if os.path.getsize(self._keys_file) == self._keys_offset:
+                return
+        except FileNotFoundError:
+            return
+        with open(self._keys_file, 'rb') as f:
+            f.seek(self._keys_offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                self.index[json.loads(line)] = len(self.index)
+                self._keys_offset += len(line)
+        if len(self.index) > len(self._matrix):
+            self._map(os.path.getsize(self._vectors_file) // self._row_bytes)
+
+    def _map(self, capacity):
+        row_bytes = self._row_bytes
+        # 先写回并释放旧的映射：Windows 上文件仍被映射时不能改变文件大小
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        if os.path.getsize(self._vectors_file) < capacity * row_bytes:
+            with open(self._vectors_file, 'r+b') as f:
+                f.truncate(capacity * row_bytes)
+        self._matrix = np.memmap(self._vectors_file, dtype=self.dtype, mode='r+', shape=(capacity, self.dim))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        if key not in self.index:
+            self._refresh()
+        return key in self.index
+
+    def get(self, key):
+        """
+        :param key: 键
+        :return: float32 向量，不存在时返回 None
+        """
+        row = self.index.get(key)
+        if row is None:
+            self._refresh()
+            row = self.index.get(key)
+            if row is None:
+                return None
+        # 返回副本，调用方持有的向量不会让旧的映射在扩容后仍然打开
+        return np.array(self._matrix[row], dtype=np.float32)
+
+    def put_many(self, keys, vectors):
+        """
+        追加写入向量，已存在的键（包括其他进程已写入的键）会被跳过
+        :param keys: 键列表
+        :param vectors: 形状为 (len(keys), dim) 的矩阵
+        """
+        with file_lock(self._lock_file):
+            # 其他进程可能已追加了行，先读取它们的键，新向量写在所有已有的行之后
+            self._refresh()
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self.index:
+                    new.setdefault(key, vector)
+            if not new:
+                return
+            start = len(self.index)
+            if start + len(new) > len(self._matrix):
+                self._map(max(start + len(new), 2 * len(self._matrix)))
+            self._matrix[start:start + len(new)] = np.asarray(list(new.values()), dtype=self.dtype)
+            self._matrix.flush()
+            lines = ''.join(json.dumps(key, ensure_ascii=False) + '\n' for key in new).encode('utf-8')
+            with open(self._keys_file, 'ab') as f:
+                f.write(lines)
+            for offset, key in enumerate(new):
+                self.index[key] = start + offset
+            self._keys_offset += len(lines)
+
+
+class LRUCache:
+    def __init__(self, max_bytes):
+        """
+        按字节预算淘汰最久未使用条目的内存缓存
+        :param max_bytes: 缓存向量的总字节数上限
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        vector = self._data.get(key)
+        if vector is not None:
+            self._data.move_to_end(key)
+        return vector
+
+    def put(self, key, vector):
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        if vector.nbytes > self.max_bytes:
+            return
+        self._data[key] = vector
+        self.nbytes += vector.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def __len__(self):
+        return len(self._data)
+
+
+class EmbeddingCache:
+    def __init__(self, store, max_bytes=256 * 1024 * 1024):
+        """
+        内存 LRU + 磁盘存储的两级向量缓存
+        :param store: EmbeddingStore 实例
+        :param max_bytes: 内存 LRU 的字节预算
+        """
+        self.store = store
+        self.memory = LRUCache(max_bytes)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, root, identity, dim, dtype='float16', max_bytes=256 * 1024 * 1024):
+        """
+        打开（或创建）某个模型对应的缓存
+        :param root: 缓存根目录
+        :param identity: 模型标识，见 model_identity()
+        :param dim: 向量维度
+        :param dtype: 磁盘上的数据类型
+        :param max_bytes: 内存 LRU 的字节预算
+        :return: EmbeddingCache 实例
+        """
+        return cls(EmbeddingStore(os.path.join(root, identity), dim, dtype), max_bytes)
+
+    def get(self, key):
+        """
+        :param key: 键
+        :return: float32 向量，不存在时返回 None
+        """
+        with self._lock:
+            vector = self.memory.get(key)
+            if vector is None:
+                vector = self.store.get(key)
+                if vector is not None:
+                    self.memory.put(key, vector)
+            return vector
+
+    def __contains__(self, key):
+        with self._lock:
+            return self.memory.get(key) is not None or key in self.store
+
+    def put_many(self, keys, vectors):
+        """
+        :param keys: 键列表
+        :param vectors: 形状为 (len(keys), dim) 的矩阵
+        """
+        with self._lock:
+            self.store.put_many(keys, vectors)
+            # 内存中保存与磁盘精度一致的向量，保证命中内存或磁盘时结果相同
+            stored = np.asarray(vectors, dtype=self.store.dtype).astype(np.float32)
+            for key, vector in zip(keys, stored):
+                self.memory.put(key, vector)
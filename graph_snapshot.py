@@ -0,0 +1,234 @@
+"""
+知识图谱快照模块
+
+该模块把已加载的知识图谱保存为可内存映射的二进制快照，进程启动时直接映射快照，不需要重新解析 CSV 文件。具体功能包括：
+- 每张字符串驻留表保存为两个 .npy 文件：所有字符串的 utf-8 字节拼接成的 uint8 数组，以及 int64 偏移数组
+- 三元组保存为头实体、关系、尾实体三个 int32 编号数组，实体保存为名称、标签两个编号数组，实体名称与头尾实体共用一张驻留表
+- 名称索引（名称 -> 同名实体标识列表）按原有顺序保存为 (名称编号, 实体行号) 两个数组
+- 加载时以 mmap_mode='c' 映射所有数组：多个 Flask worker 和评测进程共享同一份页缓存，修改图谱时只复制被写入的页，不会改动快照文件
+- 字符串在使用时才解码，字符串到编号的字典在第一次按字符串查询时才建立，加载耗时与三元组数量无关
+- manifest.json 记录格式版本、数量、数组文件名、去重报告和源 CSV 文件的大小与修改时间，源文件变化或去重设置不同时快照视为过期
+- 保存时数组文件名带有本次保存的编号，全部写完后才替换 manifest.json，正在读取旧快照的进程不受影响
+- 多个进程同时保存时用锁文件依次进行，每次保存只删除被替换的旧清单引用的文件
+
+主要函数和变量：
+- save_snapshot(graph, directory, sources): 保存快照
+- load_snapshot(directory, storage): 加载快照，返回 KnowledgeGraph
+- file_fingerprints(paths): 源文件的大小和修改时间
+- snapshot_is_current(directory, sources, dedup): 快照是否存在且与源文件、去重设置一致
+- SNAPSHOT_FORMAT: 快照格式版本
+
+使用示例：
+```python
+sources = file_fingerprints(['Data/entities_file.csv', 'Data/triples_file.csv'])
+if snapshot_is_current('Data/snapshot', sources):
+    knowledge_graph = load_snapshot('Data/snapshot', storage='columnar')
+else:
+    knowledge_graph = KnowledgeGraph(storage='columnar')
+    knowledge_graph.load_triplets('Data/triples_file.csv')
+    save_snapshot(knowledge_graph, 'Data/snapshot', sources)
+"""
+
+import json  # 用于读写快照清单
+import os  # 用于文件和目录操作
+import numpy as np  # 用于保存和内存映射编号数组
+from data_preprocess import KnowledgeGraph  # 导入知识图谱类
+from triple_store import (ColumnarEntityStore, ColumnarTripleStore, MappedStringInterner, MappedStrings,
+                          StringInterner)  # 导入列式存储
+from utils import file_lock, get_uuid  # 用于串行化多个进程的保存，生成每次保存的编号
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_FILE = 'manifest.json'
+LOCK_FILE = '.lock'
+# 驻留表和编号列在数组文件名中使用的名称
+_TABLES = ('ids', 'names', 'labels', 'relation_names')
+_COLUMNS = ('entity_names', 'entity_labels', 'heads', 'relations', 'tails', 'index_names', 'index_rows')
+
+
+def file_fingerprints(paths):
+    """
+    :param paths: 源文件路径列表
+    :return: {路径: [字节数, 修改时间（纳秒）]}，文件不存在时为 None
+    """
+    fingerprints = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            fingerprints[path] = None
+        else:
+            fingerprints[path] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprints
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        return None
+    return manifest
+
+
+def snapshot_is_current(directory, sources, dedup=False):
+    """
+    :param directory: 快照目录
+    :param sources: file_fingerprints 的结果
+    :param dedup: 是否要求快照中的三元组已去重
+    :return: 快照存在、格式版本一致，保存时的源文件与当前一致，并且去重设置相同
+    """
+    manifest = _read_manifest(directory)
+    return (manifest is not None and manifest['sources'] == sources
+            and (manifest.get('duplicates') is not None) == dedup)
+
+
+def _encode_strings(strings):
+    # 字符串表 -> (uint8 字节数组, int64 偏移数组)
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _columnar_stores(graph):
+    # 列表存储的图谱先转换为列式存储，实体名称与头尾实体共用一张驻留表
+    if graph.storage == 'columnar':
+        return graph.entities, graph.relationships
+    names = StringInterner()
+    entities = ColumnarEntityStore(names)
+    for entity_id, entity in graph.entities.items():
+        entities[entity_id] = entity
+    relationships = ColumnarTripleStore(names)
+    relationships.extend(graph.relationships)
+    return entities, relationships
+
+
+def save_snapshot(graph, directory, sources=None):
+    """
+    保存知识图谱快照
+    :param graph: KnowledgeGraph 实例（列表或列式存储）
+    :param directory: 快照目录
+    :param sources: 读取图谱前由 file_fingerprints 得到的源文件信息，用于判断快照是否过期
+    :return: 快照清单
+    """
+    entities, relationships = _columnar_stores(graph)
+    names = relationships.entity_interner
+    id_lookup, name_lookup = entities.id_interner.lookup, names.lookup
+    index_names, index_rows = [], []
+    for name, ids in graph.name_to_ids.items():
+        code = name_lookup(name)
+        for entity_id in ids:
+            index_names.append(code)
+            index_rows.append(id_lookup(entity_id))
+
+    arrays = {}
+    for table, interner in zip(_TABLES, (entities.id_interner, names, entities.label_interner,
+                                         relationships.relation_interner)):
+        arrays[table + '.bytes'], arrays[table + '.offsets'] = _encode_strings(interner.strings)
+    columns = (entities.names, entities.labels, relationships.heads, relationships.relations, relationships.tails,
+               index_names, index_rows)
+    for column, values in zip(_COLUMNS, columns):
+        arrays[column] = np.asarray(values, dtype=np.int32)
+
+    os.makedirs(directory, exist_ok=True)
+    # 其他进程的保存在写完数组、替换清单之前不会被删除文件
+    with file_lock(os.path.join(directory, LOCK_FILE)):
+        previous = _read_manifest(directory) or {}
+        token = get_uuid()
+        files = {}
+        for key, values in arrays.items():
+            files[key] = f'{token}.{key}.npy'
+            np.save(os.path.join(directory, files[key]), values)
+        manifest = {
+            'format': SNAPSHOT_FORMAT,
+            'storage': graph.storage,
+            'entities': len(entities),
+            'triplets': len(relationships),
+            'sources': sources or {},
+            'duplicates': graph.duplicate_report,
+            'files': files,
+            'stale': [],
+        }
+        _write_manifest(directory, manifest, token)
+        # 新清单生效后才删除旧清单引用的文件
+        stale = list(previous.get('files', {}).values()) + previous.get('stale', [])
+        manifest['stale'] = _remove_files(directory, stale)
+        if manifest['stale']:
+            _write_manifest(directory, manifest, token)
+    return manifest
+
+
+def _write_manifest(directory, manifest, token):
+    temp_path = os.path.join(directory, f'{token}.{MANIFEST_FILE}')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(temp_path, os.path.join(directory, MANIFEST_FILE))
+
+
+def _remove_files(directory, names):
+    # 已映射旧文件的进程仍可继续读取；无法删除的文件（例如 Windows 下仍被映射）记入新清单，下次保存时再删除
+    remaining = []
+    for name in names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            remaining.append(name)
+    return remaining
+
+
+def load_snapshot(directory, storage='columnar'):
+    """
+    加载知识图谱快照
+    :param directory: 快照目录
+    :param storage: 'columnar' 直接使用内存映射的数组；'list' 解码为字典和列表（仍然不需要解析 CSV）
+    :return: KnowledgeGraph 实例
+    """
+    manifest = _read_manifest(directory)
+    while True:
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot in {directory}")
+        try:
+            arrays = {key: np.asarray(np.load(os.path.join(directory, file_name), mmap_mode='c'))
+                      for key, file_name in manifest['files'].items()}
+            break
+        except FileNotFoundError:
+            # 读取清单后其他进程保存了新快照并删除了旧文件，清单已更新时改为读取新快照
+            latest = _read_manifest(directory)
+            if latest is None or latest['files'] == manifest['files']:
+                raise
+            manifest = latest
+    tables = {table: MappedStringInterner(MappedStrings(arrays[table + '.bytes'], arrays[table + '.offsets']))
+              for table in _TABLES}
+
+    graph = KnowledgeGraph(storage=storage)
+    graph.duplicate_report = manifest.get('duplicates')
+    if storage == 'columnar':
+        graph.entities = ColumnarEntityStore.from_arrays(tables['ids'], tables['names'], tables['labels'],
+                                                         arrays['entity_names'], arrays['entity_labels'])
+        graph.relationships = ColumnarTripleStore.from_arrays(tables['names'], tables['relation_names'], arrays['heads'],
+                                                              arrays['relations'], arrays['tails'])
+    else:
+        # 先整表解码字符串，再按编号取值
+        names, labels = list(tables['names'].strings), list(tables['labels'].strings)
+        relations = list(tables['relation_names'].strings)
+        graph.entities = {entity_id: {'name': names[name], 'label': labels[label]}
+                          for entity_id, name, label in zip(tables['ids'].strings, arrays['entity_names'].tolist(),
+                                                            arrays['entity_labels'].tolist())}
+        graph.relationships = list(zip(map(names.__getitem__, arrays['heads'].tolist()),
+                                       map(relations.__getitem__, arrays['relations'].tolist()),
+                                       map(names.__getitem__, arrays['tails'].tolist())))
+
+    # 名称索引在加载时重建，耗时与实体数量成正比；名称 -> 标签取同名实体中的第一个
+    names, ids = tables['names'].strings, tables['ids'].strings
+    entity_labels, labels = arrays['entity_labels'], tables['labels'].strings
+    for code, row in zip(arrays['index_names'].tolist(), arrays['index_rows'].tolist()):
+        name = names[code]
+        entity_ids = graph.name_to_ids[name]
+        if not entity_ids:
+            graph.name_to_label[name] = labels[entity_labels[row]]
+        entity_ids.append(ids[row])
+    return graph
@@ -0,0 +1,150 @@
+"""
+知识图谱聚合统计模块
+
+该模块一次性计算知识图谱质量报告所需的全部计数类指标，供 KnowledgeGraph 缓存复用。具体功能包括：
+- 在一次聚合中统计实体出现次数、关系出现次数和实体标签数量
+- 由这些计数派生三元组数量、关系种类数量、度分布、实体关系密度和各类 Top N
+- 结果按 KnowledgeGraph 的版本号缓存；追加三元组或实体时按增量更新，耗时与新增数据量成正比
+
+主要类和方法：
+- GraphStatistics 类：聚合统计结果
+  - compute(graph): 对知识图谱做一次聚合，返回 GraphStatistics 实例
+  - add_triplets(triplets): 按增量累加新增三元组的实体、关系计数和度数直方图
+  - add_entity(old, new): 按增量更新新增或修改的实体的标签计数
+  - degree_distribution(): 实体的度分布（按度数降序）
+  - degree_count(): 每个度数的实体数量
+  - top_entities(top_n) / top_relationships(top_n) / top_entity_labels(top_n): 前 N 个常见实体、关系、标签
+
+使用示例：
+```python
+stats = GraphStatistics.compute(knowledge_graph)
+top_entities = stats.top_entities(100)
+"""
+
+from collections import Counter  # 用于计数
+from itertools import chain  # 用于依次遍历头实体和尾实体
+from operator import itemgetter  # 用于按列取值
+
+
+class GraphStatistics:
+    def __init__(self, entity_counts, relationship_counts, label_counts, entity_count, triplet_count):
+        """
+        :param entity_counts: 实体（头实体和尾实体）出现次数，键顺序为先头实体后尾实体的首次出现顺序
+        :param relationship_counts: 关系出现次数
+        :param label_counts: 每个标签的实体数量
+        :param entity_count: 实体数量
+        :param triplet_count: 三元组数量
+        """
+        self.entity_counts = entity_counts
+        self.relationship_counts = relationship_counts
+        self.label_counts = label_counts
+        self.entity_count = entity_count
+        self.triplet_count = triplet_count
+        self._degree_items = None
+        self._degree_histogram = None
+
+    @classmethod
+    def compute(cls, graph):
+        """
+        对知识图谱做一次聚合，得到全部计数类指标
+
+        列表存储按列各扫描一次（由 Counter 在 C 层完成，比逐个三元组的 Python 循环更快），
+        列式存储直接对整数列做 bincount
+
+        :param graph: KnowledgeGraph 实例
+        :return: GraphStatistics 实例
+        """
+        relationships = graph.relationships
+        if graph.storage == 'columnar':
+            entity_counts = relationships.entity_counter()
+            relationship_counts = relationships.relationship_counter()
+            label_counts = graph.entities.label_counter()
+        else:
+            # 先计头实体再计尾实体，与拼接列表后计数的顺序一致，但不构建两倍大小的临时列表
+            entity_counts = Counter(map(itemgetter(0), relationships))
+            entity_counts.update(map(itemgetter(2), relationships))
+            relationship_counts = Counter(map(itemgetter(1), relationships))
+            label_counts = Counter(entity['label'] for entity in graph.entities.values())
+        return cls(entity_counts, relationship_counts, label_counts, len(graph.entities), len(relationships))
+
+    def add_triplets(self, triplets):
+        """
+        累加新增的三元组；计数相同的实体、关系在 Top N 中的先后次序可能与重新加载时不同
+
+        :param triplets: 新增的 (头实体, 关系, 尾实体) 列表
+        """
+        entity_counts = self.entity_counts
+        histogram = self._degree_histogram
+        if histogram is None:
+            # 度数直方图尚未生成时只更新计数，首次使用时再由计数生成
+            entity_counts.update(map(itemgetter(0), triplets))
+            entity_counts.update(map(itemgetter(2), triplets))
+        else:
+            for entity in chain(map(itemgetter(0), triplets), map(itemgetter(2), triplets)):
+                degree = entity_counts[entity]
+                if degree:
+                    histogram[degree] -= 1
+                    if not histogram[degree]:
+                        del histogram[degree]
+                entity_counts[entity] = degree + 1
+                histogram[degree + 1] += 1
+        self.relationship_counts.update(map(itemgetter(1), triplets))
+        self.triplet_count += len(triplets)
+        self._degree_items = None
+
+    def add_entity(self, old, new):
+        """
+        更新一个实体的标签计数
+
+        :param old: 修改前的实体 {'name', 'label'}，新增实体时为 None
+        :param new: 修改后的实体 {'name', 'label'}
+        """
+        if old is None:
+            self.entity_count += 1
+        else:
+            self.label_counts[old['label']] -= 1
+            if not self.label_counts[old['label']]:
+                del self.label_counts[old['label']]
+        self.label_counts[new['label']] += 1
+
+    @property
+    def relationship_type_count(self):
+        return len(self.relationship_counts)
+
+    @property
+    def label_types_count(self):
+        return len(self.label_counts)
+
+    @property
+    def entity_relationship_density(self):
+        if self.entity_count == 0:
+            return 0
+        return round(self.triplet_count / self.entity_count, 2)
+
+    def _sorted_degrees(self):
+        if self._degree_items is None:
+            self._degree_items = sorted(self.entity_counts.items(), key=itemgetter(1), reverse=True)
+        return self._degree_items
+
+    def degree_distribution(self):
+        """
+        :return: 实体到度数的字典，按度数降序排列
+        """
+        return dict(self._sorted_degrees())
+
+    def degree_count(self):
+        """
+        :return: 度数到实体数量的字典，按度数降序排列
+        """
+        if self._degree_histogram is None:
+            self._degree_histogram = Counter(self.entity_counts.values())
+        return dict(sorted(self._degree_histogram.items(), reverse=True))
+
+    def top_entities(self, top_n):
+        return self.entity_counts.most_common(top_n)
+
+    def top_relationships(self, top_n):
+        return self.relationship_counts.most_common(top_n)
+
+    def top_entity_labels(self, top_n):
+        return self.label_counts.most_common(top_n)
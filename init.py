@@ -4,6 +4,9 @@ import os
 from settings import config, BaseConfig
 from extensions import cors, mongo
 from views import triplet_bp
+import data_preprocess
+import quality_screening
+from jobs import job_manager
 
 def create_app(config_name=None):
     if config_name is None:
@@ -11,6 +14,12 @@ def create_app(config_name=None):
     app = Flask(__name__, template_folder='page', static_folder="", static_url_path="")
     app.config.from_object(config[config_name])
     app.config['MAX_CONTENT_LENGTH'] = 200 * 1024 * 1024
+    # 知识图谱在首次评测时才加载，这里只配置存储引擎
+    data_preprocess.graph_registry.storage = app.config['GRAPH_STORAGE']
+    data_preprocess.graph_registry.snapshot_dir = app.config['GRAPH_SNAPSHOT_DIR']
+    data_preprocess.graph_registry.dedup = app.config['GRAPH_DEDUP']
+    quality_screening.workers = app.config['SCREENING_WORKERS']
+    job_manager.configure(app.config['JOB_WORKERS'])
     register_extensions(app)
     register_blueprints(app)
     return app
@@ -0,0 +1,402 @@
+"""
+后台评测任务调度模块
+
+该模块为 /start-computation-* 接口提供统一的任务调度，取代每次请求启动一个裸线程。具体功能包括：
+- 使用有界线程池执行任务，每个任务有唯一的任务编号（utils.get_uuid()）
+- 同一类任务对同一份数据集只运行一次：重复请求返回正在排队或运行的任务
+- 同一类任务依次执行，不会同时写同一组输出文件：排队的任务保存在该类任务的队列中，不占用线程池的线程，
+  其他类型的任务不会因此等待
+- 提交时只读取输入文件的大小和修改时间，大小和修改时间未变化时直接返回上一次的结果；
+  内容哈希在任务线程中计算，文件内容未变化（例如只修改了时间）时任务直接使用上一次的结果
+- 支持取消任务：排队中的任务直接取消，运行中的任务在下一次检查点（check_cancelled）处停止
+- 任务类型与 progress_registry 中的评测名称一致，任务状态中包含该任务的进度
+
+主要类和方法：
+- Job 类：任务的状态、结果和时间
+- JobCancelled 异常：任务被取消时由 check_cancelled() 抛出
+- JobsActive 异常：有任务在运行时 exclusive() 抛出
+- JobManager 类：任务调度器
+  - submit(kind, func, inputs, params): 提交任务，返回 Job；params 为影响结果的任务参数，参数不同的任务分别缓存结果
+  - get(job_id) / list() / cancel(job_id): 查询、列出、取消任务
+  - store_result(kind, result, inputs): 记录在任务之外（如增量上传时）更新的结果
+  - exclusive(): 在没有任务运行时独占数据集（如增量上传时修改已加载的图谱），期间提交的任务排队等待
+- file_hash(path) / dataset_hash(paths): 计算输入文件的内容哈希（按文件大小和修改时间缓存）
+- dataset_fingerprint(paths): 由输入文件的大小和修改时间计算的标识，不读取文件内容
+- remember_file_hash(path, digest): 记录已知的文件哈希（如上传时计算的 sha256），不需要再读取文件
+- check_cancelled(): 在长时间运行的循环中调用，当前任务被取消时抛出 JobCancelled
+- job_manager: 全局任务调度器，由 init.create_app() 根据 JOB_WORKERS 配置
+- DATASET_FILES: 评测所用的数据集文件
+
+使用示例：
+```python
+job = job_manager.submit('quantity', quantity_evaluation.main)
+print(job_manager.get(job.id).to_dict())
+"""
+
+import hashlib  # 用于计算数据集的内容哈希
+import os  # 用于获取文件大小和修改时间
+import threading  # 用于保护任务表并记录当前线程执行的任务
+import time  # 用于记录任务时间
+from contextlib import contextmanager  # 用于独占数据集的上下文管理器
+from collections import deque  # 用于每类任务的排队队列
+from concurrent.futures import ThreadPoolExecutor  # 用于有界的任务线程池
+from progress_registry import tracker  # 用于关联任务与评测进度
+from utils import get_uuid  # 用于生成任务编号
+
+DATASET_FILES = ('Data/triples_file.csv', 'Data/entities_file.csv')
+
+PENDING = 'pending'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE_STATES = (PENDING, RUNNING)
+
+_HASH_BLOCK = 1 << 20
+_hash_cache = {}
+_hash_lock = threading.Lock()
+_current = threading.local()
+
+
+class JobCancelled(Exception):
+    """
+    任务被取消
+    """
+
+
+class JobsActive(Exception):
+    """
+    有任务正在运行或等待线程，不能独占数据集
+    """
+
+
+def file_hash(path):
+    """
+    计算文件内容的 sha256，文件大小和修改时间不变时直接返回缓存的结果
+    :param path: 文件路径
+    :return: 十六进制哈希；文件不存在时返回 None
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        digest = _hash_cache.get(key)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+                sha256.update(block)
+        digest = sha256.hexdigest()
+        with _hash_lock:
+            _hash_cache[key] = digest
+    return digest
+
+
+def remember_file_hash(path, digest):
+    """
+    记录已知的文件内容哈希，文件大小和修改时间不变时 file_hash 直接返回该结果
+    :param path: 文件路径
+    :param digest: 文件内容的 sha256（十六进制）
+    """
+    stat = os.stat(path)
+    with _hash_lock:
+        _hash_cache[(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)] = digest
+
+
+def dataset_hash(paths=DATASET_FILES, params=None):
+    """
+    计算一组输入文件的联合哈希
+    :param paths: 文件路径列表
+    :param params: 影响结果的任务参数（可 repr 的值），不同参数得到不同的哈希
+    :return: 十六进制哈希
+    """
+    sha256 = hashlib.sha256(repr(params).encode('utf-8'))
+    for path in paths:
+        sha256.update(f'{path}={file_hash(path)};'.encode('utf-8'))
+    return sha256.hexdigest()
+
+
+def dataset_fingerprint(paths=DATASET_FILES, params=None):
+    """
+    由输入文件的大小和修改时间计算标识，不读取文件内容，可以在请求线程中调用
+    :param paths: 文件路径列表
+    :param params: 影响结果的任务参数（可 repr 的值），不同参数得到不同的标识
+    :return: 十六进制哈希
+    """
+    sha256 = hashlib.sha256(repr(params).encode('utf-8'))
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            state = f'{stat.st_size}:{stat.st_mtime_ns}'
+        except FileNotFoundError:
+            state = None
+        sha256.update(f'{os.path.abspath(path)}={state};'.encode('utf-8'))
+    return sha256.hexdigest()
+
+
+def check_cancelled():
+    """
+    当前线程执行的任务被取消时抛出 JobCancelled；不在任务中调用时不做任何事
+    """
+    job = getattr(_current, 'job', None)
+    if job is not None and job.cancel_requested.is_set():
+        raise JobCancelled(job.id)
+
+
+class Job:
+    def __init__(self, kind, fingerprint, func=None, inputs=DATASET_FILES, params=None):
+        """
+        :param kind: 任务类型，如 quantity、screening
+        :param fingerprint: 提交时输入文件的 dataset_fingerprint
+        :param func: 无参数的任务函数
+        :param inputs: 任务读取的输入文件
+        :param params: 影响结果的任务参数
+        """
+        self.id = get_uuid()
+        self.kind = kind
+        self.fingerprint = fingerprint
+        self.func = func
+        self.inputs = inputs
+        self.params = params
+        # 输入文件的联合内容哈希，任务开始运行后才计算
+        self.dataset = None
+        self.state = PENDING
+        self.cached = False
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = threading.Event()
+        self.future = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'dataset': self.dataset,
+            'state': self.state,
+            'cached': self.cached,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': self.progress(),
+        }
+
+    def progress(self):
+        """
+        :return: 该任务的进度字典，评测当前不属于该任务时返回 None
+        """
+        snapshot = tracker(self.kind).snapshot()
+        return snapshot if snapshot['job_id'] == self.id else None
+
+
+class JobManager:
+    def __init__(self, max_workers=2, max_history=100):
+        """
+        :param max_workers: 同时运行的任务数上限
+        :param max_history: 保留的已结束任务数量，超出后丢弃最早的任务
+        """
+        self.max_workers = max_workers
+        self.max_history = max_history
+        self._executor = None
+        self._jobs = {}
+        # 每类任务最近一次成功的 (输入文件标识, 数据集哈希, 结果)，对应当前输出文件中的内容
+        self._results = {}
+        # 每类任务尚未交给线程池的排队任务，以及已有任务交给线程池（运行中或等待线程）的任务类型
+        self._queues = {}
+        self._dispatched = set()
+        # 大于 0 时数据集被独占，排队的任务暂不交给线程池
+        self._paused = 0
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers):
+        """
+        设置线程池大小，只在提交第一个任务之前生效
+        """
+        with self._lock:
+            if self._executor is None:
+                self.max_workers = max_workers
+
+    def submit(self, kind, func, inputs=DATASET_FILES, params=None):
+        """
+        提交任务
+        :param kind: 任务类型，同类任务依次执行
+        :param func: 无参数的任务函数，返回值作为任务结果
+        :param inputs: 任务读取的输入文件，用于去重和结果缓存
+        :param params: 影响结果的任务参数（可 repr 的值），与输入文件一起用于去重和结果缓存
+        :return: Job；同一数据集已有排队或运行中的同类任务时返回该任务，
+                 结果已缓存时返回一个已完成的任务（cached 为 True）
+        """
+        # 请求线程中只读取文件的大小和修改时间，内容哈希在任务线程中计算
+        fingerprint = dataset_fingerprint(inputs, params)
+        with self._lock:
+            for job in self._jobs.values():
+                if (job.kind == kind and job.fingerprint == fingerprint and job.state in ACTIVE_STATES
+                        and not job.cancel_requested.is_set()):
+                    return job
+            job = Job(kind, fingerprint, func, inputs, params)
+            cached = self._results.get(kind)
+            if cached is not None and cached[0] == fingerprint:
+                job.state = FINISHED
+                job.cached = True
+                job.dataset = cached[1]
+                job.result = cached[2]
+                job.started_at = job.finished_at = job.created_at
+            else:
+                self._queues.setdefault(kind, deque()).append(job)
+                self._dispatch()
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def _dispatch(self):
+        # 调用时持有 self._lock：每类任务同一时间只有一个交给线程池，其余留在该类任务的队列中，不占用线程
+        if self._paused:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        for kind, queue in self._queues.items():
+            if kind in self._dispatched:
+                continue
+            while queue:
+                job = queue.popleft()
+                if job.cancel_requested.is_set():
+                    self._finish(job, CANCELLED)
+                    continue
+                self._dispatched.add(kind)
+                job.future = self._executor.submit(self._run, job)
+                break
+
+    def _release(self, kind):
+        # 一个任务结束（或未开始即被取消）后，把同类任务队列中的下一个任务交给线程池
+        with self._lock:
+            self._dispatched.discard(kind)
+            self._dispatch()
+
+    def _run(self, job):
+        try:
+            if job.cancel_requested.is_set():
+                self._finish(job, CANCELLED)
+                return
+            job.state = RUNNING
+            job.started_at = time.time()
+            _current.job = job
+            progress = tracker(job.kind)
+            progress.bind(job.id)
+            try:
+                # 在任务线程中计算内容哈希；内容与上一次的结果相同（文件只是被重新写入）时直接使用该结果
+                job.fingerprint = dataset_fingerprint(job.inputs, job.params)
+                job.dataset = dataset_hash(job.inputs, job.params)
+                with self._lock:
+                    cached = self._results.get(job.kind)
+                    if cached is None or cached[1] != job.dataset:
+                        # 任务开始后输出文件会被覆盖，之前缓存的结果不再对应输出文件
+                        self._results.pop(job.kind, None)
+                        cached = None
+                if cached is not None:
+                    job.cached = True
+                    result = cached[2]
+                    progress.finish()
+                else:
+                    result = job.func()
+            except JobCancelled:
+                progress.stop(CANCELLED)
+                self._finish(job, CANCELLED)
+            except Exception as e:
+                print(f"Job {job.kind} {job.id} failed: {e}")
+                job.error = str(e)
+                progress.stop(FAILED)
+                self._finish(job, FAILED)
+            else:
+                job.result = result
+                with self._lock:
+                    self._results[job.kind] = (job.fingerprint, job.dataset, result)
+                self._finish(job, FINISHED)
+            finally:
+                _current.job = None
+        finally:
+            self._release(job.kind)
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.state not in ACTIVE_STATES]
+        for job in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job.id]
+
+    def store_result(self, kind, result, inputs=DATASET_FILES):
+        """
+        记录在任务之外更新的结果，之后对大小和修改时间相同的输入文件的同类任务直接返回该结果；
+        不计算内容哈希，调用方（如增量上传的请求）不需要重新读取整个输入文件
+        :param kind: 任务类型
+        :param result: 结果
+        :param inputs: 结果对应的输入文件
+        """
+        fingerprint = dataset_fingerprint(inputs)
+        with self._lock:
+            self._results[kind] = (fingerprint, None, result)
+
+    @contextmanager
+    def exclusive(self):
+        """
+        独占数据集：没有任务运行时进入，期间提交的任务排队，退出后再开始运行
+        :raises JobsActive: 有任务正在运行或等待线程
+        """
+        with self._lock:
+            if self._dispatched:
+                raise JobsActive(', '.join(sorted(self._dispatched)))
+            self._paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+                self._dispatch()
+
+    def get(self, job_id):
+        """
+        :param job_id: 任务编号
+        :return: Job，不存在时返回 None
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, kind=None):
+        """
+        :param kind: 只列出某类任务，为空时列出全部任务
+        :return: Job 列表，按提交顺序
+        """
+        with self._lock:
+            return [job for job in self._jobs.values() if kind is None or job.kind == kind]
+
+    def cancel(self, job_id):
+        """
+        取消任务：排队中的任务不再执行，运行中的任务在下一次 check_cancelled() 时停止
+        :param job_id: 任务编号
+        :return: Job，不存在时返回 None
+        """
+        job = self.get(job_id)
+        if job is None or job.state not in ACTIVE_STATES:
+            return job
+        job.cancel_requested.set()
+        with self._lock:
+            if job.future is None:
+                # 还在同类任务的队列中
+                queue = self._queues.get(job.kind)
+                if queue is not None and job in queue:
+                    queue.remove(job)
+                    self._finish(job, CANCELLED)
+                return job
+        if job.future.cancel():
+            self._finish(job, CANCELLED)
+            self._release(job.kind)
+        return job
+
+
+job_manager = JobManager()
@@ -0,0 +1,207 @@
+"""
+评测进度登记模块
+
+该模块在内存中统一记录各项评测的进度，取代各模块中形式不一的 progress 全局变量和进度文件。具体功能包括：
+- 每项评测对应一个进度记录器，记录已完成数量、总数、单位和所属的任务编号
+- 根据开始时间计算耗时、吞吐量（每秒完成数量）和预计剩余时间
+- 所有更新都在锁内完成，可以在任意线程中更新和读取
+- 每次更新递增版本号并唤醒等待者，用于 Server-Sent Events 推送，不需要轮询或读写磁盘
+
+主要类和方法：
+- ProgressTracker 类：单项评测的进度
+  - bind(job_id): 记录所属的任务编号
+  - start(total, unit): 开始计数
+  - update(current) / advance(n) / set_total(total): 更新进度
+  - finish() / stop(state): 结束
+  - snapshot(): 当前进度、吞吐量、耗时和预计剩余时间
+- ProgressRegistry 类：进度记录器的登记表
+  - tracker(name): 获取（或创建）进度记录器
+  - snapshot() / wait(version, timeout): 读取全部进度、等待进度变化
+- registry: 全局登记表；tracker(name): 等同于 registry.tracker(name)
+
+使用示例：
+```python
+progress = tracker('screening')
+progress.start(total=len(triples), unit='triples')
+progress.advance(len(chunk))
+progress.finish()
+print(registry.snapshot()['screening']['rate'])
+"""
+
+import threading  # 用于保证多线程读写安全并通知进度变化
+import time  # 用于计算耗时和吞吐量
+
+IDLE = 'idle'
+RUNNING = 'running'
+FINISHED = 'finished'
+
+
+class ProgressTracker:
+    def __init__(self, name, registry):
+        """
+        :param name: 评测名称，与 jobs 中的任务类型一致
+        :param registry: 所属的 ProgressRegistry
+        """
+        self.name = name
+        self.job_id = None
+        self._registry = registry
+        self._lock = registry.lock
+        self._reset(IDLE, None, '')
+
+    def _reset(self, state, total, unit, initial=0):
+        self.state = state
+        self.current = initial
+        self._initial = initial
+        self.total = total
+        self.unit = unit
+        self.started_at = time.time() if state == RUNNING else None
+        self.finished_at = None
+        self._started = time.monotonic()
+
+    def bind(self, job_id):
+        """
+        记录当前执行这项评测的任务编号
+        """
+        with self._lock:
+            self.job_id = job_id
+            self._registry.changed()
+
+    def start(self, total=None, unit='items', initial=0):
+        """
+        开始计数
+        :param total: 总数，未知时为 None
+        :param unit: 计数单位，如 triples、bytes、labels
+        :param initial: 之前已完成的数量（如从检查点续算），不计入吞吐量
+        """
+        with self._lock:
+            self._reset(RUNNING, total, unit, initial)
+            self._registry.changed()
+
+    def set_total(self, total, unit=None):
+        """
+        修改总数（和单位），例如从按字节计数切换为按条数计数
+        """
+        with self._lock:
+            self.total = total
+            if unit is not None:
+                self.unit = unit
+            self._registry.changed()
+
+    def update(self, current):
+        """
+        :param current: 已完成的数量
+        """
+        with self._lock:
+            self.current = current
+            self._registry.changed()
+
+    def advance(self, n=1):
+        """
+        :param n: 新完成的数量
+        """
+        with self._lock:
+            self.current += n
+            self._registry.changed()
+
+    def finish(self):
+        """
+        正常结束，已完成数量置为总数
+        """
+        self.stop(FINISHED)
+
+    def stop(self, state):
+        """
+        以指定状态结束，如 finished、failed、cancelled；失败或取消时保留已完成的数量
+        """
+        with self._lock:
+            if state == FINISHED and self.total is not None:
+                self.current = self.total
+            self.state = state
+            self.finished_at = time.time()
+            self._elapsed = time.monotonic() - self._started
+            self._registry.changed()
+
+    def snapshot(self):
+        """
+        :return: 字典，包含 current、total、unit、percent、elapsed（秒）、rate（每秒完成数量）、eta（秒，未知时为 None）等
+        """
+        with self._lock:
+            if self.state == IDLE:
+                elapsed = 0.0
+            elif self.finished_at is not None:
+                elapsed = self._elapsed
+            else:
+                elapsed = time.monotonic() - self._started
+            rate = (self.current - self._initial) / elapsed if elapsed > 0 else 0.0
+            if self.state == FINISHED:
+                percent = 100.0
+            elif self.total:
+                percent = min(self.current / self.total * 100, 100.0)
+            else:
+                percent = 0.0
+            eta = None
+            if self.state == RUNNING and self.total is not None and rate > 0:
+                eta = max(self.total - self.current, 0) / rate
+            return {
+                'name': self.name,
+                'job_id': self.job_id,
+                'state': self.state,
+                'current': self.current,
+                'total': self.total if self.total is not None else 0,
+                'unit': self.unit,
+                'percent': percent,
+                'elapsed': round(elapsed, 3),
+                'rate': round(rate, 3),
+                'eta': round(eta, 3) if eta is not None else None,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+
+
+class ProgressRegistry:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._condition = threading.Condition(self.lock)
+        self._trackers = {}
+        self.version = 0
+
+    def tracker(self, name):
+        """
+        :param name: 评测名称
+        :return: ProgressTracker，不存在时创建
+        """
+        with self.lock:
+            tracker = self._trackers.get(name)
+            if tracker is None:
+                tracker = self._trackers[name] = ProgressTracker(name, self)
+            return tracker
+
+    def changed(self):
+        # 调用方已持有 lock
+        self.version += 1
+        self._condition.notify_all()
+
+    def snapshot(self):
+        """
+        :return: 评测名称 -> 进度字典
+        """
+        with self.lock:
+            return {name: tracker.snapshot() for name, tracker in self._trackers.items()}
+
+    def wait(self, version, timeout=None):
+        """
+        等待进度发生变化
+        :param version: 调用方上一次看到的版本号
+        :param timeout: 最长等待秒数
+        :return: 当前版本号，超时未变化时与 version 相同
+        """
+        with self.lock:
+            self._condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+registry = ProgressRegistry()
+
+
+def tracker(name):
+    return registry.tracker(name)
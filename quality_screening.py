@@ -1,103 +1,145 @@
-import re
 from collections import defaultdict
 import os
 from tqdm import tqdm
 import json
 import data_preprocess
-
-progress = {
-    "current": 0,
-    "total": 0
-}
-
-# 检查符号是否成对出现
-def has_unpaired_symbols(s, symbol_pairs):
-    stack = []
-    for char in s:
-        if char in symbol_pairs:
-            stack.append(char)
-        elif char in symbol_pairs.values():
-            if not stack or stack.pop() != char:
-                return True
-    return bool(stack)
+from csv_stream import DEFAULT_CHUNK_SIZE, iter_triplets
+from progress_registry import tracker
+from screening_rules import CATEGORIES, SYMBOL_PAIRS, RuleEngine, default_rules, has_unpaired_symbols, load_rules
+from triple_pages import PagedTripleReader, PagedTripleWriter
 
 # 定义符号对
-symbol_pairs = { '〈': '〉', '{': '}', '[': ']', '(': ')' }
+symbol_pairs = SYMBOL_PAIRS
 
-# 筛选低质量三元组并统计各类别数量
-def filter_low_quality_triples(triples):
-    low_quality_triples = {
-        '不规范实体关系': [],
-        '异常符号匹配': [],
-        '低质量头实体': [],
-        '不完备三元组': [],
-        '低质量关系': []
-    }
-
-    low_quality_counts = {
-        '不规范实体关系': 0,
-        '异常符号匹配': 0,
-        '低质量头实体': 0,
-        '不完备三元组': 0,
-        '低质量关系': 0
-    }
-
-    progress["total"] = len(triples)
-
-    for i, (s, p, o) in enumerate(tqdm(triples, desc="Filtering triples")):
-        # 更新当前进度
-        progress["current"] = i + 1
-
-        # 规则1：检查三元组是否完整
-        if not s or not p or not o:
-            low_quality_triples['不完备三元组'].append((s, p, o))
-            low_quality_counts['不完备三元组'] += 1
-            continue
-
-        # 规则3：实体中的符号需要成对出现
-        if has_unpaired_symbols(s, symbol_pairs) or has_unpaired_symbols(o, symbol_pairs):
-            low_quality_triples['异常符号匹配'].append((s, p, o))
-            low_quality_counts['异常符号匹配'] += 1
-
-        # 规则4：头实体长度在2到10字符之间
-        if not (2 <= len(s)):
-            low_quality_triples['低质量头实体'].append((s, p, o))
-            low_quality_counts['低质量头实体'] += 1
-
-        # 规则6：关系不能有标点符号
-        if re.search(r'[^\w\s]', p):
-            low_quality_triples['低质量关系'].append((s, p, o))
-            low_quality_counts['低质量关系'] += 1
-
-        # 规则2：头实体和关系不能有英文或纯数字，尾实体不能有特殊符号（允许《》）
-        if re.search(r'[a-zA-Z]', s) or re.match(r'^\d+$', s) or re.search(r'[a-zA-Z]', p) or re.match(r'^\d+$',p) or re.search(r'[^a-zA-Z0-9\u4e00-\u9fff《》]', o):
-            low_quality_triples['不规范实体关系'].append((s, p, o))
-            low_quality_counts['不规范实体关系'] += 1
+# 筛选规则配置文件，不存在时使用 screening_rules.default_rules()；文件修改后下一次筛选自动重新加载
+RULES_FILE = os.getenv('SCREENING_RULES_FILE',
+                       os.path.join(os.path.dirname(os.path.abspath(__file__)), 'screening_rules.json'))
+
+# 规则只声明和编译一次，按批对整列三元组执行，见 screening_rules
+rule_engine = RuleEngine(default_rules(), CATEGORIES)
+_rules_mtime = None
 
-    return low_quality_triples, low_quality_counts
 
-def main():
-    # 示例数据
-    triples = data_preprocess.knowledge_graph.relationships
+def get_rule_engine():
+    # 按配置文件的修改时间判断是否需要重新加载规则
+    global rule_engine, _rules_mtime
+    mtime = os.path.getmtime(RULES_FILE) if os.path.exists(RULES_FILE) else None
+    if mtime != _rules_mtime:
+        if mtime is None:
+            rule_engine = RuleEngine(default_rules(), CATEGORIES)
+        else:
+            rule_engine = RuleEngine(*load_rules(RULES_FILE))
+        _rules_mtime = mtime
+    return rule_engine
 
-    # 筛选低质量三元组并获取详细信息和统计数据
-    low_quality_triples, low_quality_counts = filter_low_quality_triples(triples)
 
-    # 检查目录是否存在，不存在则创建
-    output_dir = './Data/low_quality_triples'
-    os.makedirs(output_dir, exist_ok=True)
+# 低质量三元组的输出目录，按类别分页保存，见 triple_pages
+OUTPUT_DIR = './Data/low_quality_triples'
+
+# 并行筛选的进程数，1 表示在当前进程中筛选；由 init.create_app() 根据 SCREENING_WORKERS 配置设置
+workers = 1
+
+# 筛选低质量三元组并统计各类别数量
+# triples 可以是列表、列式存储，也可以是流式读取的三元组迭代器；total 为三元组总数，用于按条数更新进度
+# n_workers 为并行筛选的进程数，为空时使用模块变量 workers；结果按输入顺序合并，与单进程筛选完全一致
+def filter_low_quality_triples(triples, total=None, chunk_size=DEFAULT_CHUNK_SIZE, n_workers=None):
+    low_quality_triples, low_quality_counts, _ = filter_low_quality_triples_with_profile(
+        triples, total, chunk_size, n_workers)
+    return low_quality_triples, low_quality_counts
 
-    # 保存低质量三元组详细信息到JSON文件
-    json_file_path = os.path.join(output_dir, "low_quality_triples.json")
-    with open(json_file_path, 'w', encoding='utf-8') as json_file:
-        json.dump(low_quality_triples, json_file, ensure_ascii=False, indent=4)
-        print(f"JSON file saved: {json_file_path}")
+# 同 filter_low_quality_triples，另外返回每条规则的命中数和 CPU 时间
+# sink 不为空时每批命中的三元组交给 sink(类别, 三元组列表) 写出，不在内存中保留，返回的三元组为 None
+def filter_low_quality_triples_with_profile(triples, total=None, chunk_size=DEFAULT_CHUNK_SIZE, n_workers=None,
+                                            sink=None):
+    engine = get_rule_engine()
+    if total is None and hasattr(triples, '__len__'):
+        total = len(triples)
+    # 总数未知时（流式读取），进度由读取的字节数更新
+    progress = tracker('screening')
+    count_progress = total is not None
+    if count_progress:
+        progress.start(total, unit='triples')
+
+    with tqdm(total=total, desc="Filtering triples") as pbar:
+        # 并行筛选时由主进程在每个分块完成后累计更新，进度等于各进程已筛选的三元组总数
+        def update_progress(screened):
+            pbar.update(screened - pbar.n)
+            if count_progress:
+                progress.update(screened)
+
+        return engine.screen_with_profile(triples, chunk_size, update_progress, n_workers or workers, sink)
+
+def _update_bytes_progress(bytes_read, total_bytes):
+    # 读完文件时最后一块可能还未筛选，筛选结束前进度保持在 100% 以下
+    progress = tracker('screening')
+    progress.set_total(total_bytes)
+    progress.update(min(bytes_read, total_bytes - 1))
+
+
+def main(file_path=None, chunk_size=DEFAULT_CHUNK_SIZE, n_workers=None):
+    # file_path 为空时筛选已加载的知识图谱，否则直接从 CSV 文件分块流式读取，不构建完整的三元组列表
+    # 流式读取时进度按已读取的字节数计算，并行筛选最多预读 2 * n_workers 个分块
+    if file_path is None:
+        triples = data_preprocess.get_knowledge_graph().relationships
+    else:
+        tracker('screening').start(unit='bytes')
+        triples = iter_triplets(file_path, chunk_size, progress_callback=_update_bytes_progress)
+
+    # 筛选低质量三元组，每批命中的三元组直接按类别追加到分页存储中，不在内存中保留
+    # 清单中记录筛选的三元组数量和规则版本，上传增量数据时据此判断能否在已有结果后追加
+    output_dir = OUTPUT_DIR
+    categories = get_rule_engine().categories
+    metadata = {'triplet_count': len(triples) if file_path is None else None, 'rules_mtime': _rules_mtime}
+    with PagedTripleWriter(output_dir, categories, metadata) as writer:
+        _, low_quality_counts, rule_profile = filter_low_quality_triples_with_profile(
+            triples, chunk_size=chunk_size, n_workers=n_workers, sink=writer.add)
+    print(f"Paged triples saved: {output_dir}")
 
     # 保存低质量三元组统计数据到JSON文件
-    json_counts_file_path = os.path.join(output_dir, "low_quality_counts.json")
+    _save_counts(low_quality_counts)
+
+    # 保存每条规则的命中数和 CPU 时间，用于查看哪条规则占用了主要的筛选时间
+    json_profile_file_path = os.path.join(output_dir, "rule_profile.json")
+    with open(json_profile_file_path, 'w', encoding='utf-8') as json_file:
+        json.dump(rule_profile, json_file, ensure_ascii=False, indent=4)
+        print(f"JSON file saved: {json_profile_file_path}")
+
+    tracker('screening').finish()
+    return low_quality_counts
+
+
+def _save_counts(low_quality_counts):
+    json_counts_file_path = os.path.join(OUTPUT_DIR, "low_quality_counts.json")
     with open(json_counts_file_path, 'w', encoding='utf-8') as json_file:
         json.dump(low_quality_counts, json_file, ensure_ascii=False, indent=4)
         print(f"JSON file saved: {json_counts_file_path}")
 
+
+def append_triples(triples, previous_count):
+    # 只筛选新增的三元组，并追加到已有的筛选结果中，耗时与新增数量成正比
+    # previous_count 为追加前知识图谱中的三元组数量；已有结果不是对这些三元组、用当前规则得到的，返回 None
+    engine = get_rule_engine()
+    try:
+        reader = PagedTripleReader(OUTPUT_DIR)
+    except FileNotFoundError:
+        return None
+    if reader.metadata.get('triplet_count') != previous_count or reader.metadata.get('rules_mtime') != _rules_mtime:
+        return None
+    metadata = {**reader.metadata, 'triplet_count': previous_count + len(triples)}
+    with PagedTripleWriter(OUTPUT_DIR, engine.categories, metadata, append=True) as writer:
+        engine.screen_with_profile(triples, sink=writer.add)
+    low_quality_counts = writer.counts()
+    _save_counts(low_quality_counts)
+    return low_quality_counts
+
+
+def get_low_quality_page(category=None, offset=0, limit=100):
+    # 分页读取低质量三元组，category 为空时按类别顺序读取全部类别
+    reader = PagedTripleReader(OUTPUT_DIR)
+    if category:
+        return [[category] + triple for triple in reader.page(category, offset, limit)], reader.counts()[category]
+    return [[category] + triple for category, triple in reader.page_all(offset, limit)], \
+        sum(reader.counts().values())
+
 if __name__ == '__main__':
     main()
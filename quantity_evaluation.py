@@ -3,11 +3,13 @@
 
 该脚本用于生成知识图谱的质量报告。具体功能包括：
 - 计算知识图谱的统计数据，例如三元组数量、实体数量、关系种类数量等
+- 知识图谱加载时去除了重复三元组的，同时报告重复数量、重复率和重复次数最多的三元组
 - 生成质量报告并将其保存为 JSON 文件
 
+各项计数类指标来自 KnowledgeGraph.statistics() 的一次聚合，生成报告的耗时与扫描一遍三元组相当。
+
 主要函数和变量：
-- main(): 主函数，执行各项任务并生成质量报告
-- progress: 全局变量，用于跟踪进度
+- main(): 主函数，执行各项任务并生成质量报告，进度记录在 progress_registry 的 quantity 中
 
 使用示例：
 ```python
@@ -17,13 +19,15 @@ if __name__ == "__main__":
 
 import json  # 用于处理 JSON 数据
 from tqdm import tqdm  # 用于显示进度条
-from data_preprocess import knowledge_graph  # 导入知识图谱模块
-import time  # 用于模拟计算时间
-progress = 0
+import data_preprocess  # 导入数据预处理模块
+from jobs import check_cancelled  # 用于在任务被取消时停止计算
+from progress_registry import tracker  # 用于记录计算进度
 
 
 def main():
-    global progress
+    progress = tracker('quantity')
+    progress.start(unit='tasks')
+    knowledge_graph = data_preprocess.get_knowledge_graph()
     # 定义需要执行的任务，每个任务包含任务名称和对应的函数
     tasks = [
         ("三元组数量 (Triplet Count)", knowledge_graph.calculate_triplet_count),
@@ -32,20 +36,30 @@ def main():
         ("实体种类数量 (Entity Label Types Count)", knowledge_graph.calculate_entity_label_types_count),
         ("实体关系密度 (Entity-Relationship Density)", knowledge_graph.calculate_entity_relationship_density),
         ("连通度数量 (Connected Components Count)", knowledge_graph.calculate_connected_components),
+        ("连通分量规模分布 (Component Size Distribution)", lambda: knowledge_graph.connected_components().component_sizes()),
+        ("最大连通分量的实体数量 (Largest Component Size)", lambda: max(knowledge_graph.connected_components().component_sizes(), default=0)),
         ("出现次数最多的前100个实体及其出现次数 (Most Frequent Entities)", lambda: knowledge_graph.top_entities(top_n=100)),
         ("出现次数最多的前15个关系及其出现次数 (Most Frequent Relationships)", lambda: knowledge_graph.top_relationships(top_n=15)),
         ("出现次数最多的前15个实体 (Top 15 Entity Labels)", lambda: knowledge_graph.top_entity_labels(top_n=15))
     ]
+    duplicate_report = knowledge_graph.duplicate_report
+    if duplicate_report is not None:
+        tasks += [
+            ("重复三元组数量 (Duplicate Triplet Count)", lambda: duplicate_report['duplicates']),
+            ("重复率 (Duplicate Rate)", lambda: duplicate_report['duplicate_rate']),
+            ("重复次数最多的三元组 (Most Duplicated Triplets)", lambda: duplicate_report['top_duplicates']),
+        ]
 
     quality_report = {}
+    progress.set_total(len(tasks))
 
     # 使用tqdm创建进度条
     with tqdm(total=len(tasks), desc="计算统计数据", unit="task") as pbar:
         for i, (task_name, task_func) in enumerate(tasks):
+            check_cancelled()
             quality_report[task_name] = task_func()
             pbar.update(1)
-            progress = (i + 1) / len(tasks) * 100
-            time.sleep(1)  # 模拟计算任务的时间
+            progress.advance()
 
     for key, value in quality_report.items():
         print(f"{key}: {value}")
@@ -55,6 +69,7 @@ def main():
     with open(output_file_path, 'w', encoding='utf-8') as f:
         json.dump(quality_report, f, ensure_ascii=False, indent=4)
     print(f"质量报告已保存到 {output_file_path}")
+    progress.finish()
 
     return quality_report
 
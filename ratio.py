@@ -2,13 +2,13 @@
 度数统计与保存脚本
 
 该脚本用于计算知识图谱中实体的度数，并将计算结果保存为JSON文件。具体功能包括：
-- 计算每个实体的度数
-- 将度数统计结果按顺序保存为JSON文件
-- 使用进度条显示计算和保存过程
+- 按块将头实体、尾实体编码为整数并用 bincount 累加出度和入度（见 degree_engine），进度按实际处理的三元组数量更新
+- 将总度数的统计结果按顺序保存为JSON文件（degree_counts.json，与页面展示的格式一致）
+- 保存出度、入度、总度数的直方图（degree_histograms.json）
+- 保存对数分箱直方图和幂律分布拟合结果（degree_summary.json），用于分析大规模图谱的长尾分布
 
 主要函数和变量：
-- calculate_and_save_degree_counts(): 计算度数并保存结果
-- progress: 全局变量，用于跟踪计算进度
+- calculate_and_save_degree_counts(): 计算度数并保存结果，进度记录在 progress_registry 的 degree 中
 
 使用示例：
 ```python
@@ -19,44 +19,62 @@ if __name__ == '__main__':
 import json # 用于处理 JSON 数据
 import os # 用于文件和目录操作
 import data_preprocess # 导入数据预处理模块
-from tqdm import tqdm # 用于显示进度条
+from csv_stream import DEFAULT_CHUNK_SIZE, iter_triplet_chunks # 用于流式读取三元组文件
+from degree_engine import DEGREE_KINDS, DegreeCounter, degree_summary # 用于统计度数
+from jobs import check_cancelled # 用于在任务被取消时停止计算
+from progress_registry import tracker # 用于记录计算进度
 
-progress = {
-    'current': 0,
-    'total': 0
-}
+OUTPUT_DIR = 'Data/degree'
 
 
-def calculate_and_save_degree_counts():
+def _save_json(file_name, data):
+    output_file = os.path.join(OUTPUT_DIR, file_name)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    return output_file
+
+
+def calculate_and_save_degree_counts(file_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
     """
     计算知识图谱中每个实体的度数，并将结果保存为 JSON 文件
+    :param file_path: 三元组 CSV 文件路径，为空时使用已加载的知识图谱，否则分块流式读取
+    :param chunk_size: 流式读取时每块的行数
+    :return: 总度数 -> 实体数量
     """
-    global progress
-
-    # 计算度数
-    degree_count = data_preprocess.knowledge_graph.calculate_degree_count()
-    sorted_degree_count = dict(sorted(degree_count.items()))
+    progress = tracker('degree')
 
-    # 更新进度
-    total_progress = len(degree_count)
-    progress['total'] = total_progress
-    progress['current'] = 0  # 确保从0开始
+    # 计算度数；已加载的图谱按处理的三元组数量更新进度，流式读取时按已读取的字节数更新进度
+    if file_path is None:
+        knowledge_graph = data_preprocess.get_knowledge_graph()
+        progress.start(total=len(knowledge_graph.relationships), unit='triples')
 
-    # 将结果存入 JSON 文件
-    output_file = 'Data/degree/degree_counts.json'
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        def update_triplet_progress(done, total):
+            check_cancelled()
+            progress.update(done)
+        # 度数随上传的增量数据更新，已统计过的图谱直接返回
+        counter = knowledge_graph.degree_counter(update_triplet_progress)
+    else:
+        progress.start(unit='bytes')
 
-    with tqdm(total=total_progress, desc="计算并保存度数", unit="item") as pbar:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(sorted_degree_count, f, ensure_ascii=False, indent=4)
-            for i in range(total_progress):
-                progress['current'] = i + 1
-                pbar.update(1)
+        def update_bytes_progress(bytes_read, total_bytes):
+            progress.set_total(total_bytes)
+            progress.update(min(bytes_read, total_bytes - 1))
+        counter = DegreeCounter()
+        for chunk in iter_triplet_chunks(file_path, chunk_size, progress_callback=update_bytes_progress):
+            check_cancelled()
+            counter.add_chunk(chunk)
 
-    progress['current'] = total_progress
+    # 将结果存入 JSON 文件
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    degree_count = counter.histogram('total')
+    output_file = _save_json('degree_counts.json', degree_count)
+    _save_json('degree_histograms.json', {kind: counter.histogram(kind) for kind in DEGREE_KINDS})
+    _save_json('degree_summary.json', degree_summary(counter))
+    progress.finish()
 
     print("成功保存文件到", output_file)
+    return degree_count
 
 
 if __name__ == '__main__':
-    calculate_and_save_degree_counts()
\ No newline at end of file
+    calculate_and_save_degree_counts()
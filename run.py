@@ -6,7 +6,9 @@ from init import create_app
 
 
 app = create_app()
-app.run(host='127.0.0.1', port=8008, debug=True)
+# 多进程筛选在 Windows 上以 spawn 方式启动子进程，子进程会重新导入本模块，因此只在直接运行时启动服务
+if __name__ == '__main__':
+    app.run(host='127.0.0.1', port=8008, debug=True)
 
 
 # if __name__ == '__main__':
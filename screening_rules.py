@@ -0,0 +1,631 @@
+"""
+三元组质量筛选规则引擎
+
+该模块将低质量三元组的筛选规则声明为对象，正则表达式只编译一次，并按列对一批三元组整体执行规则。具体功能包括：
+- 每条规则作用于三元组的一列或多列（头实体、关系、尾实体），任一列命中即判定该三元组命中
+- 作用于同一列的全部规则合并为一个组合正则，先对该列不同的取值做一次扫描（在 C 层完成），只有扫描命中的少量候选值才执行各条规则
+- 列式存储对实体、关系词表中的每个字符串只判定一次，再按编号数组查表，不需要解码三元组
+- 排他规则（如不完备三元组）命中的行不再参与之后的规则；已归入某类别的行不再由同类别的其他规则判定
+- 结果按类别汇总，每个类别中的三元组保持输入顺序，同一三元组在一个类别中只出现一次
+- 可将三元组分块交给进程池并行筛选，按输入顺序合并结果，进度按各进程已完成的三元组数量累计
+- 规则可以写在 JSON 配置文件中；引擎统计每条规则的命中数、判定的取值数和 CPU 时间，
+  并在两个排他规则之间按“每次命中的 CPU 时间”从低到高调整执行顺序（不影响筛选结果）
+
+配置文件格式（JSON）：
+```json
+{
+    "categories": ["不规范实体关系", "低质量关系"],
+    "rules": [
+        {"name": "关系白名单", "category": "低质量关系", "type": "whitelist", "fields": ["relation"], "values": ["导演", "主演"]},
+        {"category": "不规范实体关系", "type": "regex", "fields": ["head", "relation"], "pattern": "[a-zA-Z]"},
+        {"category": "低质量头实体", "type": "length", "fields": ["head"], "min_length": 2, "max_length": 30},
+        {"category": "异常符号匹配", "type": "symbol_pairs", "fields": ["head", "tail"], "symbol_pairs": {"(": ")"}}
+    ]
+}
+```
+其中 fields 取值为 head、relation、tail；exclusive 为 true 时命中的三元组不再参与之后的规则；name 默认为类别名，需唯一
+
+主要类和方法：
+- has_unpaired_symbols(s, symbol_pairs): 检查符号是否成对出现
+- RegexRule 类：任一列匹配正则表达式即命中
+- LengthRule 类：任一列长度小于下限或大于上限即命中
+- SymbolPairRule 类：任一列中的符号不成对即命中，不含符号的字符串跳过逐字符检查
+- WhitelistRule 类：任一列的取值不在白名单中即命中
+- rule_from_config(spec) / load_rules(config_file): 从配置创建规则
+- RuleEngine 类：规则引擎
+  - screen_chunk(chunk): 对一批三元组执行全部规则，返回每个类别命中的行下标
+  - screen(triples, chunk_size, progress_callback, workers): 分批筛选全部三元组（workers > 1 时多进程并行），返回各类别的三元组和数量
+  - screen_with_profile(...): 同 screen()，另外返回每条规则的命中数和 CPU 时间
+- default_rules(): 与 quality_screening 原有筛选逻辑一致的五类规则
+- CATEGORIES / SYMBOL_PAIRS: 默认类别（输出顺序）和默认符号对
+
+使用示例：
+```python
+rules, categories = load_rules('screening_rules.json')
+engine = RuleEngine(rules, categories)
+low_quality_triples, low_quality_counts, profile = engine.screen_with_profile(knowledge_graph.relationships)
+"""
+
+import json  # 用于读取规则配置文件
+import multiprocessing  # 用于以 spawn 方式启动筛选进程
+import re  # 用于编译规则中的正则表达式
+import threading  # 用于在进程池回调中累计进度
+import time  # 用于统计规则的 CPU 时间
+from collections import deque  # 用于按提交顺序保存并行筛选中的分块
+from concurrent.futures import ProcessPoolExecutor  # 用于多进程并行筛选
+from itertools import compress, islice, repeat  # 用于在 C 层批量过滤和查表、将迭代器按批切分
+import numpy as np  # 用于按列合并规则的判定结果
+from jobs import check_cancelled  # 用于在任务被取消时停止筛选
+
+HEAD, RELATION, TAIL = 0, 1, 2
+FIELDS = {'head': HEAD, 'relation': RELATION, 'tail': TAIL}
+FIELD_NAMES = {index: name for name, index in FIELDS.items()}
+DEFAULT_CHUNK_SIZE = 100000
+# 并行筛选时每个分块的最小三元组数量，分块过小时进程间传输的开销超过筛选本身
+PARALLEL_MIN_CHUNK = 10000
+
+CATEGORIES = ('不规范实体关系', '异常符号匹配', '低质量头实体', '不完备三元组', '低质量关系')
+SYMBOL_PAIRS = {'〈': '〉', '{': '}', '[': ']', '(': ')'}
+
+
+def has_unpaired_symbols(s, symbol_pairs):
+    """
+    检查符号是否成对出现
+    :param s: 字符串
+    :param symbol_pairs: 左符号到右符号的字典
+    :return: 存在不成对的符号时返回 True
+    """
+    stack = []
+    for char in s:
+        if char in symbol_pairs:
+            stack.append(char)
+        elif char in symbol_pairs.values():
+            if not stack or stack.pop() != char:
+                return True
+    return bool(stack)
+
+
+class Rule:
+    # 配置文件中的规则类型
+    type = None
+    # 组合扫描使用的正则表达式：所有命中的取值都必须匹配它（允许多匹配），为 None 时不做预筛选
+    prefilter = None
+
+    def __init__(self, category, fields, exclusive=False, name=None):
+        """
+        筛选规则基类，子类实现 check(value)
+
+        :param category: 命中时归入的类别
+        :param fields: 规则作用的列下标（HEAD、RELATION、TAIL），任一列命中即判定命中
+        :param exclusive: 为 True 时，命中的三元组不再参与之后的规则
+        :param name: 规则名称，用于统计，默认为类别名
+        """
+        self.category = category
+        self.fields = tuple(fields)
+        self.exclusive = exclusive
+        self.name = name or category
+
+    def check(self, value):
+        """
+        :param value: 单个字段的取值
+        :return: 该取值是否命中规则
+        """
+        raise NotImplementedError
+
+    def hits(self, values):
+        """
+        :param values: 候选取值
+        :return: 命中规则的取值集合
+        """
+        return set(filter(self.check, values))
+
+
+class RegexRule(Rule):
+    type = 'regex'
+
+    def __init__(self, category, fields, pattern, exclusive=False, name=None):
+        """
+        :param pattern: 正则表达式，re.search 找到匹配即命中；需要整串匹配时在表达式中使用 ^ 和 $
+        """
+        super().__init__(category, fields, exclusive, name)
+        self.pattern = re.compile(pattern)
+        self.prefilter = self.pattern.pattern
+        self._search = self.pattern.search
+
+    def check(self, value):
+        return self._search(value or '') is not None
+
+    def hits(self, values):
+        return set(filter(self._search, values))
+
+
+class LengthRule(Rule):
+    type = 'length'
+
+    def __init__(self, category, fields, min_length=None, max_length=None, exclusive=False, name=None):
+        """
+        :param min_length: 长度下限，长度小于该值即命中
+        :param max_length: 长度上限，长度大于该值即命中
+        """
+        super().__init__(category, fields, exclusive, name)
+        self.min_length = min_length
+        self.max_length = max_length
+        # 用正则表达式描述长度越界，使长度规则也能参与组合扫描
+        patterns = []
+        if min_length:
+            patterns.append(r'\A(?s:.{0,%d})\Z' % (min_length - 1))
+        if max_length is not None:
+            patterns.append(r'(?s:.{%d})' % (max_length + 1))
+        self.prefilter = '|'.join(patterns) or '(?!)'
+
+    def check(self, value):
+        length = len(value) if value else 0
+        return ((self.min_length is not None and length < self.min_length) or
+                (self.max_length is not None and length > self.max_length))
+
+
+class SymbolPairRule(Rule):
+    type = 'symbol_pairs'
+
+    def __init__(self, category, fields, symbol_pairs, exclusive=False, name=None):
+        """
+        :param symbol_pairs: 左符号到右符号的字典
+        """
+        super().__init__(category, fields, exclusive, name)
+        self.symbol_pairs = dict(symbol_pairs)
+        symbols = ''.join(self.symbol_pairs) + ''.join(self.symbol_pairs.values())
+        # 不含任何符号的字符串一定成对，先用一次字符集扫描跳过逐字符检查
+        self.prefilter = '[' + re.escape(symbols) + ']'
+        self._any_symbol = re.compile(self.prefilter).search
+
+    def check(self, value):
+        return (value is not None and self._any_symbol(value) is not None and
+                has_unpaired_symbols(value, self.symbol_pairs))
+
+    def hits(self, values):
+        return {value for value in filter(self._any_symbol, values)
+                if has_unpaired_symbols(value, self.symbol_pairs)}
+
+
+class WhitelistRule(Rule):
+    type = 'whitelist'
+
+    def __init__(self, category, fields, values, exclusive=False, name=None):
+        """
+        :param values: 允许的取值（如关系白名单），不在其中的取值命中
+        """
+        super().__init__(category, fields, exclusive, name)
+        self.values = frozenset(values)
+
+    def check(self, value):
+        return value not in self.values
+
+    def hits(self, values):
+        return set(values) - self.values
+
+
+RULE_TYPES = {rule_type.type: rule_type for rule_type in (RegexRule, LengthRule, SymbolPairRule, WhitelistRule)}
+
+
+def rule_from_config(spec):
+    """
+    根据配置创建规则
+    :param spec: 规则配置字典，包含 type、category、fields，以及各类型规则的参数
+    :return: Rule 实例
+    """
+    spec = dict(spec)
+    rule_type = spec.pop('type', None)
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"Unknown screening rule type: {rule_type}")
+    try:
+        fields = [FIELDS[field] for field in spec.pop('fields')]
+        return RULE_TYPES[rule_type](spec.pop('category'), fields, **spec)
+    except (KeyError, TypeError, re.error) as e:
+        raise ValueError(f"Invalid {rule_type} screening rule {spec}: {e}")
+
+
+def load_rules(config_file):
+    """
+    从 JSON 配置文件加载规则
+    :param config_file: 配置文件路径
+    :return: (规则列表, 类别列表)，类别列表默认按规则中类别首次出现的顺序
+    """
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    rules = [rule_from_config(spec) for spec in config['rules']]
+    categories = config.get('categories') or list(dict.fromkeys(rule.category for rule in rules))
+    return rules, categories
+
+
+def default_rules():
+    """
+    与 quality_screening 原有逐条筛选逻辑一致的规则，按原有顺序排列
+    :return: 规则列表
+    """
+    return [
+        # 规则1：检查三元组是否完整，不完整的三元组不再检查其他规则
+        LengthRule('不完备三元组', (HEAD, RELATION, TAIL), min_length=1, exclusive=True),
+        # 规则3：实体中的符号需要成对出现
+        SymbolPairRule('异常符号匹配', (HEAD, TAIL), SYMBOL_PAIRS),
+        # 规则4：头实体长度不少于2个字符
+        LengthRule('低质量头实体', (HEAD,), min_length=2),
+        # 规则6：关系不能有标点符号
+        RegexRule('低质量关系', (RELATION,), r'[^\w\s]'),
+        # 规则2：头实体和关系不能有英文或纯数字，尾实体不能有特殊符号（允许《》）
+        RegexRule('不规范实体关系', (HEAD, RELATION), r'[a-zA-Z]|^\d+$', name='不规范实体关系（头实体和关系）'),
+        RegexRule('不规范实体关系', (TAIL,), r'[^a-zA-Z0-9\u4e00-\u9fff《》]', name='不规范实体关系（尾实体）'),
+    ]
+
+
+def _combine(rules):
+    """
+    将多条规则的预筛选表达式合并为一个正则表达式
+    :return: 组合表达式的 search 方法；有规则不支持预筛选或无法合并时返回 None
+    """
+    patterns = [rule.prefilter for rule in rules]
+    if not patterns or None in patterns:
+        return None
+    try:
+        # 合并后分组会重新编号，含分组（以及引用分组的反向引用、条件匹配）的表达式不能合并
+        if any(re.compile(pattern).groups for pattern in patterns):
+            return None
+    except re.error:
+        return None
+    # 锚定在开头的表达式在每个位置都要尝试一次，放在字符集之后
+    patterns.sort(key=lambda pattern: pattern.startswith(('\\A', '^')))
+    try:
+        return re.compile('|'.join('(?:%s)' % pattern for pattern in dict.fromkeys(patterns))).search
+    except re.error:
+        return None
+
+
+def _and_not(a, b):
+    # a & ~b，None 表示全部为 True（a）或全部为 False（b）
+    if b is None:
+        return a
+    return ~b if a is None else a & ~b
+
+
+class _FieldScan:
+    def __init__(self, vocabulary, prefilter):
+        """
+        对一组不重复的取值做一次组合扫描，得到可能命中任一规则的候选；
+        各规则只对需要的候选求值，结果按候选缓存，多批数据共用同一词表时不会重复判定
+
+        :param vocabulary: 不重复的取值序列，缺失的字段（None）按空字符串处理
+        :param prefilter: 组合表达式的 search 方法，为 None 时全部取值都是候选
+        """
+        if None in vocabulary:
+            vocabulary = ['' if value is None else value for value in vocabulary]
+        if prefilter is None:
+            self.positions = None
+            self.candidates = list(vocabulary)
+        else:
+            self.positions = list(compress(range(len(vocabulary)), map(prefilter, vocabulary)))
+            self.candidates = [vocabulary[i] for i in self.positions]
+        self._evaluated = {}
+        self._verdicts = {}
+
+    def codes_for_values(self, values):
+        """
+        :param values: 一列取值
+        :return: 每个取值对应的候选编号数组（不是候选时为 -1），没有候选时返回 None
+        """
+        if not self.candidates:
+            return None
+        index = dict(zip(self.candidates, range(len(self.candidates))))
+        return np.fromiter(map(index.get, values, repeat(-1)), dtype=np.int64, count=len(values))
+
+    def vocabulary_codes(self, size):
+        """
+        :param size: 词表大小
+        :return: 词表编号到候选编号的数组（不是候选时为 -1），没有候选时返回 None
+        """
+        if not self.candidates:
+            return None
+        if self.positions is None:
+            return np.arange(size, dtype=np.int64)
+        codes = np.full(size, -1, dtype=np.int64)
+        codes[self.positions] = np.arange(len(self.positions))
+        return codes
+
+    def mask(self, rule, codes, needed):
+        """
+        :param rule: 规则
+        :param codes: 每行的候选编号数组
+        :param needed: 需要判定的行（布尔数组），None 表示全部
+        :return: (每行是否命中规则的布尔数组，没有命中时为 None, 本次新判定的候选数量)
+        """
+        if rule not in self._verdicts:
+            self._evaluated[rule] = np.zeros(len(self.candidates), dtype=bool)
+            self._verdicts[rule] = np.zeros(len(self.candidates) + 1, dtype=bool)  # 最后一项对应编号 -1
+        evaluated, verdict = self._evaluated[rule], self._verdicts[rule]
+        selected = codes if needed is None else codes[needed]
+        wanted = np.unique(selected[selected >= 0])
+        todo = wanted[~evaluated[wanted]]
+        if len(todo):
+            values = [self.candidates[i] for i in todo.tolist()]
+            hits = rule.hits(values)
+            verdict[todo] = np.fromiter(map(hits.__contains__, values), dtype=bool, count=len(values))
+            evaluated[todo] = True
+        if not verdict[wanted].any():
+            return None, len(todo)
+        return verdict[codes], len(todo)
+
+
+def _iter_chunks(triples, chunk_size):
+    # 列表按切片分块，其他可迭代对象（如流式读取的三元组）按顺序取出 chunk_size 个
+    if isinstance(triples, list):
+        return (triples[start:start + chunk_size] for start in range(0, len(triples), chunk_size))
+    iterator = iter(triples)
+    return iter(lambda: list(islice(iterator, chunk_size)), [])
+
+
+def _pick(chunk, hits):
+    return {category: [chunk[i] for i in rows] for category, rows in hits.items()}
+
+
+# 工作进程中的规则引擎，由进程池的 initializer 设置，每个进程只传输一次
+_worker_engine = None
+
+
+def _init_worker(engine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _screen_in_worker(chunk):
+    # 只返回命中行下标和统计数据，三元组由主进程从自己持有的分块中取出，减少进程间传输
+    return _worker_engine._screen_rows(chunk)
+
+
+class RuleEngine:
+    def __init__(self, rules, categories=None):
+        """
+        :param rules: 规则列表，按顺序执行（两个排他规则之间的规则会按统计的代价调整顺序）
+        :param categories: 输出的类别及顺序，默认按规则中类别首次出现的顺序
+        """
+        self.rules = list(rules)
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Screening rule names must be unique: {names}")
+        if categories is None:
+            categories = dict.fromkeys(rule.category for rule in self.rules)
+        self.categories = list(categories)
+        # 每列（以及列式存储的实体词表）作用于其上的全部规则合并为一次组合扫描
+        self._field_prefilters = [_combine([rule for rule in self.rules if field in rule.fields])
+                                  for field in (HEAD, RELATION, TAIL)]
+        self._entity_prefilter = _combine([rule for rule in self.rules
+                                           if HEAD in rule.fields or TAIL in rule.fields])
+        # 每条规则累计的 (命中数, 判定的候选数, CPU 秒数)，用于调整执行顺序
+        self._totals = np.zeros((len(self.rules), 3))
+        self._order = list(range(len(self.rules)))
+
+    def _reorder(self):
+        # 排他规则会改变之后规则可见的行，保持其位置不变；两个排他规则之间的规则结果只取并集，
+        # 按每次命中的 CPU 时间从低到高执行，使廉价且命中多的规则先把行归入类别，后面的同类规则少判定
+        hits, _, cpu_time = self._totals.T
+        cost = cpu_time / np.maximum(hits, 1)
+        order, segment = [], []
+        for index, rule in enumerate(self.rules):
+            if rule.exclusive:
+                order += sorted(segment, key=cost.__getitem__)
+                order.append(index)
+                segment = []
+            else:
+                segment.append(index)
+        self._order = order + sorted(segment, key=cost.__getitem__)
+
+    def _screen(self, n, fields, stats):
+        """
+        :param n: 行数
+        :param fields: 每列的 (_FieldScan, 每行的候选编号数组或 None)
+        :param stats: 每条规则的 (命中数, 判定的候选数, CPU 秒数) 数组，就地累加
+        :return: 类别 -> 命中行下标数组（升序）
+        """
+        active = None  # 未被排他规则排除的行，None 表示全部
+        category_masks = {}
+        for index in self._order:
+            rule = self.rules[index]
+            start = time.thread_time()
+            previous = category_masks.get(rule.category)
+            # 排他规则需要判定全部可见的行；其他规则跳过已归入同一类别的行
+            needed = active if rule.exclusive else _and_not(active, previous)
+            mask = None
+            evaluated = 0
+            for field in rule.fields:
+                scan, codes = fields[field]
+                if codes is None:
+                    continue
+                field_mask, count = scan.mask(rule, codes, _and_not(needed, mask))
+                evaluated += count
+                if field_mask is not None:
+                    mask = field_mask if mask is None else mask | field_mask
+            hits = 0
+            if mask is not None:
+                if needed is not None:
+                    mask &= needed
+                hits = int(np.count_nonzero(mask if previous is None else mask & ~previous))
+                category_masks[rule.category] = mask if previous is None else previous | mask
+                if rule.exclusive:
+                    active = _and_not(active, mask)
+            stats[index] += (hits, evaluated, time.thread_time() - start)
+        return {category: np.flatnonzero(mask) for category, mask in category_masks.items()}
+
+    def _screen_rows(self, chunk):
+        """
+        :return: (类别 -> 命中行下标列表, 每条规则的统计数组, 组合扫描的 CPU 秒数)
+        """
+        stats = np.zeros((len(self.rules), 3))
+        if not chunk:
+            return {}, stats, 0.0
+        start = time.thread_time()
+        fields = []
+        for column, prefilter in zip(zip(*chunk), self._field_prefilters):
+            if None in column:
+                column = ['' if value is None else value for value in column]
+            scan = _FieldScan(list(set(column)), prefilter)
+            fields.append((scan, scan.codes_for_values(column)))
+        scan_time = time.thread_time() - start
+        hits = self._screen(len(chunk), fields, stats)
+        self._totals += stats
+        self._reorder()
+        return {category: rows.tolist() for category, rows in hits.items()}, stats, scan_time
+
+    def screen_chunk(self, chunk):
+        """
+        对一批三元组执行全部规则
+        :param chunk: (头实体, 关系, 尾实体) 元组列表
+        :return: 类别 -> 命中行下标数组（升序）
+        """
+        hits, _, _ = self._screen_rows(chunk)
+        return {category: np.asarray(rows, dtype=np.int64) for category, rows in hits.items()}
+
+    def _screen_columnar(self, store, chunk_size):
+        # 列式存储对实体、关系词表各做一次组合扫描，之后每批按编号数组查表，判定结果在各批之间共用
+        start = time.thread_time()
+        entity_scan = _FieldScan(store.entity_interner.strings, self._entity_prefilter)
+        relation_scan = _FieldScan(store.relation_interner.strings, self._field_prefilters[RELATION])
+        entity_codes = entity_scan.vocabulary_codes(len(store.entity_interner))
+        relation_codes = relation_scan.vocabulary_codes(len(store.relation_interner))
+        scan_time = time.thread_time() - start
+        columns = ((entity_scan, entity_codes, store.heads), (relation_scan, relation_codes, store.relations),
+                   (entity_scan, entity_codes, store.tails))
+        for start in range(0, len(store), chunk_size):
+            stop = min(start + chunk_size, len(store))
+            stats = np.zeros((len(self.rules), 3))
+            fields = [(scan, None if codes is None else codes[column[start:stop]]) for scan, codes, column in columns]
+            hits = self._screen(stop - start, fields, stats)
+            self._totals += stats
+            self._reorder()
+            # 只解码命中的三元组
+            yield stop - start, {category: [store[start + i] for i in rows.tolist()]
+                                 for category, rows in hits.items()}, stats, scan_time
+            scan_time = 0.0
+
+    def _screen_chunks(self, triples, chunk_size, progress_callback):
+        if hasattr(triples, 'entity_interner'):
+            results = self._screen_columnar(triples, chunk_size)
+        else:
+            results = ((len(chunk), _pick(chunk, hits), stats, scan_time)
+                       for chunk in _iter_chunks(triples, chunk_size)
+                       for hits, stats, scan_time in [self._screen_rows(chunk)])
+        screened = 0
+        for size, hits, stats, scan_time in results:
+            screened += size
+            if progress_callback is not None:
+                progress_callback(screened)
+            yield hits, stats, scan_time
+
+    def _screen_parallel(self, triples, chunk_size, workers, progress_callback):
+        lock = threading.Lock()
+        screened = [0]
+
+        def on_done(size):
+            # 在主进程的回调线程中累计各进程已完成的三元组数量，完成顺序不影响进度的准确性
+            def callback(future):
+                if progress_callback is None or future.cancelled() or future.exception() is not None:
+                    return
+                with lock:
+                    screened[0] += size
+                    progress_callback(screened[0])
+            return callback
+
+        def collect(chunk, future):
+            hits, stats, scan_time = future.result()
+            return _pick(chunk, hits), stats, scan_time
+
+        # 筛选在多线程的 Web 进程中运行，fork 可能复制其他线程持有的锁，工作进程使用 spawn 启动
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_init_worker, initargs=(self,))
+        try:
+            pending = deque()
+            for chunk in _iter_chunks(triples, chunk_size):
+                future = executor.submit(_screen_in_worker, chunk)
+                future.add_done_callback(on_done(len(chunk)))
+                pending.append((chunk, future))
+                # 按提交顺序取回结果，保证合并顺序与输入一致；同时限制在途分块数量，流式输入不会被整体读入内存
+                while len(pending) >= 2 * workers:
+                    yield collect(*pending.popleft())
+            while pending:
+                yield collect(*pending.popleft())
+        finally:
+            # 筛选被取消或出错时不再等待尚未开始的分块
+            executor.shutdown(cancel_futures=True)
+
+    def _profile(self, stats, scan_time):
+        rules = []
+        for index in self._order:
+            rule = self.rules[index]
+            hits, evaluated, cpu_time = stats[index]
+            rules.append({
+                'name': rule.name,
+                'category': rule.category,
+                'type': rule.type,
+                'fields': [FIELD_NAMES[field] for field in rule.fields],
+                'exclusive': rule.exclusive,
+                'hits': int(hits),
+                'evaluated': int(evaluated),
+                'cpu_time': round(float(cpu_time), 6),
+            })
+        return {
+            'rules': rules,
+            'scan_cpu_time': round(scan_time, 6),
+            'total_cpu_time': round(scan_time + float(stats[:, 2].sum()), 6),
+        }
+
+    def screen_with_profile(self, triples, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None, workers=1,
+                            sink=None):
+        """
+        分批筛选全部三元组，并统计每条规则的代价
+        :param triples: 三元组列表、列式存储（ColumnarTripleStore）或三元组迭代器
+        :param chunk_size: 每批的三元组数量
+        :param progress_callback: 每批完成后调用 callback(已筛选的三元组数量)
+        :param workers: 进程数，大于 1 时将三元组分块交给进程池并行筛选；
+                        列式存储只需按编号查表，始终在当前进程中筛选
+        :param sink: 每批完成后调用 sink(类别, 三元组列表) 写出该批命中的三元组，不在内存中保留；
+                     此时返回的类别 -> 三元组列表为 None
+        :return: (类别 -> 三元组列表, 类别 -> 数量, 规则统计)，三元组保持输入顺序；
+                 规则统计按当前执行顺序列出每条规则新归入类别的三元组数（hits）、判定的候选取值数（evaluated）
+                 和 CPU 秒数（cpu_time，多进程时为各进程之和），以及组合扫描的 CPU 秒数
+        """
+        if isinstance(triples, list) and len(triples) <= PARALLEL_MIN_CHUNK:
+            workers = 1
+        if workers > 1 and not hasattr(triples, 'entity_interner'):
+            if isinstance(triples, list):
+                # 每个进程至少分到几个分块，使各进程的负载均衡
+                chunk_size = max(PARALLEL_MIN_CHUNK, min(chunk_size, -(-len(triples) // (4 * workers))))
+            results = self._screen_parallel(triples, chunk_size, workers, progress_callback)
+        else:
+            results = self._screen_chunks(triples, chunk_size, progress_callback)
+
+        low_quality_triples = {category: [] for category in self.categories}
+        low_quality_counts = dict.fromkeys(self.categories, 0)
+        total_stats = np.zeros((len(self.rules), 3))
+        total_scan_time = 0.0
+        try:
+            for hits, stats, scan_time in results:
+                # 在任务线程中检查取消：并行筛选的进度回调运行在进程池的回调线程中，无法取消任务
+                check_cancelled()
+                for category, rows in hits.items():
+                    low_quality_counts[category] = low_quality_counts.get(category, 0) + len(rows)
+                    if sink is None:
+                        low_quality_triples.setdefault(category, []).extend(rows)
+                    elif rows:
+                        sink(category, rows)
+                total_stats += stats
+                total_scan_time += scan_time
+        finally:
+            results.close()
+        if sink is not None:
+            low_quality_triples = None
+        return low_quality_triples, low_quality_counts, self._profile(total_stats, total_scan_time)
+
+    def screen(self, triples, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None, workers=1):
+        """
+        分批筛选全部三元组，参数见 screen_with_profile()
+        :return: (类别 -> 三元组列表, 类别 -> 数量)，三元组保持输入顺序
+        """
+        low_quality_triples, low_quality_counts, _ = self.screen_with_profile(
+            triples, chunk_size, progress_callback, workers)
+        return low_quality_triples, low_quality_counts
@@ -9,6 +9,20 @@ class BaseConfig(object):
     # 上传最大文件
     MAX_CONTENT_LENGTH = 3 * 1024 * 1024
     FILE_LIMITS = ['txt']
+    # 知识图谱存储引擎：list 或 columnar
+    GRAPH_STORAGE = os.getenv('GRAPH_STORAGE', 'list')
+    # 知识图谱快照目录，多个进程共享同一份内存映射的快照；设为空字符串时每次都解析 CSV
+    GRAPH_SNAPSHOT_DIR = os.getenv('GRAPH_SNAPSHOT_DIR', os.path.join('Data', 'snapshot'))
+    # 加载知识图谱时去除完全重复的三元组，设为 0 时保留重复
+    GRAPH_DEDUP = os.getenv('GRAPH_DEDUP', '1') != '0'
+    # 低质量三元组筛选的进程数，1 表示不使用多进程
+    SCREENING_WORKERS = int(os.getenv('SCREENING_WORKERS', '1'))
+    # 同时运行的后台评测任务数
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+    # 一致性计算每个标签抽取的实体名数量，为空时对全部实体名精确计算
+    SIMILARITY_SAMPLE_SIZE = int(os.getenv('SIMILARITY_SAMPLE_SIZE') or 0) or None
+    # 分块上传时建议客户端每块的字节数，需小于 MAX_CONTENT_LENGTH
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
 
 class DevelopmentConfig(BaseConfig):
     MONGO_URI = "mongodb://localhost:27017/DataMap"
@@ -4,76 +4,249 @@
 该脚本用于计算知识图谱实体标签的一致性。具体功能包括：
 - 根据标签对实体进行分组
 - 使用预训练的Chinese-BERT模型计算实体名的向量表示
-- 计算标签组内实体名的一致性得分
+- 计算标签组内实体名的一致性得分（两两余弦相似度的均值），可对全部实体名精确计算，也可按标签分层抽样
 - 将一致性计算结果保存为JSON文件，并保存前10个结果和排序结果
+- 每个标签的结果追加写入检查点文件（Data/similarity/checkpoint.jsonl），中断后可续算
 
 主要函数和变量：
-- preprocess_name(): 预处理实体名
+- build_label_groups(): 根据标签对实体名分组
+- get_label_groups(): 获取全局知识图谱的标签分组
+- preprocess_name(): 预处理实体名（定义在 utils 中）
+- load_model(): 按需加载BERT模型和tokenizer
+- set_num_threads(): 设置CPU推理线程数
+- encode_names(): 批量计算实体名的向量（补齐、attention mask、inference_mode）
+- get_vector_cache(): 获取当前模型对应的词向量缓存（内存 LRU + 磁盘）
 - get_word_vector(): 获取词向量
+- get_word_vectors(): 批量获取词向量
+- prefetch_word_vectors(): 批量编码未缓存的词向量
+- unit_vector_sums(): 将向量归一化后求和
+- mean_pairwise_cosine(): 以 O(N·d) 计算两两余弦相似度的均值
+- consistency_score(): 分块计算一组实体名的一致性得分
+- sample_label_groups(): 对每个标签组抽样（或取全部）并预处理实体名
+- chunk_label_samples(): 合并多个标签组的实体名以便大批量编码
 - batch(): 分批处理函数
-- compute_and_save_consistency(): 计算一致性并保存结果
+- run_signature(): 计算一次一致性计算的签名
+- load_checkpoint(): 读取检查点中已完成的标签记录
+- compute_and_save_consistency(): 计算一致性并增量保存结果，中断后可从检查点续算
 - save_top_10_results(): 保存前10个一致性结果
 - save_sorted_results(): 保存排序后的一致性结果
 
 使用示例：
 ```python
 if __name__ == "__main__":
-    compute_and_save_consistency(label_groups)
+    compute_and_save_consistency(get_label_groups())
+
+导入本模块不会读取数据集或加载模型权重，二者都在首次使用时加载。
 """
 import random  # 用于随机抽样
+import hashlib  # 用于为每个标签生成稳定的随机种子
+import heapq  # 用于维护前10个结果
+import time  # 用于按时间间隔刷新结果
 import json  # 用于处理 JSON 数据
 from collections import defaultdict  # 用于创建默认字典
-from sklearn.metrics.pairwise import cosine_similarity  # 用于计算余弦相似度
 import numpy as np  # 用于数值计算
-import re  # 用于正则表达式处理
-from transformers import BertTokenizer, BertModel  # 用于加载BERT模型和tokenizer
-from data_preprocess import knowledge_graph  # 导入知识图谱模块
+import threading  # 用于保证模型只加载一次
+import data_preprocess  # 导入数据预处理模块
+from embedding_cache import EmbeddingCache, model_identity  # 用于持久化缓存词向量
+from jobs import check_cancelled  # 用于在任务被取消时停止计算
+from progress_registry import tracker  # 用于记录计算进度
 from tqdm import tqdm  # 用于显示进度条
+from utils import preprocess_name  # 用于预处理实体名
 import os  # 用于文件和目录操作
 
-# 测试数据
-entities = knowledge_graph.entities
 
 # 根据标签分组
-label_groups = defaultdict(list)
-for entity_id, entity in entities.items():
-    label_groups[entity['label']].append(entity['name'])
+def build_label_groups(entities):
+    """
+    根据标签对实体名分组
+    :param entities: 实体字典
+    :return: 标签到实体名列表的字典
+    """
+    label_groups = defaultdict(list)
+    for entity_id, entity in entities.items():
+        label_groups[entity['label']].append(entity['name'])
+    return label_groups
 
 
-# 预处理函数
-def preprocess_name(name):
+def get_label_groups():
     """
-    预处理实体名：移除特殊字符并转换为小写
-    :param name: 实体名
-    :return: 预处理后的实体名
+    获取全局知识图谱的标签分组，首次调用时加载数据
+    :return: 标签到实体名列表的字典
     """
-    name = re.sub(r'[^\w\s]', '', name)  # 移除特殊字符
-    name = name.lower()  # 转为小写
-    return name
+    return build_label_groups(data_preprocess.get_knowledge_graph().entities)
+
+
+# 预训练的Chinese-BERT模型路径（可通过环境变量 BERT_MODEL_PATH 覆盖），模型和tokenizer在首次使用时加载
+model_path = os.getenv('BERT_MODEL_PATH', r'G:\pythonProject\Knowledge Graph\webapp\bhlpro\bert-base-chinese')
+tokenizer = None
+model = None
+_model_lock = threading.Lock()
 
 
-# 加载预训练的Chinese-BERT模型和tokenizer
-model_path = r'G:\pythonProject\Knowledge Graph\webapp\bhlpro\bert-base-chinese'
-tokenizer = BertTokenizer.from_pretrained(model_path)
-model = BertModel.from_pretrained(model_path)
+def load_model():
+    """
+    加载预训练的Chinese-BERT模型和tokenizer，多次调用只加载一次
+    :return: (tokenizer, model)
+    """
+    global tokenizer, model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                from transformers import BertTokenizer, BertModel  # 导入较慢，仅在需要时导入
+                tokenizer = BertTokenizer.from_pretrained(model_path)
+                bert = BertModel.from_pretrained(model_path)
+                bert.eval()  # 推理模式，关闭 dropout
+                model = bert
+    return tokenizer, model
+
 
-# 获取词向量
-vector_cache = {}
+def set_num_threads(num_threads):
+    """
+    设置 CPU 推理使用的线程数
+    :param num_threads: 线程数，None 时使用环境变量 BERT_NUM_THREADS，仍未设置则保持 torch 默认值
+    """
+    if num_threads is None:
+        num_threads = os.getenv('BERT_NUM_THREADS')
+    if num_threads:
+        import torch
+        torch.set_num_threads(int(num_threads))
+
+
+def encode_names(names, batch_size=64, max_length=None):
+    """
+    批量计算实体名的[CLS]向量
+    按长度排序后分批，批内补齐到最长的名称并使用 attention mask，在 inference_mode 下推理
+    :param names: 实体名列表
+    :param batch_size: 每批次的名称数量
+    :param max_length: 最大 token 长度，超出部分截断；None 时使用模型支持的最大长度（bert-base-chinese 为 512），
+                       与逐个编码时的结果一致
+    :return: 形状为 (len(names), hidden_size) 的 float32 矩阵，行顺序与 names 一致
+    """
+    import torch
+    tokenizer, model = load_model()
+    vectors = np.empty((len(names), model.config.hidden_size), dtype=np.float32)
+    # 长度相近的名称放在同一批，减少补齐的 token
+    order = sorted(range(len(names)), key=lambda i: len(names[i]))
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            inputs = tokenizer([names[i] for i in rows], padding=True, truncation=True,
+                               max_length=max_length, return_tensors='pt')
+            outputs = model(**inputs)
+            vectors[rows] = outputs.last_hidden_state[:, 0, :].numpy()  # 获取[CLS] token的向量表示
+    return vectors
+
+
+# 词向量缓存：内存 LRU + 按模型标识划分的磁盘缓存，首次使用时打开
+embedding_cache_dir = os.getenv('EMBEDDING_CACHE_DIR', os.path.join('Data', 'embedding_cache'))
+embedding_cache_dtype = os.getenv('EMBEDDING_CACHE_DTYPE', 'float16')
+embedding_cache_bytes = int(os.getenv('EMBEDDING_CACHE_BYTES', 256 * 1024 * 1024))
+vector_cache = None
+_cache_lock = threading.Lock()
+
+
+def _hidden_size():
+    # 优先从 config.json 读取向量维度，命中缓存时无需加载模型权重
+    config_file = os.path.join(model_path, 'config.json')
+    if os.path.exists(config_file):
+        with open(config_file, 'r', encoding='utf-8') as f:
+            return json.load(f)['hidden_size']
+    return load_model()[1].config.hidden_size
+
+
+def get_vector_cache():
+    """
+    获取当前模型对应的词向量缓存
+    :return: EmbeddingCache 实例
+    """
+    global vector_cache
+    if vector_cache is None:
+        with _cache_lock:
+            if vector_cache is None:
+                vector_cache = EmbeddingCache.open(embedding_cache_dir, model_identity(model_path), _hidden_size(),
+                                                   embedding_cache_dtype, embedding_cache_bytes)
+    return vector_cache
 
 
 def get_word_vector(word):
     """
     获取词向量，如果词向量已缓存则直接返回缓存结果
     :param word: 单词
-    :return: 词向量
+    :return: 形状为 (1, hidden_size) 的词向量
+    """
+    return get_word_vectors([word])
+
+
+def prefetch_word_vectors(words, batch_size=64, chunk_size=8192):
+    """
+    批量编码未缓存的词并写入缓存，每次最多编码 chunk_size 个词，内存占用与词的总数无关
+    :param words: 单词可迭代对象
+    :param batch_size: 每批次的单词数量
+    :param chunk_size: 每次编码并写入缓存的单词数量
+    """
+    cache = get_vector_cache()
+    missing = [word for word in dict.fromkeys(words) if word not in cache]
+    for part in batch(missing, chunk_size):
+        cache.put_many(part, encode_names(part, batch_size))
+
+
+def get_word_vectors(words, batch_size=64):
+    """
+    批量获取词向量，未缓存的词去重后分批编码并写入缓存
+    :param words: 单词列表
+    :param batch_size: 每批次的单词数量
+    :return: 形状为 (len(words), hidden_size) 的矩阵
     """
-    if word in vector_cache:
-        return vector_cache[word]
-    inputs = tokenizer(word, return_tensors='pt')
-    outputs = model(**inputs)
-    cls_vector = outputs.last_hidden_state[:, 0, :].detach().numpy()  # 获取[CLS] token的向量表示
-    vector_cache[word] = cls_vector
-    return cls_vector
+    prefetch_word_vectors(words, batch_size)
+    cache = get_vector_cache()
+    return np.vstack([cache.get(word) for word in words])
+
+
+def unit_vector_sums(vectors):
+    """
+    将向量归一化后求和，结果可跨块累加
+    :param vectors: 形状为 (N, d) 的矩阵
+    :return: (单位向量之和, 单位向量模长平方之和)
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    # 零向量的余弦相似度按 0 处理，与 sklearn 的 cosine_similarity 一致
+    units = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    return units.sum(axis=0), float((units * units).sum())
+
+
+def _mean_from_sums(total, squared, n):
+    # 单位向量之和 s 满足 |s|^2 = 所有有序对的余弦之和 + 对角线之和，因此无需构建 N×N 矩阵
+    return float((total @ total - squared) / (n * (n - 1)))
+
+
+def mean_pairwise_cosine(vectors):
+    """
+    以 O(N·d) 计算两两余弦相似度的均值（不含自身），与对完整相似度矩阵去掉对角线后求均值的结果相同
+    :param vectors: 形状为 (N, d) 的矩阵，N 至少为 2
+    :return: 两两余弦相似度的均值
+    """
+    total, squared = unit_vector_sums(vectors)
+    return _mean_from_sums(total, squared, len(vectors))
+
+
+def consistency_score(names, batch_size=64, chunk_size=8192):
+    """
+    分块计算一组预处理后实体名的一致性得分，时间和内存都与名称数量成线性关系
+    :param names: 预处理后的实体名列表
+    :param batch_size: BERT 编码的批大小
+    :param chunk_size: 每次读取的向量数量
+    :return: 两两余弦相似度的均值，名称少于 2 个时返回 nan
+    """
+    if len(names) < 2:
+        return float('nan')
+    total = 0.0
+    squared = 0.0
+    for part in batch(names, chunk_size):
+        part_total, part_squared = unit_vector_sums(get_word_vectors(part, batch_size))
+        total = total + part_total
+        squared += part_squared
+    return _mean_from_sums(total, squared, len(names))
 
 
 # 分批处理
@@ -89,62 +262,209 @@ def batch(iterable, n=1):
         yield iterable[ndx:min(ndx + n, l)]
 
 
-# 计算一致性并逐批保存结果
-def compute_and_save_consistency(label_groups, batch_size=1, output_file='Data/similarity/all_consistency_results.json'):
+def _label_rng(seed, label):
+    # 每个标签使用独立的随机数生成器，抽样结果与标签的处理顺序无关
+    digest = hashlib.sha1(f'{seed}:{label}'.encode('utf-8')).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+def sample_label_groups(label_groups, sample_size=10, seed=0):
+    """
+    对每个标签组分层抽样（每个标签为一层）并预处理实体名
+    :param label_groups: 标签分组
+    :param sample_size: 每个标签最多抽取的实体名数量，None 表示使用全部实体名
+    :param seed: 随机种子，相同种子的抽样结果相同；None 表示不固定种子
+    :return: 生成 (标签, 抽样的实体名, 预处理后的实体名) ，不参与计算的标签其预处理结果为空列表
+    """
+    for label, names in label_groups.items():
+        preprocessed_names = []
+        if len(names) > 1:
+            if sample_size is not None and len(names) > sample_size:
+                rng = random if seed is None else _label_rng(seed, label)
+                names = rng.sample(names, sample_size)
+            preprocessed_names = [preprocess_name(name) for name in names if name.strip()]
+            preprocessed_names = [name for name in preprocessed_names if name]
+        yield label, names, preprocessed_names
+
+
+def chunk_label_samples(samples, max_names):
+    """
+    将多个标签组的抽样结果合并为一块，使每块的实体名数量达到 max_names，便于跨标签组大批量编码
+    :param samples: sample_label_groups 的结果
+    :param max_names: 每块的实体名数量
+    :return: 生成抽样结果列表
+    """
+    chunk = []
+    chunk_names = 0
+    for sample in samples:
+        chunk.append(sample)
+        chunk_names += len(sample[2])
+        if chunk_names >= max_names:
+            yield chunk
+            chunk = []
+            chunk_names = 0
+    if chunk:
+        yield chunk
+
+
+# 结果中每个标签保存的实体名数量（用于页面展示）
+MAX_RESULT_NAMES = 10
+# 运行期间刷新前10个结果的最短间隔（秒）
+FLUSH_INTERVAL = 5.0
+
+
+def run_signature(label_groups, sample_size, seed):
+    """
+    计算一次一致性计算的签名，只有签名相同的检查点才能用于续算；
+    签名包含每个标签下的全部实体名，数据集变化后即使各组大小不变也不会沿用旧的检查点
+    :param label_groups: 标签分组
+    :param sample_size: 每个标签抽取的实体名数量
+    :param seed: 抽样的随机种子
+    :return: 签名字典
+    """
+    digest = hashlib.sha1()
+    for label, names in label_groups.items():
+        digest.update(f'{label}\t{len(names)}\n'.encode('utf-8'))
+        for name in names:
+            digest.update(name.encode('utf-8'))
+            digest.update(b'\x1f')
+    return {'model': model_identity(model_path), 'sample_size': sample_size, 'seed': seed,
+            'groups': digest.hexdigest()}
+
+
+def load_checkpoint(checkpoint_file, signature):
+    """
+    读取检查点中已完成的标签记录
+    检查点第一行为签名，之后每行一条标签记录；签名不一致时视为没有检查点，
+    末尾因中断而不完整的记录会被丢弃，文件随之重写
+    :param checkpoint_file: 检查点文件路径
+    :param signature: 本次计算的签名
+    :return: 按完成顺序排列的 {标签: 记录} 字典
+    """
+    records = {}
+    if not os.path.exists(checkpoint_file):
+        return records
+    complete = True
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        header = f.readline()
+        try:
+            if json.loads(header).get('signature') != signature:
+                return records
+        except ValueError:
+            return records
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                complete = False
+                break
+            records[record['label']] = record
+    if not complete:
+        with open(checkpoint_file, 'w', encoding='utf-8') as f:
+            f.write(header)
+            for record in records.values():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return records
+
+
+def _top_k(heap, k, record, sequence):
+    # 小顶堆只保留得分最高的 k 个结果，得分相同时保留先完成的
+    item = (record['consistency_score'], -sequence, record['label'], record['names'])
+    if len(heap) < k:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def _save_heap_top(heap):
+    top_results = {label: {"consistency_score": score, "names": names}
+                   for score, _, label, names in sorted(heap, reverse=True)}
+    with open('Data/similarity/top_10_results.json', 'w', encoding='utf-8') as f:
+        json.dump(top_results, f, ensure_ascii=False, indent=4)
+
+
+# 计算一致性并增量保存结果
+def compute_and_save_consistency(label_groups, batch_size=1, output_file='Data/similarity/all_consistency_results.json',
+                                 encode_batch_size=64, num_threads=None, sample_size=None, seed=0, resume=True):
     """
-    计算一致性并逐批保存结果
+    计算一致性并增量保存结果
+    所有标签组的抽样实体名合并后按 encode_batch_size 大批量编码，而不是逐个名称调用模型。
+    每个标签的结果追加写入检查点文件，运行期间按时间间隔用小顶堆刷新前10个结果，
+    完整的结果文件和排序结果只在结束时生成一次；中断后再次运行会从检查点续算
     :param label_groups: 标签分组
-    :param batch_size: 每批次处理大小
+    :param batch_size: 每处理多少个标签组将检查点写入磁盘
     :param output_file: 输出文件路径
+    :param encode_batch_size: BERT 编码的批大小
+    :param num_threads: CPU 推理线程数
+    :param sample_size: 每个标签抽取的实体名数量，None（默认）表示对全部实体名精确计算
+    :param seed: 抽样的随机种子，只在指定 sample_size 时使用
+    :param resume: 是否从检查点续算
     """
-    # 创建进度文件夹
-    progress_directory = 'Data/similarity/'
-    if not os.path.exists(progress_directory):
-        os.makedirs(progress_directory)
+    set_num_threads(num_threads)
+    # 创建检查点文件夹
+    checkpoint_directory = 'Data/similarity/'
+    if not os.path.exists(checkpoint_directory):
+        os.makedirs(checkpoint_directory)
+    checkpoint_file = os.path.join(checkpoint_directory, 'checkpoint.jsonl')
+
+    signature = run_signature(label_groups, sample_size, seed)
+    done = load_checkpoint(checkpoint_file, signature) if resume else {}
+    if not done:
+        with open(checkpoint_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'signature': signature}, ensure_ascii=False) + '\n')
 
     all_results = {}
-    batch_counter = 0
+    heap = []
+    for label, record in done.items():
+        if 'consistency_score' in record:
+            all_results[label] = {"consistency_score": record['consistency_score'], "names": record['names']}
+            _top_k(heap, 10, record, len(all_results))
+    batch_counter = len(done)
     total_batches = len(label_groups)
+    pending = {label: names for label, names in label_groups.items() if label not in done}
+    # 进度只记录在内存中，从检查点恢复的标签不计入吞吐量
+    progress = tracker('similarity')
+    progress.start(total_batches, unit='labels', initial=batch_counter)
+    last_flush = time.monotonic()
 
-    with tqdm(total=total_batches, desc="Processing", unit="batch") as pbar:
-        for label, names in label_groups.items():
-            if len(names) > 1:
-                if len(names) > 10:
-                    names = random.sample(names, 10)
-                preprocessed_names = [preprocess_name(name) for name in names if name.strip()]
-                preprocessed_names = [name for name in preprocessed_names if name]
+    with tqdm(total=total_batches, initial=batch_counter, desc="Processing", unit="batch") as pbar, \
+            open(checkpoint_file, 'a', encoding='utf-8') as checkpoint:
+        samples = sample_label_groups(pending, sample_size, seed)
+        for chunk in chunk_label_samples(samples, encode_batch_size * 8):
+            # 一次编码整块中所有未缓存的实体名
+            prefetch_word_vectors((name for _, _, preprocessed_names in chunk for name in preprocessed_names),
+                                  encode_batch_size)
+            for label, names, preprocessed_names in chunk:
+                record = {'label': label}
                 if preprocessed_names:
-                    vectors = []
-                    for name_batch in batch(preprocessed_names, batch_size):
-                        batch_vectors = [get_word_vector(name) for name in name_batch]
-                        vectors.extend(batch_vectors)
-                    if vectors:
-                        vectors = np.vstack(vectors)
-                        similarities = cosine_similarity(vectors)
-                        np.fill_diagonal(similarities, 0)
-                        avg_similarity = similarities.sum() / (len(preprocessed_names) * (len(preprocessed_names) - 1))
-                        if avg_similarity > 0:
-                            all_results[label] = {
-                                "consistency_score": avg_similarity,
-                                "names": names
-                            }
-            batch_counter += 1
-            pbar.update(1)
-            # 保存进度到文件
-            with open(os.path.join(progress_directory, 'progress.json'), 'w', encoding='utf-8') as f:
-                json.dump({"progress": batch_counter / total_batches * 100}, f)
-            if batch_counter % batch_size == 0:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(all_results, f, ensure_ascii=False, indent=4)
-                save_top_10_results(all_results)
-                save_sorted_results(all_results)
-                print(f"Results up to batch {batch_counter} saved to {output_file}")
-
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, ensure_ascii=False, indent=4)
-        save_top_10_results(all_results)
-        save_sorted_results(all_results)
-        print(f"All results saved to {output_file}")
+                    avg_similarity = consistency_score(preprocessed_names, encode_batch_size)
+                    if avg_similarity > 0:
+                        record['consistency_score'] = avg_similarity
+                        record['names'] = names[:MAX_RESULT_NAMES]
+                        all_results[label] = {"consistency_score": avg_similarity, "names": record['names']}
+                        _top_k(heap, 10, record, len(all_results))
+                checkpoint.write(json.dumps(record, ensure_ascii=False) + '\n')
+                batch_counter += 1
+                pbar.update(1)
+                progress.advance()
+                # 已完成的标签都在检查点中，取消后再次运行会从这里续算
+                check_cancelled()
+                if batch_counter % batch_size == 0:
+                    checkpoint.flush()
+                now = time.monotonic()
+                if now - last_flush >= FLUSH_INTERVAL:
+                    checkpoint.flush()
+                    _save_heap_top(heap)
+                    last_flush = now
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(all_results, f, ensure_ascii=False, indent=4)
+    save_top_10_results(all_results)
+    save_sorted_results(all_results)
+    progress.finish()
+    # 全部完成后删除检查点，下次运行重新计算
+    os.remove(checkpoint_file)
+    print(f"All results saved to {output_file}")
 
 
 def save_top_10_results(all_results):
@@ -167,4 +487,4 @@ def save_sorted_results(all_results):
         json.dump(sorted_results, f, ensure_ascii=False, indent=4)
 
 if __name__ == "__main__":
-    compute_and_save_consistency(label_groups)
+    compute_and_save_consistency(get_label_groups())
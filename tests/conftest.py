@@ -0,0 +1,8 @@
+"""
+测试配置：模块都在仓库根目录下，测试前把根目录加入导入路径
+"""
+
+import os  # 用于获取仓库根目录
+import sys  # 用于修改导入路径
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
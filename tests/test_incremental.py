@@ -0,0 +1,244 @@
+"""
+增量更新与完整重算的一致性测试
+
+在很小的数据上分别用增量方式和从头计算的方式得到结果，两者必须相同，列表存储和列式存储都要覆盖：
+- 添加实体和三元组后增量更新的统计结果、度数和连通分量
+- 追加上传接口更新的知识图谱、去重报告和低质量三元组数量
+- 去重和快照的保存、加载
+- 分块上传的逐块校验、转换和续传
+"""
+
+import csv  # 用于写测试数据
+import hashlib  # 用于核对上传内容的哈希
+import io  # 用于构造上传的文件
+import json  # 用于读取快照清单
+import os  # 用于文件和目录操作
+import numpy as np  # 用于构造哈希冲突
+import pytest  # 测试框架
+import data_preprocess  # 知识图谱和全局注册表
+import duplicate_detection  # 重复三元组检测
+import quality_screening  # 低质量三元组筛选
+from chunked_upload import UploadManager, UploadOffsetError  # 分块上传
+from csv_stream import ENTITY_COLUMNS, TRIPLET_COLUMNS, iter_triplet_chunks  # CSV 列名和读取
+from data_preprocess import GraphRegistry, KnowledgeGraph  # 知识图谱
+from graph_snapshot import load_snapshot  # 快照加载
+
+STORAGES = ['list', 'columnar']
+
+BASE_ENTITIES = [('e1', '甲', '人物'), ('e2', '乙', '人物'), ('e3', '丙', '地点'), ('e4', '丁', '机构'),
+                 ('e5', '甲', '地点')]
+BASE_TRIPLES = [('甲', '出生于', '丙'), ('乙', '就职于', '丁'), ('甲', '认识', '乙'), ('甲', '出生于', '丙'),
+                ('丙', '位于', '戊'), ('己', '认识', '庚')]
+NEW_ENTITIES = [('e2', '乙二', '人物'), ('e6', '戊', '地点'), ('e7', '辛', '人物')]
+NEW_TRIPLES = [('辛', '认识', '甲'), ('甲', '出生于', '丙'), ('乙二', '就职于', '丁'), ('辛', '认识', '甲'),
+               ('庚', '位于', '戊'), ('x', '关系（', '很长的尾实体' * 10)]
+
+
+def summarize(graph):
+    """
+    :param graph: KnowledgeGraph 实例
+    :return: 可以直接比较的统计结果
+    """
+    degrees = graph.degree_counter()
+    # 计数相同的实体、关系在 Top N 中的先后次序允许与重新计算时不同，按 (计数, 名称) 排序后比较
+    def by_count(items):
+        return sorted(items, key=lambda item: (-item[1], item[0]))
+    return {
+        'entities': graph.calculate_entity_count(),
+        'triplets': graph.calculate_triplet_count(),
+        'relationship_types': graph.calculate_relationship_type_count(),
+        'labels': dict(graph.calculate_entity_label_counts()),
+        'top_entities': by_count(graph.top_entities(100)),
+        'top_relationships': by_count(graph.top_relationships(15)),
+        'degree_count': graph.calculate_degree_count(),
+        'degrees': {kind: degrees.histogram(kind) for kind in ('out', 'in', 'total')},
+        'components': graph.connected_components().component_sizes(),
+        'component_count': graph.calculate_connected_components(),
+    }
+
+
+def write_csv(path, columns, rows):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def csv_bytes(columns, rows):
+    output = io.StringIO(newline='')
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return output.getvalue().encode('utf-8')
+
+
+def build_graph(storage, warm):
+    # warm 为 True 时先计算并缓存统计结果，之后的修改按增量更新
+    graph = KnowledgeGraph(storage=storage)
+    for entity in BASE_ENTITIES:
+        graph.add_entity(*entity)
+    graph.add_triplets(BASE_TRIPLES)
+    if warm:
+        summarize(graph)
+    for entity in NEW_ENTITIES:
+        graph.add_entity(*entity)
+    graph.add_triplets(NEW_TRIPLES[:3])
+    graph.add_triplet(*NEW_TRIPLES[3])
+    graph.add_triplets(NEW_TRIPLES[4:])
+    return graph
+
+
+@pytest.mark.parametrize('storage', STORAGES)
+def test_incremental_statistics_match_recompute(storage):
+    incremental = build_graph(storage, warm=True)
+    # 所有缓存结果都已按增量更新到当前版本，不会在比较时重新计算
+    assert incremental._cache and all(version == incremental._version for version, _ in incremental._cache.values())
+    assert summarize(incremental) == summarize(build_graph(storage, warm=False))
+
+
+@pytest.mark.parametrize('storage', STORAGES)
+def test_add_unique_triplets_matches_deduplicated_load(storage):
+    graph = KnowledgeGraph(storage=storage)
+    graph.add_triplets(BASE_TRIPLES)
+    graph.deduplicate()
+    summarize(graph)
+    added = graph.add_unique_triplets(NEW_TRIPLES)
+
+    expected = KnowledgeGraph(storage=storage)
+    expected.add_triplets(BASE_TRIPLES + NEW_TRIPLES)
+    expected.deduplicate()
+    assert added == [triple for triple in dict.fromkeys(NEW_TRIPLES) if triple not in BASE_TRIPLES]
+    assert list(graph.relationships) == list(expected.relationships)
+    assert graph.duplicate_report == expected.duplicate_report
+    assert summarize(graph) == summarize(expected)
+
+
+@pytest.mark.parametrize('storage', STORAGES)
+def test_append_uploads_match_reload(storage, tmp_path, monkeypatch):
+    from init import create_app
+
+    monkeypatch.chdir(tmp_path)
+    write_csv(data_preprocess.ENTITIES_FILE, ENTITY_COLUMNS, BASE_ENTITIES)
+    write_csv(data_preprocess.TRIPLES_FILE, TRIPLET_COLUMNS, BASE_TRIPLES)
+    client = create_app().test_client()
+    registry = data_preprocess.graph_registry
+    monkeypatch.setattr(registry, 'storage', storage)
+    monkeypatch.setattr(registry, 'snapshot_dir', os.path.join('Data', 'snapshot'))
+    monkeypatch.setattr(registry, 'dedup', True)
+    monkeypatch.setattr(registry, '_graph', None)
+    monkeypatch.setattr(quality_screening, 'workers', 1)
+
+    graph = registry.get()
+    summarize(graph)
+    quality_screening.main()
+    response = client.post('/uploading/entities?mode=append',
+                           data={'file': (io.BytesIO(csv_bytes(ENTITY_COLUMNS, NEW_ENTITIES)), 'entities.csv')})
+    assert response.status_code == 200
+    response = client.post('/uploading/triples?mode=append',
+                           data={'file': (io.BytesIO(csv_bytes(TRIPLET_COLUMNS, NEW_TRIPLES)), 'triples.csv')})
+    assert response.status_code == 200
+    body = response.get_json()
+
+    fresh = GraphRegistry(storage=storage, dedup=True).get()
+    assert registry.get() is graph
+    assert list(graph.relationships) == list(fresh.relationships)
+    assert dict(graph.entities.items()) == dict(fresh.entities.items())
+    assert graph.duplicate_report == fresh.duplicate_report
+    assert summarize(graph) == summarize(fresh)
+    assert body['appended'] == len(fresh.relationships) - len(set(BASE_TRIPLES))
+    # 只筛选新增三元组得到的数量与重新加载后完整筛选的数量相同
+    registry.reload()
+    assert body['low_quality_counts'] == quality_screening.main()
+
+
+@pytest.mark.parametrize('storage', STORAGES)
+def test_dedup_snapshot_round_trip(storage, tmp_path, monkeypatch):
+    entities_file, triples_file = str(tmp_path / 'entities.csv'), str(tmp_path / 'triples.csv')
+    snapshot_dir = str(tmp_path / 'snapshot')
+    write_csv(entities_file, ENTITY_COLUMNS, BASE_ENTITIES)
+    write_csv(triples_file, TRIPLET_COLUMNS, BASE_TRIPLES + NEW_TRIPLES)
+
+    parsed = GraphRegistry(entities_file, triples_file, storage, snapshot_dir, dedup=True).get()
+    assert list(parsed.relationships) == list(dict.fromkeys(BASE_TRIPLES + NEW_TRIPLES))
+    assert parsed.duplicate_report['duplicates'] == len(BASE_TRIPLES + NEW_TRIPLES) - len(parsed.relationships)
+
+    # 第二个进程直接映射快照，不再解析 CSV 文件
+    def fail(*args, **kwargs):
+        raise AssertionError('CSV files parsed although the snapshot is current')
+    with monkeypatch.context() as patch:
+        patch.setattr(KnowledgeGraph, 'load_triplets', fail)
+        loaded = GraphRegistry(entities_file, triples_file, storage, snapshot_dir, dedup=True).get()
+    assert list(loaded.relationships) == list(parsed.relationships)
+    assert dict(loaded.entities.items()) == dict(parsed.entities.items())
+    assert dict(loaded.name_to_ids) == dict(parsed.name_to_ids)
+    assert loaded.name_to_label == parsed.name_to_label
+    assert loaded.duplicate_report == parsed.duplicate_report
+    assert summarize(loaded) == summarize(parsed)
+
+    # 去重设置不同时快照过期；快照文件缺失时重新解析 CSV 文件
+    assert len(GraphRegistry(entities_file, triples_file, storage, snapshot_dir).get().relationships) == \
+        len(BASE_TRIPLES + NEW_TRIPLES)
+    with open(os.path.join(snapshot_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+        os.remove(os.path.join(snapshot_dir, json.load(f)['files']['heads']))
+    reparsed = GraphRegistry(entities_file, triples_file, storage, snapshot_dir, dedup=True).get()
+    assert list(reparsed.relationships) == list(parsed.relationships)
+    assert list(load_snapshot(snapshot_dir, storage).relationships) == list(parsed.relationships)
+
+
+def test_deduplicate_keeps_colliding_triples(monkeypatch):
+    # 所有三元组的哈希都相同时，只删除真正相同的三元组
+    monkeypatch.setattr(duplicate_detection, 'triple_hashes',
+                        lambda triples, engine='auto': np.zeros(len(triples), dtype=np.uint64))
+    graph = KnowledgeGraph()
+    graph.add_triplets(BASE_TRIPLES + NEW_TRIPLES)
+    report = graph.deduplicate()
+    assert graph.relationships == list(dict.fromkeys(BASE_TRIPLES + NEW_TRIPLES))
+    assert report['unique'] == len(graph.relationships)
+    assert report['duplicates'] == len(BASE_TRIPLES + NEW_TRIPLES) - len(graph.relationships)
+
+
+UPLOAD_ROWS = [('甲', '出生于', '丙'), ('带,逗号', '关系', '带"引号"的\n多行尾实体'), ('', '空', ''),
+               ('乙', '就职于', '丁')] * 50
+
+
+def test_chunked_upload_matches_whole_file(tmp_path):
+    # 文件中还有一列多余的列，分块边界落在引号内的换行和多字节字符中间
+    content = '﻿' + 'extra,头实体,关系,尾实体\r\n' + ''.join(
+        f'{i},"{h}","{r.replace(chr(34), chr(34) * 2)}","{t.replace(chr(34), chr(34) * 2)}"\r\n'
+        for i, (h, r, t) in enumerate(UPLOAD_ROWS))
+    data = content.encode('utf-8')
+    manager = UploadManager(str(tmp_path / 'uploads'))
+    session = manager.create('triples', size=len(data), convert=True)
+    offset = 0
+    for size in (1, 2, 7, 13, 100):
+        offset = session.write(offset, io.BytesIO(data[offset:offset + size]))
+    with pytest.raises(UploadOffsetError) as error:
+        session.write(0, io.BytesIO(data[:10]))
+    assert error.value.offset == offset
+
+    # 服务重启后从已接收的文件恢复状态并续传
+    session.close()
+    session = UploadManager(str(tmp_path / 'uploads')).get(session.id)
+    assert session.offset == offset
+    while offset < len(data):
+        offset = session.write(offset, io.BytesIO(data[offset:offset + 997]))
+    path = session.complete(hashlib.sha256(data).hexdigest())
+
+    assert session.rows == len(UPLOAD_ROWS)
+    assert session.sha256 == hashlib.sha256(data).hexdigest()
+    assert [triple for chunk in iter_triplet_chunks(path) for triple in chunk] == UPLOAD_ROWS
+
+
+def test_chunked_upload_rejects_invalid_rows(tmp_path):
+    manager = UploadManager(str(tmp_path / 'uploads'))
+    session = manager.create('triples')
+    session.write(0, io.BytesIO('头实体,关系,尾实体\n甲,关系,乙\n'.encode('utf-8')))
+    with pytest.raises(ValueError):
+        session.write(session.offset, io.BytesIO('甲,关系,乙,多余\n'.encode('utf-8')))
+    with pytest.raises(ValueError):
+        session.complete()
+
+    session = manager.create('triples')
+    with pytest.raises(ValueError):
+        session.write(0, io.BytesIO('a,b,c\n1,2,3\n'.encode('utf-8')))
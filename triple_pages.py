@@ -0,0 +1,219 @@
+"""
+分页三元组存储模块
+
+该模块将按类别划分的三元组（如低质量三元组）写入可分页读取的磁盘存储，读取任意一页的耗时与三元组总数无关。具体功能包括：
+- 每个类别的三元组写入一个 JSON Lines 文件，每行一个 [头实体, 关系, 尾实体]
+- 每个类别另有一个二进制偏移索引文件，按 8 字节无符号整数依次保存每一行在数据文件中的起始位置
+- manifest.json 记录类别顺序、每个类别的数量和文件名，最后写入，读取时以其为准
+- 写入过程中使用临时文件，全部完成后再替换，重新筛选时不会读到写了一半的结果
+- 追加模式直接在已有文件末尾写入，完成后再更新 manifest.json；读取只使用清单中记录的数量，不会读到追加了一半的结果
+- manifest.json 中可以保存额外的元数据，如筛选时的三元组数量
+
+主要类和方法：
+- PagedTripleWriter 类：按类别流式追加三元组
+  - add(category, triples): 追加一批三元组
+  - close(): 写入 manifest.json 并替换旧文件
+- PagedTripleReader 类：分页读取，metadata 为清单中的额外元数据
+  - counts(): 各类别的数量
+  - page(category, offset, limit): 读取某个类别的一页三元组
+  - page_all(offset, limit): 按类别顺序将全部类别视为一个序列读取一页
+- MANIFEST_FILE: 清单文件名
+
+使用示例：
+```python
+with PagedTripleWriter('Data/low_quality_triples', categories) as writer:
+    writer.add('低质量关系', [('清明前后', '导演1', '赵丹')])
+reader = PagedTripleReader('Data/low_quality_triples')
+rows = reader.page('低质量关系', offset=0, limit=10)
+"""
+
+import json  # 用于序列化三元组和清单
+import os  # 用于文件替换和路径拼接
+from array import array  # 用于读写二进制偏移索引
+
+MANIFEST_FILE = 'manifest.json'
+_OFFSET_TYPECODE = 'Q'
+_OFFSET_SIZE = array(_OFFSET_TYPECODE).itemsize
+
+
+class PagedTripleWriter:
+    def __init__(self, directory, categories=(), metadata=None, append=False):
+        """
+        :param directory: 输出目录
+        :param categories: 类别的输出顺序，未列出的类别按首次出现的顺序排在后面
+        :param metadata: 写入 manifest.json 的额外元数据
+        :param append: 为 True 时在已有的结果后追加，已有类别保持原来的顺序
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.metadata = dict(metadata or {})
+        self.append = append
+        self._categories = {}
+        self._closed = False
+        if append:
+            with open(self._path(MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                for entry in json.load(f)['categories']:
+                    self._open(entry['name'], entry)
+        for category in categories:
+            if category not in self._categories:
+                self._open(category)
+
+    def _open(self, category, entry=None):
+        if entry is None:
+            index = len(self._categories)
+            entry = {
+                'name': category,
+                'count': 0,
+                'size': 0,
+                'data': f'category_{index}.jsonl',
+                'index': f'category_{index}.idx',
+            }
+        if self.append:
+            # 丢弃上一次追加中断时可能残留在清单记录之外的内容
+            entry.setdefault('size', os.path.getsize(self._path(entry['data'])))
+            entry['data_file'] = self._open_append(entry['data'], entry['size'])
+            entry['index_file'] = self._open_append(entry['index'], entry['count'] * _OFFSET_SIZE)
+        else:
+            entry['data_file'] = open(self._path(entry['data']) + '.tmp', 'wb')
+            entry['index_file'] = open(self._path(entry['index']) + '.tmp', 'wb')
+        self._categories[category] = entry
+        return entry
+
+    def _open_append(self, name, size):
+        f = open(self._path(name), 'ab')
+        f.truncate(size)
+        f.seek(size)
+        return f
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def add(self, category, triples):
+        """
+        追加一批三元组
+        :param category: 类别
+        :param triples: (头实体, 关系, 尾实体) 序列
+        """
+        entry = self._categories.get(category) or self._open(category)
+        data_file = entry['data_file']
+        position = data_file.tell()
+        offsets = array(_OFFSET_TYPECODE)
+        lines = []
+        for triple in triples:
+            line = (json.dumps(list(triple), ensure_ascii=False) + '\n').encode('utf-8')
+            offsets.append(position)
+            position += len(line)
+            lines.append(line)
+        data_file.write(b''.join(lines))
+        offsets.tofile(entry['index_file'])
+        entry['count'] += len(offsets)
+        entry['size'] = position
+
+    def close(self):
+        """
+        关闭文件，替换旧的结果并写入 manifest.json
+        :return: 各类别的数量
+        """
+        if self._closed:
+            return self.counts()
+        self._closed = True
+        for entry in self._categories.values():
+            entry.pop('data_file').close()
+            entry.pop('index_file').close()
+            if not self.append:
+                for name in (entry['data'], entry['index']):
+                    os.replace(self._path(name) + '.tmp', self._path(name))
+        manifest_path = self._path(MANIFEST_FILE)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({**self.metadata, 'categories': list(self._categories.values())}, f,
+                      ensure_ascii=False, indent=4)
+        os.replace(manifest_path + '.tmp', manifest_path)
+        return self.counts()
+
+    def abort(self):
+        """
+        放弃本次写入，删除临时文件（追加模式下不更新清单），保留旧的结果
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for entry in self._categories.values():
+            for key, name in (('data_file', entry['data']), ('index_file', entry['index'])):
+                entry.pop(key).close()
+                if not self.append:
+                    os.remove(self._path(name) + '.tmp')
+
+    def counts(self):
+        return {category: entry['count'] for category, entry in self._categories.items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PagedTripleReader:
+    def __init__(self, directory):
+        """
+        :param directory: PagedTripleWriter 的输出目录
+        """
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self._categories = {entry['name']: entry for entry in manifest.pop('categories')}
+        self.metadata = manifest
+
+    def counts(self):
+        """
+        :return: 类别 -> 数量，按类别顺序
+        """
+        return {category: entry['count'] for category, entry in self._categories.items()}
+
+    def page(self, category, offset=0, limit=100):
+        """
+        读取某个类别的一页三元组：先在偏移索引中定位第 offset 行，再从数据文件中顺序读取 limit 行
+        :param category: 类别
+        :param offset: 起始序号（从 0 开始）
+        :param limit: 最多读取的数量
+        :return: [头实体, 关系, 尾实体] 列表
+        """
+        entry = self._categories.get(category)
+        if entry is None:
+            raise KeyError(category)
+        limit = min(limit, entry['count'] - offset)
+        if offset < 0 or limit <= 0:
+            return []
+        with open(os.path.join(self.directory, entry['index']), 'rb') as f:
+            f.seek(offset * _OFFSET_SIZE)
+            start = array(_OFFSET_TYPECODE)
+            start.fromfile(f, 1)
+        rows = []
+        with open(os.path.join(self.directory, entry['data']), 'rb') as f:
+            f.seek(start[0])
+            for _ in range(limit):
+                rows.append(json.loads(f.readline()))
+        return rows
+
+    def page_all(self, offset=0, limit=100):
+        """
+        按类别顺序将全部类别视为一个序列，读取其中的一页
+        :param offset: 起始序号（从 0 开始）
+        :param limit: 最多读取的数量
+        :return: (类别, [头实体, 关系, 尾实体]) 列表
+        """
+        rows = []
+        for category, entry in self._categories.items():
+            if limit <= 0:
+                break
+            if offset >= entry['count']:
+                offset -= entry['count']
+                continue
+            page = self.page(category, offset, limit)
+            rows.extend((category, triple) for triple in page)
+            limit -= len(page)
+            offset = 0
+        return rows
@@ -0,0 +1,412 @@
+"""
+列式三元组存储模块
+
+该模块为 KnowledgeGraph 提供一种可选的列式存储引擎。具体功能包括：
+- 将实体、关系、标签等字符串驻留为整数编号
+- 使用 NumPy int32 列（头实体、关系、尾实体）保存三元组
+- 使用编号数组保存实体的名称和标签
+- 基于 bincount 计算各类计数，避免构建临时列表
+- 驻留表和编号列可以直接使用内存映射的数组（见 graph_snapshot），字符串在读取时才解码
+
+主要类和方法：
+- StringInterner 类：字符串与整数编号之间的双向映射
+- MappedStrings 类：utf-8 字节数组和偏移数组表示的只读字符串表，可继续追加字符串
+- MappedStringInterner 类：以 MappedStrings 为字符串表的驻留表，字符串到编号的字典在第一次查询时才建立
+- ColumnarTripleStore 类：以三列整数数组保存三元组，对外表现为 (头实体, 关系, 尾实体) 元组序列
+  - entity_counter(): 统计实体出现次数
+  - relationship_counter(): 统计关系出现次数
+  - from_arrays(entity_interner, relation_interner, heads, relations, tails): 由已有的编号数组建立
+  - select(mask): 按布尔数组选出部分三元组，共用驻留表
+- ColumnarEntityStore 类：以编号数组保存实体，对外表现为 {实体标识: {'name', 'label'}} 映射
+  - label_counter(): 统计每个标签的实体数量
+  - from_arrays(id_interner, name_interner, label_interner, names, labels): 由已有的编号数组建立
+
+使用示例：
+```python
+names = StringInterner()
+triples = ColumnarTripleStore(names)
+triples.append(('清明前后', '导演', '赵丹'))
+top = triples.entity_counter().most_common(10)
+"""
+
+from collections import Counter  # 用于返回与原实现一致的计数器
+from collections.abc import Mapping, Sequence  # 用于提供与 dict / list 兼容的接口
+import numpy as np  # 用于整数列存储和向量化计数
+
+_INITIAL_CAPACITY = 1024
+_ITER_CHUNK = 65536
+
+
+class StringInterner:
+    """
+    字符串驻留表：相同的字符串只保存一份，并分配从 0 开始的连续编号
+    """
+
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def intern(self, s):
+        """
+        获取字符串的编号，不存在时分配新编号
+
+        :param s: 字符串
+        :return: 整数编号
+        """
+        idx = self.ids.get(s)
+        if idx is None:
+            idx = len(self.strings)
+            self.ids[s] = idx
+            self.strings.append(s)
+        return idx
+
+    def lookup(self, s):
+        """
+        查询字符串的编号
+
+        :param s: 字符串
+        :return: 整数编号，不存在时返回 None
+        """
+        return self.ids.get(s)
+
+    def __getitem__(self, idx):
+        return self.strings[idx]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class MappedStrings(Sequence):
+    """
+    只读字符串表：第 i 个字符串为 data[offsets[i]:offsets[i + 1]] 的 utf-8 解码结果，读取时才解码；
+    追加的字符串保存在列表中，不修改底层数组
+    """
+
+    def __init__(self, data, offsets):
+        """
+        :param data: 所有字符串的 utf-8 字节拼接成的 uint8 数组
+        :param offsets: 长度为字符串数量 + 1 的 int64 偏移数组
+        """
+        self._buffer = memoryview(data)
+        self._offsets = offsets
+        self._size = len(offsets) - 1
+        self._appended = []
+
+    def append(self, s):
+        self._appended.append(s)
+
+    def __len__(self):
+        return self._size + len(self._appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if 0 <= index < self._size:
+            return str(self._buffer[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+        if index < 0:
+            raise IndexError('string index out of range')
+        return self._appended[index - self._size]
+
+    def __iter__(self):
+        # 按块解码：每块只做一次数组切片和偏移转换
+        for start in range(0, self._size, _ITER_CHUNK):
+            stop = min(start + _ITER_CHUNK, self._size)
+            offsets = self._offsets[start:stop + 1].tolist()
+            base = offsets[0]
+            block = bytes(self._buffer[base:offsets[-1]])
+            for i in range(stop - start):
+                yield str(block[offsets[i] - base:offsets[i + 1] - base], 'utf-8')
+        yield from self._appended
+
+
+class MappedStringInterner(StringInterner):
+    """
+    以 MappedStrings 为字符串表的驻留表，只按编号读取时不需要建立字符串到编号的字典
+    """
+
+    def __init__(self, strings):
+        """
+        :param strings: MappedStrings 实例
+        """
+        self.strings = strings
+        self._ids = None
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = dict(zip(self.strings, range(len(self.strings))))
+        return self._ids
+
+
+class _IntColumn:
+    """
+    可增长的 int32 列，容量按倍数扩展，保证追加的均摊复杂度为 O(1)
+    """
+
+    def __init__(self):
+        self.data = np.empty(_INITIAL_CAPACITY, dtype=np.int32)
+        self.size = 0
+
+    @classmethod
+    def wrap(cls, values):
+        """
+        直接使用已有的 int32 数组（可以是内存映射的数组），追加超过其长度时才复制到新数组
+        """
+        column = cls.__new__(cls)
+        column.data = values
+        column.size = len(values)
+        return column
+
+    def _reserve(self, n):
+        if n > len(self.data):
+            data = np.empty(max(n, 2 * len(self.data)), dtype=np.int32)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+    def append(self, value):
+        self._reserve(self.size + 1)
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.int32)
+        self._reserve(self.size + len(values))
+        self.data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    def view(self):
+        return self.data[:self.size]
+
+
+def _ordered_counter(columns, interner):
+    """
+    对若干编号列计数，返回的 Counter 键顺序与按列依次逐个计数时的首次出现顺序一致，
+    从而保证 most_common 在计数相同时的先后次序与基于列表的实现相同
+
+    :param columns: 编号数组列表，按计数顺序排列
+    :param interner: 编号对应的字符串驻留表
+    :return: Counter
+    """
+    n = len(interner)
+    counts = np.zeros(n, dtype=np.int64)
+    first = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+    offset = 0
+    for column in columns:
+        counts += np.bincount(column, minlength=n)
+        uniq, idx = np.unique(column, return_index=True)
+        unseen = first[uniq] == np.iinfo(np.int64).max
+        first[uniq[unseen]] = idx[unseen] + offset
+        offset += len(column)
+    present = np.flatnonzero(counts)
+    order = present[np.argsort(first[present], kind='stable')]
+    strings = interner.strings
+    return Counter(dict(zip([strings[i] for i in order.tolist()], counts[order].tolist())))
+
+
+class ColumnarTripleStore(Sequence):
+    """
+    以 (头实体, 关系, 尾实体) 三列 int32 数组保存三元组
+    """
+
+    def __init__(self, entity_interner=None, relation_interner=None):
+        self.entity_interner = entity_interner if entity_interner is not None else StringInterner()
+        self.relation_interner = relation_interner if relation_interner is not None else StringInterner()
+        self._heads = _IntColumn()
+        self._relations = _IntColumn()
+        self._tails = _IntColumn()
+
+    @classmethod
+    def from_arrays(cls, entity_interner, relation_interner, heads, relations, tails):
+        """
+        由已有的编号数组建立，不复制数组
+
+        :param entity_interner: 实体驻留表
+        :param relation_interner: 关系驻留表
+        :param heads: 头实体编号的 int32 数组
+        :param relations: 关系编号的 int32 数组
+        :param tails: 尾实体编号的 int32 数组
+        :return: ColumnarTripleStore
+        """
+        store = cls(entity_interner, relation_interner)
+        store._heads = _IntColumn.wrap(heads)
+        store._relations = _IntColumn.wrap(relations)
+        store._tails = _IntColumn.wrap(tails)
+        return store
+
+    def select(self, mask):
+        """
+        按布尔数组选出部分三元组，新存储与原存储共用驻留表
+
+        :param mask: 长度为三元组数量的布尔数组
+        :return: ColumnarTripleStore
+        """
+        return ColumnarTripleStore.from_arrays(self.entity_interner, self.relation_interner, self.heads[mask],
+                                               self.relations[mask], self.tails[mask])
+
+    def append(self, triple):
+        """
+        追加一个三元组
+
+        :param triple: (头实体, 关系, 尾实体)
+        """
+        s, p, o = triple
+        self._heads.append(self.entity_interner.intern(s))
+        self._relations.append(self.relation_interner.intern(p))
+        self._tails.append(self.entity_interner.intern(o))
+
+    def extend(self, triples):
+        """
+        批量追加三元组
+
+        :param triples: 三元组可迭代对象
+        """
+        entity_intern = self.entity_interner.intern
+        relation_intern = self.relation_interner.intern
+        heads, relations, tails = [], [], []
+        for s, p, o in triples:
+            heads.append(entity_intern(s))
+            relations.append(relation_intern(p))
+            tails.append(entity_intern(o))
+        self._heads.extend(heads)
+        self._relations.extend(relations)
+        self._tails.extend(tails)
+
+    @property
+    def heads(self):
+        return self._heads.view()
+
+    @property
+    def relations(self):
+        return self._relations.view()
+
+    @property
+    def tails(self):
+        return self._tails.view()
+
+    def _decode(self, start, stop):
+        entities = self.entity_interner.strings
+        relations = self.relation_interner.strings
+        return list(zip([entities[i] for i in self.heads[start:stop].tolist()],
+                        [relations[i] for i in self.relations[start:stop].tolist()],
+                        [entities[i] for i in self.tails[start:stop].tolist()]))
+
+    def __len__(self):
+        return self._heads.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._decode(start, stop)
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('triple index out of range')
+        return (self.entity_interner.strings[self._heads.data[index]],
+                self.relation_interner.strings[self._relations.data[index]],
+                self.entity_interner.strings[self._tails.data[index]])
+
+    def __iter__(self):
+        for start in range(0, len(self), _ITER_CHUNK):
+            yield from self._decode(start, start + _ITER_CHUNK)
+
+    def entity_counter(self):
+        """
+        统计实体（头实体和尾实体）出现的次数
+
+        :return: Counter
+        """
+        return _ordered_counter([self.heads, self.tails], self.entity_interner)
+
+    def relationship_counter(self):
+        """
+        统计关系出现的次数
+
+        :return: Counter
+        """
+        return _ordered_counter([self.relations], self.relation_interner)
+
+    def nbytes(self):
+        """
+        三元组整数列占用的字节数（不含字符串驻留表）
+        """
+        return self.heads.nbytes + self.relations.nbytes + self.tails.nbytes
+
+
+class ColumnarEntityStore(Mapping):
+    """
+    以编号数组保存实体的名称和标签
+
+    通过下标读取得到的是新建的 {'name', 'label'} 字典，修改它不会影响存储，修改实体需重新赋值
+    """
+
+    def __init__(self, name_interner=None, label_interner=None):
+        self.id_interner = StringInterner()
+        self.name_interner = name_interner if name_interner is not None else StringInterner()
+        self.label_interner = label_interner if label_interner is not None else StringInterner()
+        self._names = _IntColumn()
+        self._labels = _IntColumn()
+
+    @classmethod
+    def from_arrays(cls, id_interner, name_interner, label_interner, names, labels):
+        """
+        由已有的编号数组建立，不复制数组
+
+        :param id_interner: 实体标识驻留表，编号即实体所在的行
+        :param name_interner: 名称驻留表
+        :param label_interner: 标签驻留表
+        :param names: 每行实体名称编号的 int32 数组
+        :param labels: 每行实体标签编号的 int32 数组
+        :return: ColumnarEntityStore
+        """
+        store = cls(name_interner, label_interner)
+        store.id_interner = id_interner
+        store._names = _IntColumn.wrap(names)
+        store._labels = _IntColumn.wrap(labels)
+        return store
+
+    def __setitem__(self, entity_id, entity):
+        row = self.id_interner.intern(entity_id)
+        name = self.name_interner.intern(entity['name'])
+        label = self.label_interner.intern(entity['label'])
+        if row == self._names.size:
+            self._names.append(name)
+            self._labels.append(label)
+        else:
+            self._names.data[row] = name
+            self._labels.data[row] = label
+
+    def __getitem__(self, entity_id):
+        row = self.id_interner.lookup(entity_id)
+        if row is None:
+            raise KeyError(entity_id)
+        return {'name': self.name_interner.strings[self._names.data[row]],
+                'label': self.label_interner.strings[self._labels.data[row]]}
+
+    def __contains__(self, entity_id):
+        return self.id_interner.lookup(entity_id) is not None
+
+    def __iter__(self):
+        return iter(self.id_interner.strings)
+
+    def __len__(self):
+        return self._names.size
+
+    @property
+    def names(self):
+        return self._names.view()
+
+    @property
+    def labels(self):
+        return self._labels.view()
+
+    def label_counter(self):
+        """
+        统计每个标签的实体数量
+
+        :return: Counter
+        """
+        return _ordered_counter([self.labels], self.label_interner)
@@ -1,6 +1,52 @@
+import os
+import re
+import time
 import uuid
+from contextlib import contextmanager
 
 def get_uuid():
 
     return str(uuid.uuid1()).replace("-", "").upper()
 
+
+@contextmanager
+def file_lock(path):
+    """
+    跨进程的排他文件锁，多个 worker 进程写同一组文件时依次进行
+    :param path: 锁文件路径，不存在时创建
+    """
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# 预处理函数，一致性计算和近似重复检测使用相同的规则
+def preprocess_name(name):
+    """
+    预处理实体名：移除特殊字符并转换为小写
+    :param name: 实体名
+    :return: 预处理后的实体名
+    """
+    name = re.sub(r'[^\w\s]', '', name)  # 移除特殊字符
+    name = name.lower()  # 转为小写
+    return name
+
@@ -1,16 +1,22 @@
 import json
-from flask import Blueprint, render_template, send_from_directory, redirect,jsonify, current_app
+from flask import Blueprint, render_template, send_from_directory, redirect,jsonify, current_app, Response
 import os
-import threading
+import time
+import data_preprocess
+from jobs import job_manager, remember_file_hash, DATASET_FILES, JobsActive
+from chunked_upload import upload_manager, UploadOffsetError
+from progress_registry import registry
 import similarity_computation
 import Content_relevance_calculation
 import quality_screening
+import duplicate_detection
 import quantity_evaluation
 import ratio
 from flask import request, jsonify
 
 
 triplet_bp = Blueprint('triplet_bp', __name__)
+UPLOAD_FILE_NAMES = {'triples': 'triples_file.csv', 'entities': 'entities_file.csv'}
 
 
 @triplet_bp.route('/')
@@ -28,8 +34,6 @@ def login():
 @triplet_bp.route('/uploading/<file_type>', methods=['POST'])
 def upload_file(file_type):
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'Data')
-    TRIPLES_FILE_NAME = 'triples_file.csv'
-    ENTITIES_FILE_NAME = 'entities_file.csv'
 
     try:
         if not os.path.exists(UPLOAD_FOLDER):
@@ -45,57 +49,226 @@ def upload_file(file_type):
     if file.filename == '':
         return jsonify({'message': 'No selected file'}), 400
 
-    try:
-        if file_type == 'triples':
-            filename = TRIPLES_FILE_NAME
-        elif file_type == 'entities':
-            filename = ENTITIES_FILE_NAME
-        else:
-            return jsonify({'message': 'Invalid file type'}), 400
+    if file_type not in UPLOAD_FILE_NAMES:
+        return jsonify({'message': 'Invalid file type'}), 400
+    # mode=append 时上传的是增量数据，追加到已有文件并增量更新已加载的知识图谱，否则替换原文件
+    mode = request.args.get('mode') or request.form.get('mode', 'replace')
+    if mode == 'append':
+        return append_upload(file, file_type, UPLOAD_FOLDER)
+    if mode != 'replace':
+        return jsonify({'message': f'Invalid upload mode: {mode}'}), 400
 
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
+    try:
+        file_path = os.path.join(UPLOAD_FOLDER, UPLOAD_FILE_NAMES[file_type])
         file.save(file_path)
+        # 丢弃已加载的知识图谱，下次评测时重新读取上传的数据
+        data_preprocess.graph_registry.invalidate()
         return jsonify({'message': 'File uploaded successfully'})
     except Exception as e:
         print(e)
         return jsonify({'message': 'File upload failed', 'error': str(e)}), 500
 
 
+# 评测进度统一记录在 progress_registry 中
+def legacy_progress(name):
+    # 兼容原有的进度接口：progress 为百分比，current / total 为已完成数量和总数
+    snapshot = registry.tracker(name).snapshot()
+    snapshot['progress'] = snapshot['percent']
+    return snapshot
+
+
+@triplet_bp.route('/progress', methods=['GET'])
+def get_progress():
+    return jsonify(registry.snapshot()), 200
+
+
+@triplet_bp.route('/progress/stream', methods=['GET'])
+def stream_progress():
+    # Server-Sent Events：进度变化时推送全部评测的进度，最多每 0.5 秒推送一次，空闲时每 15 秒发送一次心跳
+    def events():
+        version = None
+        while True:
+            current = registry.wait(version, timeout=15) if version is not None else registry.version
+            if current == version:
+                yield ': keep-alive\n\n'
+                continue
+            version = current
+            yield f'data: {json.dumps(registry.snapshot(), ensure_ascii=False)}\n\n'
+            time.sleep(0.5)
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@triplet_bp.route('/progress/<name>', methods=['GET'])
+def get_progress_by_name(name):
+    snapshot = registry.snapshot().get(name)
+    if snapshot is None:
+        return jsonify({'message': f'No progress for {name}'}), 404
+    return jsonify(snapshot), 200
+
+
+def append_upload(file, file_type, upload_folder):
+    delta_path = os.path.join(upload_folder, f'{file_type}_delta.csv')
+    file.save(delta_path)
+    try:
+        return apply_append(delta_path, file_type)
+    finally:
+        os.remove(delta_path)
+
+
+def apply_append(delta_path, file_type):
+    # 评测任务读取已加载的图谱并覆盖输出文件，追加只在没有任务运行时进行
+    try:
+        with job_manager.exclusive():
+            return append_delta(delta_path, file_type)
+    except JobsActive as e:
+        return jsonify({'message': 'Evaluation jobs are running, retry the append after they finish',
+                        'jobs': str(e)}), 409
+
+
+def append_delta(delta_path, file_type):
+    try:
+        if file_type == 'triples':
+            triplets, previous_count = data_preprocess.graph_registry.append_triplets(delta_path)
+            result = {'message': 'File appended successfully', 'appended': len(triplets)}
+            # 已有的筛选结果对应追加前的图谱时，只筛选新增的三元组
+            if previous_count is not None:
+                counts = quality_screening.append_triples(triplets, previous_count)
+                if counts is not None:
+                    job_manager.store_result('screening', counts, DATASET_FILES + (quality_screening.RULES_FILE,))
+                    result['low_quality_counts'] = counts
+        else:
+            appended = data_preprocess.graph_registry.append_entities(delta_path)
+            result = {'message': 'File appended successfully', 'appended': appended}
+    except ValueError as e:
+        return jsonify({'message': 'Invalid CSV file', 'error': str(e)}), 400
+    except Exception as e:
+        print(e)
+        return jsonify({'message': 'File append failed', 'error': str(e)}), 500
+    return jsonify(result)
+
+
+# 分块续传上传：创建会话后按偏移量依次 PUT 分块，中断后查询会话状态从已接收的位置续传，最后 complete
+@triplet_bp.route('/uploads', methods=['POST'])
+def create_upload():
+    params = request.get_json(silent=True) or request.form
+    size = params.get('size')
+    try:
+        session = upload_manager.create(params.get('file_type'), int(size) if size is not None else None,
+                                        params.get('mode', 'replace'),
+                                        str(params.get('convert', '')).lower() in ('1', 'true'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({**session.status(), 'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE']}), 201
+
+
+@triplet_bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    try:
+        return jsonify(upload_manager.get(upload_id).status())
+    except KeyError:
+        return jsonify({'message': f'Upload not found: {upload_id}'}), 404
+
+
+@triplet_bp.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'message': 'offset is required'}), 400
+    try:
+        session = upload_manager.get(upload_id)
+    except KeyError:
+        return jsonify({'message': f'Upload not found: {upload_id}'}), 404
+    try:
+        # 直接从请求体流式写入磁盘，不把分块读入内存
+        session.write(offset, request.stream)
+    except UploadOffsetError as e:
+        return jsonify({'message': str(e), **session.status()}), 409
+    except ValueError as e:
+        return jsonify({'message': str(e), **session.status()}), 400
+    return jsonify(session.status())
+
+
+@triplet_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    sha256 = (request.get_json(silent=True) or {}).get('sha256')
+    try:
+        session = upload_manager.get(upload_id)
+    except KeyError:
+        return jsonify({'message': f'Upload not found: {upload_id}'}), 404
+    try:
+        file_path = session.complete(sha256)
+    except ValueError as e:
+        return jsonify({'message': str(e), **session.status()}), 400
+    status = session.status()
+    try:
+        if session.mode == 'append':
+            return apply_append(file_path, session.file_type)
+        target = os.path.join(os.getcwd(), 'Data', UPLOAD_FILE_NAMES[session.file_type])
+        os.replace(file_path, target)
+        if not session.convert:
+            # 文件内容与上传内容相同，上传时计算的哈希直接作为评测结果的缓存键
+            remember_file_hash(target, session.sha256)
+        data_preprocess.graph_registry.invalidate()
+        return jsonify({'message': 'File uploaded successfully', **status})
+    finally:
+        upload_manager.discard(upload_id)
+
+
+@triplet_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def discard_upload(upload_id):
+    try:
+        upload_manager.discard(upload_id)
+    except KeyError:
+        return jsonify({'message': f'Upload not found: {upload_id}'}), 404
+    return jsonify({'message': 'Upload discarded'})
+
+
 # 基于实体关系数量的数据质量评价参数
 def Quantity_evaluation():
     result = quantity_evaluation.main()  # 调用主计算函数获取结果
-    quantity_evaluation.progress = 100  # 完成后更新进度为100%
     return result
 
 
 @triplet_bp.route('/start-computation-quantity', methods=['GET'])
 def start_computation_quantity():
-    threading.Thread(target=Quantity_evaluation).start()
-    return jsonify({"status": "Quantity_evaluation started"})
+    job = job_manager.submit('quantity', Quantity_evaluation)
+    return jsonify({"status": "Quantity_evaluation started", **job.to_dict()})
 
 
 @triplet_bp.route('/get-quantity-progress', methods=['GET'])
 def get_quantity_progress():
-    return jsonify({"progress": quantity_evaluation.progress}), 200
+    return jsonify(legacy_progress('quantity')), 200
 
 
 # 基于实体关系一致性评测
-def compute_similarity():
-    result = similarity_computation.compute_and_save_consistency(similarity_computation.label_groups)
+def compute_similarity(sample_size=None, seed=0):
+    result = similarity_computation.compute_and_save_consistency(similarity_computation.get_label_groups(),
+                                                                 sample_size=sample_size, seed=seed)
     return result
 
 
 @triplet_bp.route('/start-computation-similarity', methods=['GET'])
 def start_computation_similarity():
-    threading.Thread(target=compute_similarity).start()
-    return jsonify({"status": "similarity computation started"})
+    # 默认对全部实体名精确计算；sample_size 为正整数时每个标签按固定种子抽样，sample_size=all 时强制精确计算
+    sample_size = request.args.get('sample_size', current_app.config.get('SIMILARITY_SAMPLE_SIZE'))
+    if sample_size in ('', 'all'):
+        sample_size = None
+    try:
+        sample_size = None if sample_size is None else int(sample_size)
+        seed = int(request.args.get('seed', 0))
+    except ValueError:
+        return jsonify({'message': 'sample_size and seed must be integers'}), 400
+    if sample_size is not None and sample_size < 1:
+        return jsonify({'message': 'sample_size must be positive'}), 400
+    params = {'sample_size': sample_size, 'seed': seed if sample_size is not None else None}
+    job = job_manager.submit('similarity', lambda: compute_similarity(**params), params=params)
+    return jsonify({"status": "similarity computation started", **job.to_dict()})
 
 
 @triplet_bp.route('/get-similarity-progress', methods=['GET'])
 def get_similarity_progress():
-    with open('Data/similarity/progress.json', 'r', encoding='utf-8') as f:
-        progress_data = json.load(f)
-    return jsonify(progress_data)
+    return jsonify(legacy_progress('similarity')), 200
 
 
 # 基于实体关系比例
@@ -106,46 +279,134 @@ def start_calculation_thread():
 
 @triplet_bp.route('/start-degree-count-calculation', methods=['GET'])
 def start_degree_count_calculation():
-    threading.Thread(target=start_calculation_thread).start()
-    return jsonify({"status": "degree-count started"})
+    job = job_manager.submit('degree', start_calculation_thread)
+    return jsonify({"status": "degree-count started", **job.to_dict()})
 
 
 @triplet_bp.route('/get-degree-count-progress', methods=['GET'])
 def get_degree_count_progress():
-    return jsonify(ratio.progress), 200
+    return jsonify(legacy_progress('degree')), 200
 
 
 # 基于三元组内容关联度
 def compute_relevance():
     result =Content_relevance_calculation.main()
-    Content_relevance_calculation.progress = 100  # 完成后更新进度为100%
     return result
 
 
 @triplet_bp.route('/start-computation-relevance', methods=['GET'])
 def start_computation_relevance():
-    threading.Thread(target=compute_relevance).start()
-    return jsonify({"status": "compute_relevance started"})
+    job = job_manager.submit('relevance', compute_relevance)
+    return jsonify({"status": "compute_relevance started", **job.to_dict()})
 
 
 @triplet_bp.route('/get-relevance-progress', methods=['GET'])
 def get_relevance_progress():
-    return jsonify({"progress": Content_relevance_calculation.progress}), 200
+    return jsonify(legacy_progress('relevance')), 200
 
 # 存量数据质量报告
 def Quality_screening_trid():
-    quality_screening.main()
+    return quality_screening.main()
 
 
 @triplet_bp.route('/start-computation-screening', methods=['GET'])
 def start_computation_screening():
-    threading.Thread(target=Quality_screening_trid).start()
-    return jsonify({"status": "Quality_screening started"})
+    job = job_manager.submit('screening', Quality_screening_trid, DATASET_FILES + (quality_screening.RULES_FILE,))
+    return jsonify({"status": "Quality_screening started", **job.to_dict()})
 
 
 @triplet_bp.route('/get-screening-progress', methods=['GET'])
 def get_screening_progress():
-    return jsonify(quality_screening.progress), 200
+    return jsonify(legacy_progress('screening')), 200
+
+
+# 重复三元组检测：流式扫描三元组文件，统计完全重复和近似重复
+def detect_duplicates():
+    return duplicate_detection.main()
+
+
+@triplet_bp.route('/start-computation-duplicates', methods=['GET'])
+def start_computation_duplicates():
+    job = job_manager.submit('duplicates', detect_duplicates)
+    return jsonify({"status": "duplicate detection started", **job.to_dict()})
+
+
+@triplet_bp.route('/get-duplicates-progress', methods=['GET'])
+def get_duplicates_progress():
+    return jsonify(legacy_progress('duplicates')), 200
+
+
+# 分页读取低质量三元组，category 为空时按类别顺序读取全部类别，耗时与低质量三元组总数无关
+@triplet_bp.route('/get-low-quality-triples', methods=['GET'])
+def get_low_quality_triples():
+    category = request.args.get('category', '')
+    offset = request.args.get('offset', default=0, type=int)
+    limit = request.args.get('limit', default=100, type=int)
+    if offset < 0 or not 0 < limit <= 1000:
+        return jsonify({'message': 'offset must be >= 0 and limit between 1 and 1000'}), 400
+    try:
+        triples, total = quality_screening.get_low_quality_page(category, offset, limit)
+    except FileNotFoundError:
+        return jsonify({'message': 'Screening results not found'}), 404
+    except KeyError:
+        return jsonify({'message': f'Unknown category: {category}'}), 404
+    return jsonify({
+        'category': category,
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'triples': triples
+    }), 200
+
+
+# 后台任务：同一数据集的同类任务只运行一次，数据集未变化时直接返回缓存的结果
+@triplet_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    kind = request.args.get('kind') or None
+    return jsonify([job.to_dict() for job in job_manager.list(kind)]), 200
+
+
+@triplet_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@triplet_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+    if job.state != 'finished':
+        return jsonify({'message': f'Job is {job.state}', **job.to_dict()}), 409
+    return jsonify({'result': job.result, **job.to_dict()}), 200
+
+
+@triplet_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+
+# 实体邻域查询（知识图谱页面），耗时与实体的度数成正比
+@triplet_bp.route('/get-entity-triplets', methods=['GET'])
+def get_entity_triplets():
+    entity = request.args.get('name', '')
+    if not entity:
+        return jsonify({'message': 'Missing entity name'}), 400
+    limit = request.args.get('limit', default=None, type=int)
+    knowledge_graph = data_preprocess.get_knowledge_graph()
+    outgoing = knowledge_graph.get_entity_triplets(entity, direction='out', limit=limit)
+    incoming = knowledge_graph.get_entity_triplets(entity, direction='in', limit=limit)
+    return jsonify({
+        'name': entity,
+        'outgoing': [list(triple) for triple in outgoing],
+        'incoming': [list(triple) for triple in incoming]
+    }), 200
 
 
 @triplet_bp.route('/results/<filename>', methods=['GET'])
@@ -1,6 +1,14 @@
 import re
-import copy
 import os
+import csv
+import sqlite3
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from csv_stream import TRIPLET_COLUMNS
 
 zhongwen = re.compile(u'[\u4e00-\u9fa5]')  # 检查非中文
 t = '{'
@@ -8,232 +16,215 @@ don = '、'
 comma = '，'
 colon = '：'
 
-find_all = lambda data, s: [r for r in range(len(data)) if data[r] == s]
+punctuations = {t, don, comma, colon}
 
 
 # 句子结构转换
 def index2tag(sentence):
-	names = []
-	attrs = []
-	tag_list = find_all(sentence, t)
-	don_list = find_all(sentence, don)
-	comma_list = find_all(sentence, comma)
-	colon_list = find_all(sentence, colon)
-	# print(pun1_list)
-	pun_list = sorted(don_list + comma_list + colon_list)
-	all_list = sorted(pun_list + tag_list)
-	# 将标点索引替换成标点符号
-	for i in range(len(all_list)):
-		#  替换出除大括号以外其他的标点符号
-		if sentence[all_list[i]] != '{':
-			all_list[i] = sentence[all_list[i]]
-
-	entity_list = copy.deepcopy(all_list)
-	entity_type_list = copy.deepcopy(all_list)
-	# endfor
+	# 一次遍历得到大括号和标点的位置：标点替换成标点符号，大括号保留索引
+	all_list = [r if ch == t else ch for r, ch in enumerate(sentence) if ch in punctuations]
+	entity_list = list(all_list)
+	entity_type_list = list(all_list)
 
 	# 据姚觐元{-3 PER}、钱保塘{-3 PER}《涪州石鱼文字所见录》{-11 BOOK}，耆后可补入“□□□□□□□瑾公琰。
 	# ['姚觐元', '、', '钱保塘', '《涪州石鱼文字所见录》', '，']
 	# ['PER', '、', 'PER', ' BO', '，']
-	for i in range(len(all_list)):
-		for j in range(len(tag_list)):
-			if tag_list[j] == all_list[i]:  # all_list[i] = '{'
-				brace_index = int(tag_list[j])  # 括号索引
-				abb_index = int(tag_list[j]) + 4  # 实体类型标注索引
-				length = int(sentence[brace_index + 2: brace_index + 4])  # 标注长度
-				entity_content = sentence[brace_index - length: brace_index]  # 实体
-				entity_type = sentence[brace_index + 4: brace_index + 7]  # 类型
-				changdu = zhongwen.findall(str(entity_content))  # 获取中文字符个数
-
-				L1 = length - len(changdu)  # 非中文个数
-				ss = 1
-				entity_content = list(entity_content)
-				for ii in range(L1):
-					while 1:
-						ch = sentence[brace_index - length - ss]
-						ss += 1
-						if '\u4e00' <= ch <= '\u9fff':
-							entity_content.insert(0, ch)
-							break
-
-				count = 0
-				# 去除括号等
-				for iii in range(len(entity_content)):
-					if '\u4e00' > entity_content[iii] or entity_content[iii] > '\u9fff':
-						count += 1
-						entity_content[iii] = 0
-
-				for jj in range(count):
-					entity_content.remove(0)
-
-				entity_content = ''.join(entity_content)  # 列表转换字符串
-				entity_type_list[i] = entity_type
-				entity_list[i] = entity_content
+	for i, brace_index in enumerate(all_list):
+		if isinstance(brace_index, str):
+			continue  # 标点符号
+		length = int(sentence[brace_index + 2: brace_index + 4])  # 标注长度
+		entity_content = sentence[brace_index - length: brace_index]  # 实体
+		entity_type = sentence[brace_index + 4: brace_index + 7]  # 类型
+		changdu = zhongwen.findall(str(entity_content))  # 获取中文字符个数
+
+		L1 = length - len(changdu)  # 非中文个数
+		ss = 1
+		entity_content = list(entity_content)
+		for ii in range(L1):
+			while 1:
+				ch = sentence[brace_index - length - ss]
+				ss += 1
+				if '\u4e00' <= ch <= '\u9fff':
+					entity_content.insert(0, ch)
+					break
 
+		# 去除括号等非中文字符
+		entity_content = ''.join(ch for ch in entity_content if '\u4e00' <= ch <= '\u9fff')
+		entity_type_list[i] = entity_type
+		entity_list[i] = entity_content
 	# endfor
 
 	return entity_list, entity_type_list
 
 
-def find_index(path, Triplepath):
+class _LineSet(set):
+	# 内存去重集合，add 返回该行是否第一次出现
+	def add(self, line):
+		if line in self:
+			return False
+		super().add(line)
+		return True
+
+	def close(self):
+		pass
+
+
+class _SqliteLineSet:
+	# 基于 SQLite 的磁盘去重集合，语料很大、三元组无法全部放入内存时使用
+	def __init__(self, db_path):
+		self.db_path = db_path
+		self._conn = sqlite3.connect(db_path)
+		self._conn.execute('DROP TABLE IF EXISTS lines')
+		self._conn.execute('CREATE TABLE lines (line TEXT PRIMARY KEY)')
+
+	def add(self, line):
+		return self._conn.execute('INSERT OR IGNORE INTO lines VALUES (?)', (line,)).rowcount == 1
+
+	def close(self):
+		self._conn.close()
+		os.remove(self.db_path)
+
+
+# 两个实体之间每个标注（实体或标点）累加的距离，超过 max_distance 的实体对不再组成三元组
+pun_distance = {'：': 1, '、': 2, '，': 5}
+max_distance = 100
+
+# (起点类型, 终点类型) -> (关系名, 是否以终点实体为头实体, 每个起点只取第一个终点的计数名, 书名一侧)
+# 书名一侧为 'start' 或 'end' 时，关系名为 (题刻关系, 书名关系)：书名含“题”时取题刻关系，书名去掉前两个字符
+# 与原关系表和判断逻辑保持一致：('GM}', 'PER') 在关系表中但不生成三元组，('ZZ}', 'PER') 不在关系表中，
+# ('BOO', 'PER') 按类型判断“题”，总是书名关系且不截取书名
+pair_relations = {
+	('GZ}', 'PER'): ('人物官职', True, 'gz', None),
+	('PER', 'GZ}'): ('人物官职', False, 'gz', None),
+	('PER', ' BO'): (('人物题刻', '人物书名'), False, None, 'end'),
+	('PER', 'TIM'): ('人物时代', False, 'sd', None),
+	('TIM', 'PER'): ('人物时代', True, 'sd', None),
+	('BOO', 'PER'): ('人物书名', True, None, None),
+	('PER', 'GM}'): ('人物功名', False, 'gm', None),
+	('PER', 'ZZ}'): ('人物字号', False, 'z', None),
+	('PER', 'HH}'): ('人物字号', False, 'h', None),
+	('PER', 'LOC'): ('人物地名', False, 'dm', None),
+	('PER', 'BOO'): (('人物题刻', '人物书名'), False, None, 'end'),
+	('BOO', 'TIM'): (('题刻时代', '书名时代'), False, None, 'start'),
+}
+end_types = {}
+for (start_type, end_type), rule in pair_relations.items():
+	end_types.setdefault(start_type, []).append((end_type, rule))
+
+
+def pair_triples(entity_list, entity_type_list):
+	# 由 index2tag 的结果生成句子中的三元组 (头实体, 关系, 距离, 尾实体)，顺序与逐个向后扫描相同
+	# 距离由标注权重的前缀和相减得到，每个起点的距离窗口用双指针确定，
+	# 窗口内只按终点类型的位置列表取候选，不逐个比较窗口内的所有标注
+	n = len(entity_type_list)
+	prefix = [0]
+	positions = {}
+	for j, flag_type in enumerate(entity_type_list):
+		prefix.append(prefix[-1] + pun_distance.get(flag_type, 1))
+		positions.setdefault(flag_type, []).append(j)
+
 	Triple_Set = []
+	stop = 0
+	for i, flag_start_type in enumerate(entity_type_list):
+		# 窗口为 (i, stop)：起点之后、累计距离不超过 max_distance 的标注
+		stop = max(stop, i + 1)
+		while stop < n and prefix[stop + 1] - prefix[i + 1] <= max_distance:
+			stop += 1
+		rules = end_types.get(flag_start_type)
+		if rules is None:
+			continue
+		candidates = []
+		for end_type, rule in rules:
+			end_positions = positions.get(end_type)
+			if not end_positions:
+				continue
+			first = bisect_right(end_positions, i)
+			last = bisect_left(end_positions, stop, first)
+			if first == last:
+				continue
+			# 有计数名的关系每个起点只取窗口内的第一个终点
+			chosen = end_positions[first:first + 1] if rule[2] is not None else end_positions[first:last]
+			candidates.extend((j, rule) for j in chosen)
+		candidates.sort(key=itemgetter(0))
 
-	pun_distance = {'：': 1, '、': 2, '，': 5}
-	# relation=[('GZ','PE'),{'PE':'GZ'},{'PE':'GM'},{'PE':'ZH'},{'PE':'TI'},{'PE':'LO'},{'PE':'BO'},{'PE':'PE'}{'BO':'TI'},{'TK':'TI'},{'TK','Content'},{'TK':'BO'},{'TK':'PE'}]
-	# relation=[('GZ}','PER'),('PER','GZ}'),('PER',' BO'),('PER','GM}'),('PER','ZH}'),('PER','TIM'),('PER','LOC'),('PER','BOO'),('BOO','TIM')]
-	relation = [('GZ}', 'PER'), ('TIM', 'PER'), ('BOO', 'PER'), ('GZ}', 'PER'), ('GM}', 'PER'), ('PER', 'GZ}'),
-				('PER', ' BO'), ('PER', 'GM}'), ('PER', 'ZZ}'), ('PER', 'TIM'),
-				('PER', 'LOC'), ('PER', 'BOO'), ('BOO', 'TIM'), ('PER', 'HH}')]
+		flag_start_content = entity_list[i]
+		for j, (name, reverse, _, book_side) in candidates:
+			flag_end_content = entity_list[j]
+			head, tail = flag_start_content, flag_end_content
+			if book_side is not None:
+				book = head if book_side == 'start' else tail
+				name = name[0] if '题' in book else name[1]
+				if book_side == 'start':
+					head = head[2:]
+				else:
+					tail = tail[2:]
+			if reverse:
+				head, tail = tail, head
+			Triple_Set.append((head, name, prefix[j + 1] - prefix[i + 1], tail))
+	return Triple_Set
+
+
+def extract_triples(path):
+	# 逐行读取标注文本，每行生成一次该行抽取到的 (头实体, 关系, 距离, 尾实体) 列表
 	with open(path, 'r', encoding='utf-8') as f:
 		for txt in f:
+			Triple_Set = []
 			txt = txt.replace('\n', '')
 			txt = txt.split('。')  # 按句分割
 			# entity_list ['姚觐元', '、', '钱保塘', '：', '《涪州石鱼文字所见录》', '，', '，', '广陵书社', '，', '，']
 			# entity_type_list ['PER', '、', 'PER', '：', ' BO', '，', '，', 'ORG', '，', '，']
 			for sentence in txt:
 				entity_list, entity_type_list = index2tag(sentence)
-				for i in range(len(entity_type_list)):
-					distance = 0
-					sdcount = 0
-					gzcount = 0
-					zcount = 0
-					hcount = 0
-					dmcount = 0
-					gmcount = 0
-					flag_start_type = entity_type_list[i]
-					flag_start_content = entity_list[i]
-					# print('flag_start_type:', flag_start_type)
-					# print('flag_start_content:', flag_start_content)
-					for j in range(i + 1, len(entity_type_list)):
-
-						flag_end_type = entity_type_list[j]
-						flag_end_content = entity_list[j]
-						# print(flag_end_content)
-						if flag_end_type == '：':
-							distance = distance + 1
-						elif flag_end_type == '，':
-							distance = distance + 5
-						elif flag_end_type == '、':
-							distance = distance + 2
-						else:
-							distance = distance + 1
-						# print('距离',distance)
-						if distance > 100:
-							break
-						else:
-							triple = (flag_start_type, flag_end_type)
-							if triple in relation:
-								if flag_start_type == 'GZ}' and flag_end_type == 'PER':
-									if gzcount == 0:
-										triple_content = (flag_end_content, '人物官职', distance, flag_start_content)
-										Triple_Set.append(triple_content)
-										gzcount += 1
-									else:
-										continue
-								elif flag_start_type == 'PER' and flag_end_type == 'GZ}':
-									if gzcount == 0:
-										triple_content = (flag_start_content, '人物官职', distance, flag_end_content)
-										Triple_Set.append(triple_content)
-										gzcount += 1
-									else:
-										continue
-								elif flag_start_type == 'PER' and flag_end_type == ' BO':
-									if '题' in flag_end_content:
-										triple_content = (flag_start_content, '人物题刻', distance, flag_end_content[2:])
-									else:
-										triple_content = (flag_start_content, '人物书名', distance, flag_end_content[2:])
-									Triple_Set.append(triple_content)
-								elif flag_start_type == 'PER' and flag_end_type == 'TIM':
-									if sdcount == 0:
-										triple_content = (flag_start_content, '人物时代', distance, flag_end_content)
-										Triple_Set.append(triple_content)
-										sdcount += 1
-									else:
-										continue
-								elif flag_start_type == 'TIM' and flag_end_type == 'PER':
-									if sdcount == 0:
-										triple_content = (flag_end_content, '人物时代', distance, flag_start_content)
-										Triple_Set.append(triple_content)
-										sdcount += 1
-									else:
-										continue
-
-								elif flag_start_type == 'ZZ}' and flag_end_type == 'PER':
-									if zcount == 0:
-										triple_content = (flag_end_content, '人物字号', distance, flag_start_content)
-										Triple_Set.append(triple_content)
-										zcount += 1
-									else:
-										continue
-								elif flag_start_type == 'BOO' and flag_end_type == 'PER':
-									if '题' in flag_start_type:
-										triple_content = (flag_end_content, '人物题刻', distance, flag_start_content)
-										Triple_Set.append(triple_content)
-									else:
-										triple_content = (flag_end_content, '人物书名', distance, flag_start_content)
-										Triple_Set.append(triple_content)
-								elif flag_start_type == 'PER' and flag_end_type == 'GM}':
-									if gmcount == 0:
-										triple_content = (flag_start_content, '人物功名', distance, flag_end_content)
-										Triple_Set.append(triple_content)
-										gmcount += 1
-									else:
-										continue
-								elif flag_start_type == 'PER' and flag_end_type == 'ZZ}':
-									if zcount == 0:
-										triple_content = (flag_start_content, '人物字号', distance, flag_end_content)
-										Triple_Set.append(triple_content)
-										zcount += 1
-									else:
-										continue
-								elif flag_start_type == 'PER' and flag_end_type == 'HH}':
-									if hcount == 0:
-										triple_content = (flag_start_content, '人物字号', distance, flag_end_content)
-										Triple_Set.append(triple_content)
-										hcount += 1
-									else:
-										continue
-
-								elif flag_start_type == 'PER' and flag_end_type == 'LOC':
-									if dmcount == 0:
-										triple_content = (flag_start_content, '人物地名', distance, flag_end_content)
-										Triple_Set.append(triple_content)
-										dmcount += 1
-									else:
-										continue
-								elif flag_start_type == 'PER' and flag_end_type == 'BOO':
-									if '题' in flag_end_content:
-										triple_content = (flag_start_content, '人物题刻', distance, flag_end_content[2:])
-									else:
-										triple_content = (flag_start_content, '人物书名', distance, flag_end_content[2:])
-									Triple_Set.append(triple_content)
-								elif flag_start_type == 'BOO' and flag_end_type == 'TIM':
-									if '题' in flag_start_content:
-										triple_content = (flag_start_content[2:], '题刻时代', distance, flag_end_content)
-									else:
-										triple_content = (flag_start_content[2:], '书名时代', distance, flag_end_content)
-									Triple_Set.append(triple_content)
-
-			with open(Triplepath + '\\' + 'Triple_Set副本.txt', 'a', encoding='utf-8') as ff:
+				Triple_Set.extend(pair_triples(entity_list, entity_type_list))
+			yield Triple_Set
+
+
+def find_index(path, Triplepath, dedup='memory'):
+	# 流式抽取三元组，去重后按第一次出现的顺序写入 Triple_Set.txt，每个三元组只写一次
+	# dedup 为 'disk' 时用 SQLite 文件去重，内存占用与三元组数量无关；返回读取的行数
+	output_path = os.path.join(Triplepath, 'Triple_Set.txt')
+	seen = _line_set(dedup, os.path.join(Triplepath, 'Triple_Set.db'))
+	lines = 0
+	try:
+		with open(output_path + '.tmp', 'w', encoding='utf-8') as ff:
+			for Triple_Set in extract_triples(path):
+				lines += 1
 				for item in Triple_Set:
 					if len(item[0]) > 1 and len(item[3]) > 1:
-						ff.write(str(item[0]))
-						ff.write('\t')
-						ff.write(str(item[1]))
-						ff.write('\t')
-						# f.write(str(item[2]))
-						# f.write('\t')
-						ff.write(str(item[3]))
-
-						ff.write('\n')
-			Triple_Set = []
-			tfile = open(Triplepath + '\\' + 'Triple_Set副本.txt', 'r', encoding='utf-8')
-			templist = tfile.readlines()
-			templist = set(templist)
-			filetemp = open(Triplepath + '\\' + 'Triple_Set.txt', 'w', encoding='utf-8')
-			for ite in templist:
-				filetemp.write(str(ite))
-			filetemp.close()
+						line = f'{item[0]}\t{item[1]}\t{item[3]}\n'
+						if seen.add(line):
+							ff.write(line)
+		os.replace(output_path + '.tmp', output_path)
+	except BaseException:
+		_remove_temp(output_path + '.tmp')
+		raise
+	finally:
+		seen.close()
+	return lines
+
+
+def _remove_temp(temp_path):
+	# 抽取失败时删除未写完的临时文件，原有的输出文件保持不变
+	if os.path.exists(temp_path):
+		os.remove(temp_path)
+
+
+def _line_set(dedup, db_path):
+	if dedup == 'memory':
+		return _LineSet()
+	if dedup == 'disk':
+		return _SqliteLineSet(db_path)
+	raise ValueError(f"Unknown dedup mode: {dedup}")
+
+
+def extract_document(Triplepath, dedup='memory'):
+	# 抽取一个文档目录中“原文标注.txt”的三元组，写入该目录的 Triple_Set.txt，
+	# 返回 (目录, [(头实体, 关系, 尾实体)], 读取的行数, 耗时秒数)，在进程池中执行
+	start = time.perf_counter()
+	lines = find_index(os.path.join(Triplepath, '原文标注.txt'), Triplepath, dedup)
+	with open(os.path.join(Triplepath, 'Triple_Set.txt'), 'r', encoding='utf-8') as f:
+		triples = [tuple(line.rstrip('\n').split('\t')) for line in f]
+	return Triplepath, triples, lines, time.perf_counter() - start
 
 
 # def judge_cate()
@@ -263,14 +254,58 @@ def quchong1(filepath):
 	fp.close()
 
 
-def main(path):
-	files = os.listdir(path)
-
-	for file in files:
-		Triplepath = path + '\\' + file
+def main(path, workers=None, output_path=None, dedup='memory'):
+	# 用进程池并行抽取 path 下每个文档目录的三元组，合并去重后写入可直接用 KnowledgeGraph.load_triplets 加载的 CSV
+	# workers 为进程数（默认 CPU 核数，为 1 时不使用多进程）；output_path 默认为 path 下的 triples_file.csv
+	# 返回每个文档的统计：目录、读取的行数、去重后的三元组数量、耗时和吞吐量
+	documents = sorted(os.path.join(path, file) for file in os.listdir(path)
+					   if os.path.isfile(os.path.join(path, file, '原文标注.txt')))
+	if output_path is None:
+		output_path = os.path.join(path, 'triples_file.csv')
+	workers = workers or os.cpu_count() or 1
+	start = time.perf_counter()
+	if workers == 1 or len(documents) <= 1:
+		results = (extract_document(document, dedup) for document in documents)
+		executor = None
+	else:
+		# 与筛选进程一致使用 spawn 启动，在多线程的进程中调用时不会复制其他线程持有的锁
+		executor = ProcessPoolExecutor(max_workers=min(workers, len(documents)),
+									   mp_context=multiprocessing.get_context('spawn'))
+		# 按文档顺序合并，合并结果与串行抽取相同
+		results = executor.map(extract_document, documents, repeat(dedup))
 
-		biaozhu_path = path + '\\' + file + '\\' + '原文标注.txt'
-		find_index(biaozhu_path, Triplepath)
-		os.remove(Triplepath + '\\' + 'Triple_Set副本.txt')
+	report = []
+	merged = 0
+	seen = _line_set(dedup, output_path + '.db')
+	try:
+		with open(output_path + '.tmp', 'w', encoding='utf-8-sig', newline='') as f:
+			writer = csv.writer(f)
+			writer.writerow(TRIPLET_COLUMNS)
+			for Triplepath, triples, lines, seconds in results:
+				for triple in triples:
+					if seen.add('\t'.join(triple)):
+						writer.writerow(triple)
+						merged += 1
+				report.append({
+					'document': os.path.basename(Triplepath),
+					'lines': lines,
+					'triples': len(triples),
+					'seconds': round(seconds, 3),
+					'lines_per_second': round(lines / seconds, 1) if seconds > 0 else None,
+				})
+				print(f"{os.path.basename(Triplepath)}: {lines} 行, {len(triples)} 个三元组, {seconds:.2f}s")
+		os.replace(output_path + '.tmp', output_path)
+	except BaseException:
+		_remove_temp(output_path + '.tmp')
+		raise
+	finally:
+		seen.close()
+		if executor is not None:
+			executor.shutdown()
+	elapsed = time.perf_counter() - start
+	total_lines = sum(item['lines'] for item in report)
+	print(f"共 {len(report)} 个文档, {total_lines} 行, 合并去重后 {merged} 个三元组, "
+		  f"耗时 {elapsed:.2f}s, {total_lines / elapsed if elapsed > 0 else 0:.1f} 行/s, 已保存到 {output_path}")
+	return report
 # print('end')
 # quchong1(r'E:\项目文件\Triple_Set1.txt')